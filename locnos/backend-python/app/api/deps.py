@@ -4,7 +4,7 @@ Usado como Depends() nos endpoints FastAPI
 """
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from jose import JWTError
@@ -18,14 +18,8 @@ from app.schemas.auth import TokenPayload
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Dependency para obter usuário autenticado via JWT token.
-    Uso: current_user: User = Depends(get_current_user)
-    """
+def _user_from_token(token: str, db: Session) -> User:
+    """Valida o JWT e carrega o usuário (401 se inválido)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
@@ -33,7 +27,6 @@ async def get_current_user(
     )
     
     try:
-        token = credentials.credentials
         payload = decode_token(token)
         
         if payload is None:
@@ -54,6 +47,17 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency para obter usuário autenticado via JWT token.
+    Uso: current_user: User = Depends(get_current_user)
+    """
+    return _user_from_token(credentials.credentials, db)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -69,6 +73,25 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_stream_user(
+    access_token: Optional[str] = Query(None, description="JWT (EventSource não envia cabeçalhos)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Usuário ativo de conexões longas (SSE): token no cabeçalho Authorization
+    ou no parâmetro `access_token`.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_active_user(_user_from_token(token, db))
+
+
 def require_role(*allowed_roles: UserRole):
     """
     Factory para criar dependency que verifica roles.
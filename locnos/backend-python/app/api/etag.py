@@ -0,0 +1,86 @@
+"""
+Helpers para requisições condicionais (ETag / If-None-Match / If-Match)
+Baseados na coluna `version` dos models (controle otimista de concorrência)
+e no ETag das respostas guardadas no cache de respostas.
+"""
+
+from typing import Optional, Any
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.cache import CachedResponse
+
+
+def make_etag(resource_id: Any, version: int) -> str:
+    """ETag forte derivado do id e da versão do registro"""
+    return f'"{resource_id}-{version}"'
+
+
+def etag_matches(header_value: Optional[str], etag: str) -> bool:
+    """
+    Verifica se o ETag aparece no header (If-None-Match / If-Match).
+    Aceita lista separada por vírgulas e o curinga "*".
+    """
+    if not header_value:
+        return False
+
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Resposta 304 sem corpo (nenhuma serialização é feita)"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def check_if_match(if_match: Optional[str], etag: str) -> None:
+    """
+    Valida o header If-Match antes de uma atualização.
+    Sem header, a atualização segue normalmente (compatibilidade com clientes antigos).
+    """
+    if if_match and not etag_matches(if_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="O registro foi alterado por outro usuário. Recarregue e tente novamente."
+        )
+
+
+def commit_versioned(db: Session) -> None:
+    """
+    Commit de um model versionado.
+    O UPDATE é emitido com `WHERE version = :v`; se outra transação já alterou
+    a linha, o SQLAlchemy levanta StaleDataError e respondemos 412.
+    """
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="O registro foi alterado por outro usuário. Recarregue e tente novamente."
+        )
+
+
+def cached_response(cached: CachedResponse, if_none_match: Optional[str], max_age: Optional[int], private: bool = False) -> Response:
+    """
+    Resposta a partir de uma entrada do cache de respostas.
+    O corpo já está serializado; 304 se o cliente já tem a mesma versão.
+    `private` para dados autenticados (proxies/CDN não guardam).
+    `max_age` None: no-cache (o navegador sempre revalida pelo ETag).
+    """
+    freshness = "no-cache" if max_age is None else f"max-age={max_age}"
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"{'private' if private else 'public'}, {freshness}",
+    }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -5,5 +5,10 @@ from .persons import router as persons_router
 from .subcategorias import router as subcategorias_router
 from .dashboard import router as dashboard_router
 from .contracts import router as contracts_router
+from .media import router as media_router
+from .analytics import router as analytics_router
+from .categories import router as categories_router
+from .events import router as events_router
+from .pedidos import router as pedidos_router
 
-__all__ = ["auth_router", "equipment_router", "persons_router", "subcategorias_router", "dashboard_router", "contracts_router"]
+__all__ = ["auth_router", "equipment_router", "persons_router", "subcategorias_router", "dashboard_router", "contracts_router", "media_router", "analytics_router", "categories_router", "events_router", "pedidos_router"]
@@ -0,0 +1,67 @@
+"""
+Router de Relatórios - utilização e receita dos equipamentos
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date, timedelta
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.cache import response_cache, make_cache_key
+from app.services.analytics import MAX_WINDOW_DAYS, utilization_report
+from app.models.user import User
+from app.schemas.analytics import UtilizationReportResponse
+from app.api.deps import require_staff
+from app.api.etag import cached_response
+
+router = APIRouter()
+
+
+@router.get("/utilization", response_model=UtilizationReportResponse)
+def get_utilization_report(
+    start: Optional[date] = Query(None, description="Início da janela (padrão: 12 meses atrás)"),
+    end: Optional[date] = Query(None, description="Fim da janela, inclusive (padrão: hoje)"),
+    category_id: Optional[List[UUID]] = Query(None),
+    top: int = Query(50, ge=0, le=500, description="Equipamentos listados"),
+    sort: str = Query("idle", pattern="^(idle|utilization|revenue)$", description="Ordem dos equipamentos"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Utilização, dias ociosos e receita por mês, categoria e equipamento.
+    
+    - **utilization**: unidade-dias locados / unidade-dias disponíveis (%)
+    - **idle_days**: dias em que o equipamento existia e nenhuma unidade saiu
+    - **revenue**: diária x quantidade dos dias locados dentro da janela
+    - **sort**: `idle` (mais ociosos), `utilization` ou `revenue` (maiores primeiro)
+    
+    Resultado em cache até uma mudança de status de contrato (ou o TTL do cache).
+    """
+    today = date.today()
+    end = end or today
+    start = start or (end.replace(day=1) - timedelta(days=335)).replace(day=1)
+    
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Início depois do fim")
+    if (end - start).days + 1 > MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Janela máxima de {MAX_WINDOW_DAYS} dias"
+        )
+    
+    # Contratos ativos ocupam até hoje: o resultado muda com a data
+    cache_key = make_cache_key("analytics-utilization", {
+        "start": start, "end": end, "as_of": today, "top": top, "sort": sort,
+        "category_id": ",".join(sorted(map(str, category_id or []))),
+    })
+    cached, generation = response_cache.lookup(cache_key)
+    if cached is None:
+        report = utilization_report(db, start, end, category_id, top=top, sort=sort)
+        body = UtilizationReportResponse(**report).model_dump_json().encode()
+        cached = response_cache.set(cache_key, body, ["analytics"], generation)
+    
+    return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS, private=True)
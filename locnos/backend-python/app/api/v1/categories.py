@@ -0,0 +1,29 @@
+"""
+Router de Categorias - árvore servida da memória
+"""
+
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.services.category_tree import get_category_tree
+from app.schemas.category import CategoryTreeResponse
+from app.api.etag import cached_response
+
+router = APIRouter()
+
+
+@router.get("/tree", response_model=CategoryTreeResponse)
+async def category_tree(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Árvore de categorias ativas com filhas e subcategorias.
+    Endpoint público, servido de um snapshot em memória já serializado
+    (reconstruído quando categorias ou subcategorias mudam).
+    """
+    tree = get_category_tree(db)
+    return cached_response(tree.response, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
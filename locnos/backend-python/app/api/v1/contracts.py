@@ -2,16 +2,21 @@
 API Endpoints para Contratos de Locação
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, select
 from typing import List, Optional
 from datetime import datetime, date
 from decimal import Decimal
+from uuid import UUID
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.serialization import json_response
+from app.core.cache import response_cache, invalidate_catalog
 from app.api.deps import get_current_user, require_permission
-from app.models import Contract, ContractItem, ContractStatus, User, Person, Equipment
+from app.api.etag import make_etag, etag_matches, not_modified, check_if_match, commit_versioned
+from app.models import Contract, ContractItem, ContractStatus, ContractEventType, User, Person, Equipment
 from app.schemas.contract import (
     ContractCreate,
     ContractUpdate,
@@ -22,8 +27,14 @@ from app.schemas.contract import (
     ContractItemCreate,
     ContractItemResponse,
     ContractCalculation,
-    ContractFilters
+    ContractFilters,
+    ContractEventResponse,
+    ContractEventListResponse
 )
+from app.services.contract_events import record_contract_event, list_contract_events
+from app.services.rental_stats import apply_contract_transition
+from app.services.dashboard_stats import invalidate_dashboard_stats
+from app.services.credit import CreditDenied, OPEN_STATUSES, apply_contract_exposure, apply_exposure, check_credit
 
 router = APIRouter()
 
@@ -184,7 +195,7 @@ async def list_contracts(
         query = query.join(Person, Contract.customer_id == Person.id).filter(
             or_(
                 Contract.contract_number.ilike(f"%{search}%"),
-                Person.name.ilike(f"%{search}%")
+                Person.display_name.ilike(f"%{search}%")
             )
         )
     
@@ -193,6 +204,44 @@ async def list_contracts(
     
     # Paginação
     offset = (page - 1) * page_size
+    total_pages = (total + page_size - 1) // page_size
+    
+    if settings.FAST_JSON_RESPONSES:
+        # Projeção direto em tuplas: sem joinedload dos itens e sem Pydantic
+        customer_name = (
+            select(Person.display_name)
+            .where(Person.id == Contract.customer_id)
+            .correlate(Contract)
+            .scalar_subquery()
+        )
+        items_count = (
+            select(func.count(ContractItem.id))
+            .where(ContractItem.contract_id == Contract.id)
+            .correlate(Contract)
+            .scalar_subquery()
+        )
+        rows = query.with_entities(
+            Contract.id,
+            Contract.contract_number,
+            customer_name.label("customer_name"),
+            Contract.status,
+            Contract.start_date,
+            Contract.end_date,
+            Contract.total_value,
+            Contract.total_days,
+            items_count.label("items_count"),
+            Contract.created_at
+        ).order_by(Contract.created_at.desc()).offset(offset).limit(page_size).all()
+        
+        items = [dict(row._mapping, id=str(row.id)) for row in rows]
+        return json_response({
+            "items": items,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages
+        })
+    
     contracts = query.options(
         joinedload(Contract.customer),
         joinedload(Contract.items)
@@ -201,9 +250,9 @@ async def list_contracts(
     # Montar resposta
     items = [
         ContractListItem(
-            id=contract.id,
+            id=str(contract.id),
             contract_number=contract.contract_number,
-            customer_name=contract.customer.name,
+            customer_name=contract.customer.display_name,
             status=contract.status,
             start_date=contract.start_date,
             end_date=contract.end_date,
@@ -215,8 +264,6 @@ async def list_contracts(
         for contract in contracts
     ]
     
-    total_pages = (total + page_size - 1) // page_size
-    
     return ContractListResponse(
         items=items,
         total=total,
@@ -237,6 +284,7 @@ async def create_contract(
     
     - Valida disponibilidade dos equipamentos
     - Calcula automaticamente valores e dias
+    - Confere o crédito do cliente (inadimplência e limite x valor em aberto)
     - Gera número único de contrato
     """
     # Validar que cliente existe
@@ -295,8 +343,22 @@ async def create_contract(
     contract.total_days = total_days
     contract.total_value = total_value
     
+    # Crédito: O(1) com a exposição mantida no cadastro do cliente
+    credit = check_credit(customer, total_value)
+    if not credit.approved:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=credit.reason
+        )
+    
     # Salvar
     db.add(contract)
+    record_contract_event(
+        db, contract, ContractEventType.CRIADO,
+        actor=current_user,
+        to_status=ContractStatus.RASCUNHO,
+        payload={"total_value": str(total_value), "items_count": len(contract_items)}
+    )
     db.commit()
     db.refresh(contract)
     
@@ -306,11 +368,33 @@ async def create_contract(
 
 @router.get("/{contract_id}", response_model=ContractResponse)
 async def get_contract(
-    contract_id: str,
+    contract_id: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obter detalhes de um contrato"""
+    """
+    Obter detalhes de um contrato
+    
+    Responde 304 se o `If-None-Match` corresponder à versão atual,
+    sem carregar itens/relacionamentos nem serializar o contrato.
+    """
+    current_version = db.query(Contract.version).filter(
+        Contract.id == contract_id,
+        Contract.deleted_at.is_(None)
+    ).scalar()
+    
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contrato não encontrado"
+        )
+    
+    etag = make_etag(contract_id, current_version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
     contract = db.query(Contract).options(
         joinedload(Contract.customer),
         joinedload(Contract.created_by),
@@ -327,18 +411,24 @@ async def get_contract(
             detail="Contrato não encontrado"
         )
     
+    response.headers["ETag"] = make_etag(contract.id, contract.version)
     return _build_contract_response(contract)
 
 
 @router.put("/{contract_id}", response_model=ContractResponse)
 async def update_contract(
-    contract_id: str,
+    contract_id: UUID,
     contract_data: ContractUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("contracts:update"))
 ):
     """
     Atualizar contrato (apenas rascunhos ou aguardando aprovação)
+    
+    Envie `If-Match` com o ETag recebido no GET para evitar sobrescrever
+    alterações de outro usuário (412 em caso de conflito).
     """
     contract = db.query(Contract).filter(
         Contract.id == contract_id,
@@ -357,12 +447,18 @@ async def update_contract(
             detail=f"Contrato no status '{contract.status.value}' não pode ser editado"
         )
     
-    # Atualizar campos
+    check_if_match(if_match, make_etag(contract.id, contract.version))
+    
+    # Atualizar campos (guardando o antes/depois para o histórico)
+    changes = {}
     if contract_data.start_date:
+        changes["start_date"] = [contract.start_date.isoformat(), contract_data.start_date.isoformat()]
         contract.start_date = contract_data.start_date
     if contract_data.end_date:
+        changes["end_date"] = [contract.end_date.isoformat(), contract_data.end_date.isoformat()]
         contract.end_date = contract_data.end_date
     if contract_data.notes is not None:
+        changes["notes"] = True
         contract.notes = contract_data.notes
     
     # Recalcular totais se datas mudaram
@@ -370,19 +466,39 @@ async def update_contract(
         total_days, total_value = calculate_contract_totals(
             contract.start_date, contract.end_date, contract.items
         )
+        
+        # Contrato em aberto: a diferença entra na exposição do cliente
+        difference = total_value - (contract.total_value or Decimal(0))
+        if contract.status in OPEN_STATUSES and difference:
+            if not apply_exposure(db, contract.customer_id, difference, enforce_limit=difference > 0):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Limite de crédito do cliente não comporta o novo valor do contrato"
+                )
+        
         contract.total_days = total_days
         contract.total_value = total_value
     
-    db.commit()
+    if changes:
+        record_contract_event(
+            db, contract, ContractEventType.ATUALIZADO,
+            actor=current_user,
+            payload={"changes": changes}
+        )
+    
+    commit_versioned(db)
     db.refresh(contract)
     
+    response.headers["ETag"] = make_etag(contract.id, contract.version)
     return _build_contract_response(contract)
 
 
 @router.put("/{contract_id}/status", response_model=ContractResponse)
 async def update_contract_status(
-    contract_id: str,
+    contract_id: UUID,
     status_data: ContractStatusUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("contracts:approve"))
 ):
@@ -402,6 +518,8 @@ async def update_contract_status(
             detail="Contrato não encontrado"
         )
     
+    check_if_match(if_match, make_etag(contract.id, contract.version))
+    
     # Validar transição
     if not validate_status_transition(contract.status, status_data.status):
         raise HTTPException(
@@ -426,22 +544,45 @@ async def update_contract_status(
         contract.cancelled_at = now
         contract.cancellation_reason = status_data.cancellation_reason
     
-    # Adicionar nota se fornecida
+    # Exposição de crédito (entrar em aberto respeita o limite)
+    try:
+        apply_contract_exposure(db, contract, old_status, status_data.status)
+    except CreditDenied as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Atualizar contadores de equipamentos/cliente na mesma transação
+    apply_contract_transition(db, contract, old_status, status_data.status, now)
+    
+    # Registrar transição (a nota vai para o evento, não para contract.notes)
+    payload = {}
     if status_data.notes:
-        if contract.notes:
-            contract.notes += f"\n\n[{now.strftime('%d/%m/%Y %H:%M')}] {status_data.notes}"
-        else:
-            contract.notes = f"[{now.strftime('%d/%m/%Y %H:%M')}] {status_data.notes}"
+        payload["notes"] = status_data.notes
+    if status_data.status == ContractStatus.CANCELADO and status_data.cancellation_reason:
+        payload["cancellation_reason"] = status_data.cancellation_reason
+    
+    record_contract_event(
+        db, contract, ContractEventType.STATUS_ALTERADO,
+        actor=current_user,
+        from_status=old_status,
+        to_status=status_data.status,
+        payload=payload
+    )
     
-    db.commit()
+    commit_versioned(db)
     db.refresh(contract)
     
+    # Quantidades disponíveis mudaram: listagens do catálogo ficam desatualizadas
+    invalidate_catalog("equipment")
+    response_cache.invalidate("analytics")
+    invalidate_dashboard_stats()
+    
+    response.headers["ETag"] = make_etag(contract.id, contract.version)
     return _build_contract_response(contract)
 
 
 @router.delete("/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_contract(
-    contract_id: str,
+    contract_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("contracts:delete"))
 ):
@@ -468,11 +609,63 @@ async def delete_contract(
         )
     
     contract.deleted_at = datetime.utcnow()
+    record_contract_event(db, contract, ContractEventType.EXCLUIDO, actor=current_user)
     db.commit()
     
     return None
 
 
+@router.get("/{contract_id}/events", response_model=ContractEventListResponse)
+async def list_contract_timeline(
+    contract_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    event_type: Optional[ContractEventType] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Linha do tempo do contrato (mais recentes primeiro)
+    
+    - **cursor**: valor de `next_cursor` da página anterior
+    - **event_type**: filtrar por tipo de evento
+    """
+    exists = db.query(Contract.id).filter(Contract.id == contract_id).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contrato não encontrado"
+        )
+    
+    try:
+        events, next_cursor = list_contract_events(
+            db, contract_id, limit=limit, cursor=cursor, event_type=event_type
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    
+    return ContractEventListResponse(
+        items=[
+            ContractEventResponse(
+                id=event.id,
+                contract_id=event.contract_id,
+                event_type=event.event_type,
+                from_status=event.from_status,
+                to_status=event.to_status,
+                actor_id=event.actor_id,
+                actor_name=event.actor.name if event.actor else None,
+                payload=event.payload or {},
+                created_at=event.created_at
+            )
+            for event in events
+        ],
+        next_cursor=next_cursor
+    )
+
+
 # ============================================================================
 # HELPER PARA MONTAR RESPOSTA
 # ============================================================================
@@ -480,10 +673,10 @@ async def delete_contract(
 def _build_contract_response(contract: Contract) -> ContractResponse:
     """Monta resposta completa do contrato"""
     return ContractResponse(
-        id=contract.id,
+        id=str(contract.id),
         contract_number=contract.contract_number,
-        customer_id=contract.customer_id,
-        customer_name=contract.customer.name,
+        customer_id=str(contract.customer_id),
+        customer_name=contract.customer.display_name,
         start_date=contract.start_date,
         end_date=contract.end_date,
         status=contract.status,
@@ -495,9 +688,9 @@ def _build_contract_response(contract: Contract) -> ContractResponse:
         approved_by_name=contract.approved_by.name if contract.approved_by else None,
         items=[
             ContractItemResponse(
-                id=item.id,
-                contract_id=item.contract_id,
-                equipment_id=item.equipment_id,
+                id=str(item.id),
+                contract_id=str(item.contract_id),
+                equipment_id=str(item.equipment_id),
                 equipment_name=item.equipment.name,
                 quantity=item.quantity,
                 daily_rate=item.daily_rate,
@@ -1,47 +1,67 @@
-from fastapi import APIRouter, Depends
+"""
+Router do Dashboard - indicadores gerais
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Any
+from typing import Optional
+from datetime import date
 
 from app.api import deps
-from app.models.pedido import Pedido, StatusPedido
-from app.models.equipment import Equipment
-from app.models.veiculo import Veiculo
+from app.api.etag import cached_response
+from app.schemas.dashboard import DashboardStatsResponse, TimeSeriesResponse
+from app.services.dashboard_stats import get_dashboard_stats
+from app.services.rollups import MAX_WINDOW_DAYS, default_window, local_today, read_timeseries
 
 router = APIRouter()
 
-@router.get("/stats")
-def get_dashboard_stats(
+
+@router.get("/stats", response_model=DashboardStatsResponse)
+def dashboard_stats(
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
-) -> Any:
+):
     """
-    Get dashboard statistics.
+    Indicadores de pedidos, equipamentos, frota, contratos e receita.
+    
+    Servidos de um snapshot de até DASHBOARD_STATS_TTL_SECONDS segundos
+    (uma consulta agregada por tabela), descartado pelas notificações de
+    alteração. `no-cache`: o navegador revalida sempre pelo ETag (304 se
+    não mudou), então uma mudança aparece na próxima requisição.
     """
+    return cached_response(get_dashboard_stats(db), if_none_match, None, private=True)
+
+
+@router.get("/timeseries", response_model=TimeSeriesResponse)
+def dashboard_timeseries(
+    metric: str = Query(..., pattern="^(orders|contracts_created|contracts_closed|revenue)$"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start: Optional[date] = Query(None, description="Início (padrão: 30 dias, 12 semanas ou 12 meses)"),
+    end: Optional[date] = Query(None, description="Fim, inclusive (padrão: hoje no fuso local)"),
+    db: Session = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user),
+):
+    """
+    Série histórica para os gráficos de tendência.
     
-    # Pedidos
-    total_pedidos = db.query(func.count(Pedido.id)).scalar()
-    pedidos_pendentes = db.query(func.count(Pedido.id)).filter(Pedido.status == StatusPedido.PENDENTE_EXPEDICAO).scalar()
-    pedidos_em_rota = db.query(func.count(Pedido.id)).filter(Pedido.status == StatusPedido.EM_ROTA).scalar()
+    - **orders**: pedidos por dia do pedido, por status atual (valor = valor total)
+    - **contracts_created**: contratos criados
+    - **contracts_closed**: contratos finalizados/cancelados, por dia de encerramento
+    - **revenue**: valor dos contratos finalizados
     
-    # Equipamentos
-    total_equipamentos = db.query(func.count(Equipment.id)).scalar()
-    equipamentos_disponiveis = db.query(func.count(Equipment.id)).filter(Equipment.is_available == True).scalar()
+    Lida apenas das tabelas de rollup (python -m app.rollups); `as_of` indica
+    até quando as alterações já foram agregadas.
+    """
+    end = end or local_today()
+    start = start or default_window(granularity, end)
     
-    # Veículos
-    veiculos_ativos = db.query(func.count(Veiculo.id)).filter(Veiculo.ativo == True).scalar()
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Início depois do fim")
+    if (end - start).days + 1 > MAX_WINDOW_DAYS[granularity]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Janela máxima para granularidade {granularity}: {MAX_WINDOW_DAYS[granularity]} dias"
+        )
     
-    return {
-        "orders": {
-            "total": total_pedidos,
-            "pending": pedidos_pendentes,
-            "in_transit": pedidos_em_rota
-        },
-        "equipment": {
-            "total": total_equipamentos,
-            "available": equipamentos_disponiveis
-        },
-        "fleet": {
-            "active_vehicles": veiculos_ativos
-        }
-    }
+    return read_timeseries(db, metric, granularity, start, end)
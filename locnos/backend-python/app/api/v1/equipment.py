@@ -2,27 +2,111 @@
 Router de Equipamentos - CRUD completo + busca/filtros
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_, func, tuple_, literal_column
 from typing import List, Optional
+from itertools import chain
 from uuid import UUID
 from math import ceil
+import os
+import tempfile
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.cache import response_cache, make_cache_key, catalog_tags, invalidate_equipment
+from app.core.search import ts_headline
+from app.core.serialization import dumps, serialize_items
+from app.services.images import receive_upload, store_upload, UploadTooLarge, InvalidImage
+from app.services.storage import get_storage
+from app.services.scanner import resolve_codes
+from app.services.catalog import search_terms, descendant_category_ids, catalog_filters
+from app.services.importers import (
+    IMPORT_FORMATS,
+    ImportTooLarge,
+    InvalidImportFile,
+    detect_format,
+    spool_body,
+    read_rows,
+    import_equipment,
+    EQUIPMENT_IMPORT_JSON_FIELDS,
+    EQUIPMENT_IMPORT_LIST_FIELDS,
+)
+from app.services.labels import LAYOUTS, MAX_LABELS, load_labels, write_labels_pdf
 from app.models.equipment import Equipment, EquipmentStatus
+from app.models.category import Category
 from app.models.user import User
 from app.schemas.equipment import (
     EquipmentCreate,
     EquipmentUpdate,
     EquipmentResponse,
-    EquipmentListResponse
+    EquipmentListResponse,
+    EquipmentListItem,
+    EquipmentCompactListResponse,
+    EquipmentFacetsResponse,
+    FacetBucket,
+    EquipmentScanResult,
+    ScanBatchRequest,
+    ScanBatchResponse,
+    ImportResponse
 )
 from app.api.deps import get_current_active_user, require_staff
+from app.api.etag import make_etag, etag_matches, not_modified, check_if_match, commit_versioned, cached_response
 
 router = APIRouter()
 
 
+# Faixas de preço (diária) das facetas: [0, 50), [50, 100), ..., [1000, ∞)
+PRICE_BUCKETS = [50, 100, 250, 500, 1000]
+
+FACETS = ("category", "status", "brand", "price")
+
+# Campos disponíveis em ?fields= (projeção no SQL, sem carregar os JSONB pesados)
+LIST_FIELDS = {
+    "id": Equipment.id,
+    "name": Equipment.name,
+    "description": Equipment.description,
+    "internal_code": Equipment.internal_code,
+    "category_id": Equipment.category_id,
+    "brand": Equipment.brand,
+    "status": Equipment.status,
+    "daily_rate": Equipment.daily_rate,
+    "weekly_rate": Equipment.weekly_rate,
+    "monthly_rate": Equipment.monthly_rate,
+    "quantity_total": Equipment.quantity_total,
+    "quantity_available": Equipment.quantity_available,
+    "featured": Equipment.featured,
+    "total_rentals": Equipment.total_rentals,
+    "primary_image": Equipment.primary_image,
+    "created_at": Equipment.created_at,
+}
+
+# ?fields=compact: o que o card da listagem exibe
+COMPACT_FIELDS = ["id", "name", "internal_code", "status", "daily_rate", "quantity_available", "primary_image"]
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Lista de campos pedidos (id sempre incluído) ou None para a resposta completa"""
+    if not fields:
+        return None
+    
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    if requested == ["compact"]:
+        return COMPACT_FIELDS
+    
+    unknown = [name for name in requested if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campo(s) inválido(s) em fields: {', '.join(unknown)}. "
+                   f"Disponíveis: compact, {', '.join(LIST_FIELDS)}"
+        )
+    return ["id"] + sorted(set(requested) - {"id"})
+
+
 @router.get("/", response_model=EquipmentListResponse)
 async def list_equipment(
     page: int = Query(1, ge=1),
@@ -30,82 +114,415 @@ async def list_equipment(
     search: Optional[str] = None,
     category_id: Optional[UUID] = None,
     status: Optional[EquipmentStatus] = None,
+    brand: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     available_only: bool = False,
+    sort: Optional[str] = Query(None, pattern="^(popular|recent|price_asc|price_desc)$"),
+    fields: Optional[str] = Query(None, description="compact ou lista separada por vírgulas"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Listar equipamentos com paginação e filtros.
     Endpoint público (não requer autenticação).
-    """
-    query = db.query(Equipment)
-    
-    # Filtros
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                Equipment.name.ilike(search_filter),
-                Equipment.description.ilike(search_filter),
-                Equipment.internal_code.ilike(search_filter)
-            )
-        )
-    
-    if category_id:
-        query = query.filter(Equipment.category_id == category_id)
     
-    if status:
-        query = query.filter(Equipment.status == status)
+    - **search**: busca full-text em português (sem acentos) em nome, marca,
+      tags e descrição, além de match parcial em código interno/barras.
+      Sem `sort`, os resultados vêm ordenados por relevância, com
+      `search_rank` e trecho destacado (`highlight`).
+    - **category_id**: inclui as categorias descendentes
+    - **sort=popular**: mais locados primeiro (contador total_rentals)
+    - **fields=compact** (ou `fields=name,daily_rate,...`): itens compactos
+      apenas com os campos pedidos, projetados direto no SQL
+      (`primary_image` é calculado no banco a partir de `images`)
     
-    if min_price:
-        query = query.filter(Equipment.daily_rate >= min_price)
-    
-    if max_price:
-        query = query.filter(Equipment.daily_rate <= max_price)
+    A resposta serializada fica no cache de respostas (chave = parâmetros
+    normalizados) e é invalidada nas escritas de equipamentos.
+    """
+    search = (search or "").strip()
+    selected = _parse_fields(fields)
+    cache_key = make_cache_key("equipment", {
+        "page": page, "per_page": per_page, "search": search,
+        "category_id": category_id, "status": status, "brand": brand,
+        "min_price": min_price, "max_price": max_price,
+        "available_only": available_only, "sort": sort,
+        "fields": ",".join(selected) if selected else None,
+    })
+    cached, generation = response_cache.lookup(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
     
-    if available_only:
-        query = query.filter(
-            Equipment.status == EquipmentStatus.AVAILABLE,
-            Equipment.quantity_available > 0,
-            Equipment.visible == True
-        )
+    category_ids = descendant_category_ids(db, category_id)
+    filters = catalog_filters(search, category_ids, status, brand, min_price, max_price, available_only)
+    query = db.query(Equipment).filter(*chain.from_iterable(filters.values()))
     
-    # Apenas equipamentos visíveis por padrão
-    query = query.filter(Equipment.visible == True)
+    rank = None
+    if search:
+        _, rank, tsquery = search_terms(search)
     
     # Total de resultados
     total = query.count()
     
+    # Ordenação
+    if sort == "popular":
+        query = query.order_by(Equipment.total_rentals.desc().nullslast(), Equipment.name)
+    elif sort == "recent":
+        query = query.order_by(Equipment.created_at.desc())
+    elif sort == "price_asc":
+        query = query.order_by(Equipment.daily_rate.asc().nullslast())
+    elif sort == "price_desc":
+        query = query.order_by(Equipment.daily_rate.desc().nullslast())
+    elif rank is not None:
+        query = query.order_by(rank.desc(), Equipment.name)
+    
     # Paginação
     offset = (page - 1) * per_page
-    items = query.offset(offset).limit(per_page).all()
     
-    return EquipmentListResponse(
-        items=items,
+    entities = [Equipment] if selected is None else [LIST_FIELDS[name].label(name) for name in selected]
+    if rank is not None:
+        entities.append(rank.label("search_rank"))
+    
+    rows = query.with_entities(*entities).offset(offset).limit(per_page).all()
+    if selected is None and rank is None:
+        rows = [(equipment,) for equipment in rows]
+    
+    search_fields = [{} for _ in rows]
+    if rank is not None and rows:
+        ids = [row[0].id if selected is None else row.id for row in rows]
+        # ts_headline é caro: calculado só para os itens da página, em uma consulta à parte
+        headlines = dict(
+            db.query(Equipment.id, ts_headline(Equipment.description, tsquery))
+            .filter(Equipment.id.in_(ids))
+            .all()
+        )
+        search_fields = [
+            {"search_rank": round(float(row.search_rank), 4), "highlight": headlines.get(item_id)}
+            for row, item_id in zip(rows, ids)
+        ]
+    
+    pagination = dict(
         total=total,
         page=page,
         per_page=per_page,
         pages=ceil(total / per_page) if total > 0 else 0
     )
+    
+    if selected is None and settings.FAST_JSON_RESPONSES:
+        items = serialize_items(EquipmentResponse, [row[0] for row in rows])
+        for item, extra in zip(items, search_fields):
+            item.update(extra)
+        body = dumps({"items": items, **pagination})
+    elif selected is None:
+        items = [
+            EquipmentResponse.model_validate(row[0]).model_copy(update=extra)
+            for row, extra in zip(rows, search_fields)
+        ]
+        body = EquipmentListResponse(items=items, **pagination).model_dump_json().encode()
+    else:
+        items = [
+            EquipmentListItem(**{name: row._mapping[name] for name in selected}, **extra)
+            for row, extra in zip(rows, search_fields)
+        ]
+        body = EquipmentCompactListResponse(items=items, **pagination).model_dump_json(exclude_unset=True).encode()
+    
+    cached = response_cache.set(cache_key, body, catalog_tags("equipment", *(category_ids or ())), generation)
+    return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
+
+
+def _price_bucket_label(bucket: int):
+    """Valor ("50-100", "1000-") e rótulo de uma faixa do width_bucket"""
+    lower = ([0] + PRICE_BUCKETS)[bucket]
+    upper = PRICE_BUCKETS[bucket] if bucket < len(PRICE_BUCKETS) else None
+    if upper is None:
+        return f"{lower}-", f"R$ {lower}+"
+    return f"{lower}-{upper}", f"R$ {lower} a R$ {upper}"
+
+
+@router.get("/facets", response_model=EquipmentFacetsResponse)
+async def equipment_facets(
+    search: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    status: Optional[EquipmentStatus] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    available_only: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Contagens por categoria, status, marca e faixa de preço para os mesmos
+    filtros da listagem. Endpoint público.
+    
+    Todas as facetas saem de uma única consulta (GROUPING SETS). Cada faceta
+    é contada com os filtros das demais, mas não com o próprio filtro, para
+    a barra lateral mostrar as alternativas à seleção atual.
+    """
+    search = (search or "").strip()
+    cache_key = make_cache_key("equipment-facets", {
+        "search": search, "category_id": category_id, "status": status, "brand": brand,
+        "min_price": min_price, "max_price": max_price, "available_only": available_only,
+    })
+    cached, generation = response_cache.lookup(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
+    
+    category_ids = descendant_category_ids(db, category_id)
+    filters = catalog_filters(search, category_ids, status, brand, min_price, max_price, available_only)
+    
+    def facet_count(excluded: Optional[str]):
+        conditions = [c for name in FACETS if name != excluded for c in filters[name]]
+        return func.count().filter(and_(*conditions)) if conditions else func.count()
+    
+    # Limites literais: a mesma expressão aparece no SELECT e no GROUP BY
+    bucket_bounds = literal_column(f"ARRAY[{', '.join(map(str, PRICE_BUCKETS))}]::numeric[]")
+    price_bucket = func.width_bucket(Equipment.daily_rate, bucket_bounds)
+    dimensions = {
+        "category": Equipment.category_id,
+        "status": Equipment.status,
+        "brand": Equipment.brand,
+        "price": price_bucket,
+    }
+    
+    rows = (
+        db.query(
+            Equipment.category_id,
+            Category.name.label("category_name"),
+            Equipment.status,
+            Equipment.brand,
+            price_bucket.label("price_bucket"),
+            *[func.grouping(column).label(f"g_{name}") for name, column in dimensions.items()],
+            *[facet_count(name).label(f"count_{name}") for name in FACETS],
+            facet_count(None).label("count_total"),
+        )
+        .outerjoin(Category, Category.id == Equipment.category_id)
+        .filter(*filters["base"])
+        .group_by(func.grouping_sets(
+            tuple_(Equipment.category_id, Category.name),
+            Equipment.status,
+            Equipment.brand,
+            price_bucket,
+            tuple_()
+        ))
+        .all()
+    )
+    
+    facets = {name: [] for name in FACETS}
+    total = 0
+    for row in rows:
+        if row.g_category == 0:
+            if row.category_id is not None and row.count_category:
+                facets["category"].append(FacetBucket(
+                    value=str(row.category_id), label=row.category_name, count=row.count_category
+                ))
+        elif row.g_status == 0:
+            if row.status is not None and row.count_status:
+                facets["status"].append(FacetBucket(value=row.status.value, count=row.count_status))
+        elif row.g_brand == 0:
+            if row.brand and row.count_brand:
+                facets["brand"].append(FacetBucket(value=row.brand, label=row.brand, count=row.count_brand))
+        elif row.g_price == 0:
+            if row.price_bucket is not None and row.count_price:
+                value, label = _price_bucket_label(row.price_bucket)
+                facets["price"].append(FacetBucket(value=value, label=label, count=row.count_price))
+        else:
+            total = row.count_total
+    
+    for name in ("category", "status", "brand"):
+        facets[name].sort(key=lambda bucket: (-bucket.count, bucket.label or bucket.value))
+    facets["price"].sort(key=lambda bucket: int(bucket.value.split("-")[0]))
+    
+    body = EquipmentFacetsResponse(total=total, **facets).model_dump_json().encode()
+    
+    # Contagens de todas as categorias: qualquer escrita no catálogo invalida
+    cached = response_cache.set(cache_key, body, catalog_tags("equipment"), generation)
+    return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
+
+
+@router.get("/by-code/{code:path}", response_model=EquipmentScanResult)
+async def get_equipment_by_code(
+    code: str,
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Localizar equipamento por código lido no scanner.
+    Aceita código interno, código de barras, número de série ou conteúdo do
+    QR Code (inclusive URL). Retorna também o contrato ativo do equipamento.
+    """
+    resolved = resolve_codes(db, [code]).get(code.strip())
+    
+    if resolved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nenhum equipamento com o código '{code}'"
+        )
+    
+    return EquipmentScanResult(code=code.strip(), **resolved)
+
+
+@router.post("/scan-batch", response_model=ScanBatchResponse)
+async def scan_batch(
+    scan: ScanBatchRequest,
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Resolver vários códigos de uma vez (check-in/check-out em lote).
+    Uma única consulta ao banco, independente da quantidade de códigos.
+    Códigos repetidos aparecem uma vez no resultado.
+    """
+    resolved = resolve_codes(db, scan.codes)
+    codes = [code for code in dict.fromkeys(code.strip() for code in scan.codes) if code]
+    
+    return ScanBatchResponse(
+        results=[EquipmentScanResult(code=code, **resolved[code]) for code in codes if code in resolved],
+        not_found=[code for code in codes if code not in resolved]
+    )
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_equipment_file(
+    request: Request,
+    format: Optional[str] = Query(None, description=f"{' ou '.join(IMPORT_FORMATS)} (padrão: pelo Content-Type)"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=5000),
+    dry_run: bool = Query(False, description="Apenas validar, sem gravar"),
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Importação em lote (upsert pelo código interno) a partir de CSV, XLSX ou NDJSON.
+    Requer role: staff, admin ou super_admin.
+    
+    O corpo é o próprio arquivo. Colunas/chaves = campos de criação do
+    equipamento (`internal_code`, `name`, `description`, `category_id`...).
+    Em CSV, campos lista/objeto vão como JSON (`tags` aceita "a, b").
+    
+    Códigos novos são criados; existentes têm atualizados apenas os campos
+    presentes na linha. Linhas gravadas em lotes de `batch_size` com
+    INSERT ... ON CONFLICT DO UPDATE. Retorna o resultado de cada linha e a
+    vazão (linhas/s).
+    """
+    fmt = detect_format(content_type, format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie CSV (text/csv), XLSX ou NDJSON (application/x-ndjson), ou informe ?format="
+        )
+    
+    if content_length and content_length > settings.MAX_IMPORT_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arquivo maior que {settings.MAX_IMPORT_SIZE // (1024 * 1024)}MB"
+        )
+    
+    try:
+        path = await spool_body(request.stream(), settings.MAX_IMPORT_SIZE)
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    try:
+        rows = read_rows(
+            path, fmt, json_fields=EQUIPMENT_IMPORT_JSON_FIELDS, list_fields=EQUIPMENT_IMPORT_LIST_FIELDS
+        )
+        result = await run_in_threadpool(
+            import_equipment, db, rows, batch_size, user_id=current_user.id, dry_run=dry_run
+        )
+    except InvalidImportFile as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        os.unlink(path)
+    
+    if result.counts.get("created") or result.counts.get("updated"):
+        invalidate_equipment()
+    
+    return result.as_dict()
+
+
+@router.get("/labels", response_class=FileResponse)
+async def equipment_labels(
+    ids: Optional[List[UUID]] = Query(None, description="Equipamentos específicos (ignora os filtros)"),
+    search: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    equipment_status: Optional[EquipmentStatus] = Query(None, alias="status"),
+    brand: Optional[str] = None,
+    layout: str = Query("a4-3x11", description=f"Folha de etiquetas: {', '.join(LAYOUTS)}"),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Etiquetas patrimoniais em PDF (QR Code + Code128 + nome) dos equipamentos
+    filtrados, inclusive os ocultos do catálogo.
+    """
+    if layout not in LAYOUTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Layout inválido. Opções: {', '.join(LAYOUTS)}"
+        )
+    
+    if ids:
+        conditions = [Equipment.id.in_(ids)]
+    else:
+        filters = catalog_filters(
+            search, descendant_category_ids(db, category_id), equipment_status, brand, None, None, False, visible_only=False
+        )
+        conditions = list(chain.from_iterable(filters.values()))
+    
+    labels = load_labels(db, conditions, limit=MAX_LABELS + 1)
+    if not labels:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhum equipamento para etiquetar")
+    if len(labels) > MAX_LABELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {MAX_LABELS} etiquetas por arquivo; refine os filtros"
+        )
+    
+    # O PDF vai para um temporário e é enviado em blocos a partir do disco
+    fd, path = tempfile.mkstemp(prefix="labels-", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            await run_in_threadpool(write_labels_pdf, labels, output, layout)
+    except BaseException:
+        os.unlink(path)
+        raise
+    
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"etiquetas-{layout}.pdf",
+        background=BackgroundTask(os.unlink, path)
+    )
 
 
 @router.get("/{equipment_id}", response_model=EquipmentResponse)
 async def get_equipment(
     equipment_id: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Obter detalhes de um equipamento específico.
+    Suporta If-None-Match (304 quando a versão não mudou).
     """
-    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    current_version = db.query(Equipment.version).filter(Equipment.id == equipment_id).scalar()
     
-    if not equipment:
+    if current_version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Equipamento não encontrado"
         )
     
+    etag = make_etag(equipment_id, current_version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    
+    response.headers["ETag"] = make_etag(equipment.id, equipment.version)
     return equipment
 
 
@@ -142,6 +559,8 @@ async def create_equipment(
     db.commit()
     db.refresh(equipment)
     
+    invalidate_equipment(equipment.category_id)
+    
     return equipment
 
 
@@ -149,12 +568,15 @@ async def create_equipment(
 async def update_equipment(
     equipment_id: UUID,
     equipment_data: EquipmentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
     """
     Atualizar equipamento existente.
     Requer role: staff, admin ou super_admin.
+    Envie If-Match com o ETag do GET para detectar edições concorrentes (412).
     """
     equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
     
@@ -164,6 +586,9 @@ async def update_equipment(
             detail="Equipamento não encontrado"
         )
     
+    check_if_match(if_match, make_etag(equipment.id, equipment.version))
+    old_category_id = equipment.category_id
+    
     # Atualizar apenas campos fornecidos
     update_data = equipment_data.model_dump(exclude_unset=True)
     
@@ -172,9 +597,75 @@ async def update_equipment(
     
     equipment.updated_by_id = current_user.id
     
-    db.commit()
+    commit_versioned(db)
     db.refresh(equipment)
     
+    invalidate_equipment(old_category_id, equipment.category_id)
+    
+    response.headers["ETag"] = make_etag(equipment.id, equipment.version)
+    return equipment
+
+
+@router.post("/{equipment_id}/images", response_model=EquipmentResponse, status_code=status.HTTP_201_CREATED)
+async def upload_equipment_image(
+    equipment_id: UUID,
+    request: Request,
+    response: Response,
+    primary: bool = False,
+    content_length: Optional[int] = Header(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload de imagem do equipamento (JPEG, PNG ou WebP).
+    Requer role: staff, admin ou super_admin.
+    
+    O corpo da requisição é o próprio arquivo (sem multipart), gravado em
+    disco em streaming. São gerados derivados WebP (miniatura e exibição);
+    `url` aponta para o derivado de exibição e `originalUrl` para o original.
+    Reenviar a mesma foto não duplica arquivos nem itens.
+    
+    - **primary=true**: define como imagem principal
+    """
+    equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    
+    if not equipment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Equipamento não encontrado"
+        )
+    
+    if content_length and content_length > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arquivo maior que {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+        )
+    
+    storage = get_storage()
+    try:
+        upload = await receive_upload(request.stream(), settings.MAX_UPLOAD_SIZE, storage.temp_dir())
+        entry = await store_upload(storage, upload)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidImage as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    
+    # Cópias dos itens: o JSONB é substituído por uma nova lista
+    images = [dict(image) for image in (equipment.images or []) if image.get("hash") != entry["hash"]]
+    if primary or not any(image.get("isPrimary") for image in images):
+        for image in images:
+            image["isPrimary"] = False
+        entry["isPrimary"] = True
+    
+    equipment.images = images + [entry]
+    equipment.updated_by_id = current_user.id
+    
+    commit_versioned(db)
+    db.refresh(equipment)
+    
+    invalidate_equipment(equipment.category_id)
+    
+    response.headers["ETag"] = make_etag(equipment.id, equipment.version)
     return equipment
 
 
@@ -200,4 +691,6 @@ async def delete_equipment(
     equipment.visible = False
     db.commit()
     
+    invalidate_equipment(equipment.category_id)
+    
     return None
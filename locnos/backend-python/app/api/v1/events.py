@@ -0,0 +1,98 @@
+"""
+Router de Eventos - alterações em tempo real via Server-Sent Events
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.api.deps import get_stream_user, require_staff
+from app.models.user import User
+from app.services.change_events import (
+    RESYNC,
+    TOPICS,
+    TooManySubscribers,
+    event_bus,
+    format_sse,
+    tenant_for_user,
+)
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    topics: Optional[str] = Query(None, description="Tópicos separados por vírgula: pedidos, rotas, contratos (padrão: todos)"),
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_stream_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream `text/event-stream` com as alterações de pedidos, rotas e contratos.
+    
+    Cada evento (`event: <tópico>`) traz o id e os campos observados
+    (status, progresso da rota...); o cliente busca de novo só o que mudou.
+    `event: resync` pede para recarregar tudo (fila estourada ou eventos
+    perdidos). Autenticação pelo cabeçalho Authorization ou `?access_token=`
+    (EventSource não envia cabeçalhos).
+    """
+    selected = [topic.strip() for topic in topics.split(",") if topic.strip()] if topics else list(TOPICS)
+    unknown = set(selected) - set(TOPICS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tópico(s) inválido(s): {', '.join(sorted(unknown))}"
+        )
+    
+    tenant = tenant_for_user(current_user)
+    # A conexão do stream pode durar horas: devolve a conexão do banco ao pool já
+    db.close()
+    
+    try:
+        subscriber = event_bus.subscribe(selected, tenant)
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Limite de conexões em tempo real atingido",
+            headers={"Retry-After": "30"}
+        )
+    
+    async def stream():
+        try:
+            # Intervalo de reconexão do EventSource
+            yield b"retry: 5000\n\n"
+            if last_event_id:
+                # Reconexão: o que aconteceu enquanto o cliente estava fora se perdeu
+                yield format_sse("resync", "{}")
+            
+            while True:
+                item = await subscriber.get(settings.SSE_HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if item is None:
+                    yield b": ping\n\n"
+                elif item is RESYNC:
+                    yield format_sse("resync", "{}")
+                else:
+                    yield format_sse(item.topic, item.data, item.id)
+        finally:
+            event_bus.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: não segurar o stream em buffer
+        }
+    )
+
+
+@router.get("/stats")
+async def event_stats(current_user: User = Depends(require_staff)):
+    """Conexões e eventos deste worker (LISTEN ativo, assinantes, descartes)"""
+    return event_bus.stats()
@@ -0,0 +1,31 @@
+"""
+Router de mídia - serve os arquivos do storage local.
+Os nomes são derivados do hash do conteúdo, então podem ser cacheados para sempre.
+"""
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.services.storage import get_storage
+
+router = APIRouter()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{key:path}", include_in_schema=False)
+async def serve_media(key: str):
+    """Arquivo do storage com cache imutável"""
+    # Segmentos ocultos (.uploads, .tmp-*) e "."/".." nunca são mídia publicada
+    if any(not segment or segment.startswith(".") for segment in key.split("/")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Arquivo não encontrado")
+    
+    try:
+        path = get_storage().local_path(key)
+    except ValueError:
+        path = None
+    
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Arquivo não encontrado")
+    
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
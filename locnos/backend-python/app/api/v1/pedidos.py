@@ -0,0 +1,93 @@
+"""
+Router de Pedidos - integração com o ERP (SAP B1)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import os
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.erp_sync import ErpSincronizacao
+from app.models.user import User
+from app.schemas.pedido import ErpSyncResponse, PedidoImportResponse
+from app.services.dashboard_stats import invalidate_dashboard_stats
+from app.services.erp_ingest import UPLOAD_SOURCE, ingest_pedidos, record_sync
+from app.services.importers import (
+    ImportTooLarge,
+    InvalidImportFile,
+    detect_format,
+    read_rows,
+    spool_body,
+)
+from app.api.deps import require_staff
+
+router = APIRouter()
+
+
+@router.post("/import", response_model=PedidoImportResponse)
+async def import_pedidos_erp(
+    request: Request,
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=5000),
+    dry_run: bool = Query(False, description="Apenas validar, sem gravar"),
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Carga de pedidos faturados do ERP em NDJSON (um pedido por linha).
+    Requer role: staff, admin ou super_admin.
+    
+    Upsert pelo `numero_pedido` em lotes de `batch_size`. Peso total e
+    volumes são calculados dos itens. Pedidos já expedidos, versões mais
+    antigas (`erp_atualizado_em`) e linhas sem alteração ficam como
+    `skipped`: reenviar o mesmo feed é idempotente. Retorna o resultado de
+    cada linha, a vazão (linhas/s) e a marca d'água da carga.
+    
+    O resumo fica na fonte `pedidos:upload`: um upload manual não move a
+    marca d'água usada pela consulta incremental (python -m app.erp_ingest).
+    """
+    if detect_format(content_type, None) != "ndjson":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie NDJSON (application/x-ndjson)"
+        )
+    
+    if content_length and content_length > settings.MAX_IMPORT_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arquivo maior que {settings.MAX_IMPORT_SIZE // (1024 * 1024)}MB"
+        )
+    
+    try:
+        path = await spool_body(request.stream(), settings.MAX_IMPORT_SIZE)
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    try:
+        result = await run_in_threadpool(
+            ingest_pedidos, db, read_rows(path, "ndjson"), batch_size, user_id=current_user.id, dry_run=dry_run
+        )
+    except InvalidImportFile as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        os.unlink(path)
+    
+    if not dry_run:
+        await run_in_threadpool(record_sync, db, result, UPLOAD_SOURCE)
+    if result.counts.get("created") or result.counts.get("updated"):
+        invalidate_dashboard_stats()
+    
+    return result.as_dict()
+
+
+@router.get("/import/status", response_model=List[ErpSyncResponse])
+def erp_sync_status(
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """Marca d'água e vazão da última carga de cada fonte do ERP"""
+    return db.query(ErpSincronizacao).order_by(ErpSincronizacao.fonte).all()
@@ -3,23 +3,52 @@ Router de API para Persons (Pessoas)
 CRUD completo com filtros por tipo
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, cast, func
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional
 from uuid import UUID
 from math import ceil
+import os
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.serialization import json_response, serialize_items
 from app.models.person import Person, PersonType, PersonStatus
+from app.models.person_duplicate import PersonDuplicate, DuplicateStatus
 from app.models.user import User
+from app.services.person_search import person_search_terms
+from app.services.person_dedupe import MergeError, merge_persons
+from app.services.credit import check_credit, over_limit_query
+from app.services.importers import (
+    IMPORT_FORMATS,
+    ImportTooLarge,
+    InvalidImportFile,
+    detect_format,
+    spool_body,
+    read_rows,
+    error_report_csv,
+    import_persons,
+    PERSON_IMPORT_JSON_FIELDS,
+    PERSON_IMPORT_LIST_FIELDS,
+)
+from app.schemas.equipment import ImportResponse
 from app.schemas.person import (
     PersonCreate,
     PersonUpdate,
     PersonResponse,
-    PersonListResponse
+    PersonListResponse,
+    PersonDuplicateResponse,
+    PersonDuplicateListResponse,
+    PersonMergeRequest,
+    PersonMergeResponse,
+    PersonExposureResponse,
+    PersonExposureListResponse
 )
-from app.api.deps import get_current_active_user, require_staff
+from app.api.deps import get_current_active_user, require_staff, require_admin
+from app.api.etag import make_etag, etag_matches, not_modified, check_if_match, commit_versioned
 
 router = APIRouter()
 
@@ -42,22 +71,25 @@ async def list_persons(
     - person_type="driver" → Lista apenas freteiros
     - person_type="client" → Lista apenas clientes
     - defaulter_only=true → Lista apenas inadimplentes
+    
+    Busca (search): sem acentos e tolerante a erros de digitação em nome,
+    razão social, nome fantasia e email; CPF/CNPJ com ou sem pontuação,
+    inclusive parciais ("123.456" encontra 123.456.789-09). Com busca, os
+    resultados vêm ordenados por relevância.
     """
     query = db.query(Person).filter(Person.active == True)
     
-    # Busca por nome, CPF, CNPJ, email
+    # Busca por nome, CPF, CNPJ, email (índices trigram e de prefixo)
+    search = (search or "").strip()
+    search_rank = None
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                Person.full_name.ilike(search_filter),
-                Person.company_name.ilike(search_filter),
-                Person.trade_name.ilike(search_filter),
-                Person.email.ilike(search_filter),
-                Person.cpf.like(search.replace(".", "").replace("-", "")),
-                Person.cnpj.like(search.replace(".", "").replace("/", "").replace("-", ""))
-            )
-        )
+        terms = person_search_terms(search)
+        if terms is None:
+            # Só pontuação: nada a casar
+            query = query.filter(False)
+        else:
+            search_condition, search_rank = terms
+            query = query.filter(search_condition)
     
     # Filtro por tipo (usando JSONB contains)
     if person_type:
@@ -77,55 +109,218 @@ async def list_persons(
     
     # Paginação
     offset = (page - 1) * per_page
-    items = query.order_by(Person.created_at.desc()).offset(offset).limit(per_page).all()
+    ordering = [Person.created_at.desc()]
+    if search_rank is not None:
+        ordering.insert(0, search_rank.desc())
+    items = query.order_by(*ordering).offset(offset).limit(per_page).all()
     
-    return PersonListResponse(
-        items=items,
+    pagination = dict(
         total=total,
         page=page,
         per_page=per_page,
         pages=ceil(total / per_page) if total > 0 else 0
     )
+    
+    if settings.FAST_JSON_RESPONSES:
+        return json_response({"items": serialize_items(PersonResponse, items), **pagination})
+    
+    return PersonListResponse(items=items, **pagination)
 
 
-@router.get("/drivers/available", response_model=List[PersonResponse])
+@router.get("/drivers/available", response_model=PersonListResponse)
 async def list_available_drivers(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    license_category: Optional[str] = Query(None, pattern="^[A-Ea-e]+$"),
+    vehicle_type: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Listar freteiros/motoristas disponíveis para entregas.
+    Listar freteiros/motoristas disponíveis para entregas (paginado).
     
     Útil para seleção rápida ao agendar entregas/coletas.
-    Retorna pessoas que têm "driver" nos types.
+    Retorna pessoas aprovadas que têm "driver" nos types e não estão
+    marcadas como indisponíveis (driver_data.available = false), em ordem
+    alfabética.
+    
+    Filtros:
+    - license_category="D" → CNH com a categoria D (ex.: "D", "AD"); várias
+      letras exigem todas ("AD")
+    - vehicle_type="Caminhão Baú" → tipo de veículo exato
     """
-    drivers = db.query(Person).filter(
+    query = db.query(Person).filter(
         and_(
             Person.types.contains(["driver"]),
             Person.status == PersonStatus.APPROVED,
-            Person.active == True
+            Person.active == True,
+            # Sem driver_data (ou sem a chave) conta como disponível
+            Person.driver_data["available"].is_distinct_from(cast("false", JSONB))
         )
-    ).all()
-    
-    # Filtrar apenas os que estão disponíveis (se tiver driver_data.available)
-    available_drivers = []
-    for driver in drivers:
-        if driver.driver_data and isinstance(driver.driver_data, dict):
-            if driver.driver_data.get('available', True):  # Default true se não especificado
-                available_drivers.append(driver)
-        else:
-            available_drivers.append(driver)  # Se não tem driver_data, assume disponível
+    )
+    
+    if license_category:
+        category = Person.driver_data["license_category"].astext
+        for letter in sorted(set(license_category.upper())):
+            query = query.filter(category.contains(letter))
+    
+    if vehicle_type:
+        # Containment: usa o GIN de driver_data
+        query = query.filter(Person.driver_data.contains({"vehicle_type": vehicle_type}))
+    
+    total = query.count()
     
-    return available_drivers
+    # Mesma ordem do índice parcial ix_pessoas_drivers_name
+    display_name = func.coalesce(Person.full_name, Person.trade_name, Person.company_name)
+    offset = (page - 1) * per_page
+    items = query.order_by(display_name, Person.id).offset(offset).limit(per_page).all()
+    
+    pagination = dict(
+        total=total,
+        page=page,
+        per_page=per_page,
+        pages=ceil(total / per_page) if total > 0 else 0
+    )
+    
+    if settings.FAST_JSON_RESPONSES:
+        return json_response({"items": serialize_items(PersonResponse, items), **pagination})
+    
+    return PersonListResponse(items=items, **pagination)
 
 
-@router.get("/{person_id}", response_model=PersonResponse)
-async def get_person(
+@router.get("/duplicates", response_model=PersonDuplicateListResponse)
+async def list_person_duplicates(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    duplicate_status: DuplicateStatus = Query(DuplicateStatus.PENDING, alias="status"),
+    min_score: float = Query(0, ge=0, le=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff)
+):
+    """
+    Fila de revisão de cadastros duplicados (gerada pelo job
+    `python -m app.find_duplicates`), do par mais provável ao menos provável.
+    """
+    query = db.query(PersonDuplicate).filter(
+        PersonDuplicate.status == duplicate_status,
+        PersonDuplicate.score >= min_score
+    )
+    total = query.count()
+    
+    offset = (page - 1) * per_page
+    items = (
+        query.options(joinedload(PersonDuplicate.person_a), joinedload(PersonDuplicate.person_b))
+        .order_by(PersonDuplicate.score.desc(), PersonDuplicate.id)
+        .offset(offset)
+        .limit(per_page)
+        .all()
+    )
+    
+    return PersonDuplicateListResponse(
+        items=items,
+        total=total,
+        page=page,
+        per_page=per_page,
+        pages=ceil(total / per_page) if total > 0 else 0
+    )
+
+
+@router.post("/duplicates/{duplicate_id}/dismiss", response_model=PersonDuplicateResponse)
+async def dismiss_person_duplicate(
+    duplicate_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff)
+):
+    """Marcar o par como "não é a mesma pessoa" (não volta a ser sugerido)"""
+    duplicate = db.query(PersonDuplicate).filter(PersonDuplicate.id == duplicate_id).first()
+    
+    if not duplicate:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Par de duplicados não encontrado"
+        )
+    
+    duplicate.status = DuplicateStatus.DISMISSED
+    duplicate.reviewed_by_id = current_user.id
+    duplicate.reviewed_at = func.now()
+    db.commit()
+    db.refresh(duplicate)
+    
+    return duplicate
+
+
+@router.post("/merge", response_model=PersonMergeResponse)
+async def merge_persons_endpoint(
+    merge_data: PersonMergeRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Mesclar cadastros duplicados. Requer role: admin ou super_admin.
+    
+    Contratos, pedidos e demais registros das origens passam para
+    `target_id` (um UPDATE por tabela); campos vazios do cadastro mantido são
+    completados com os das origens. As origens ficam inativas, sem CPF/CNPJ
+    e com `merged_into_id` apontando para o cadastro mantido.
+    """
+    try:
+        result = await run_in_threadpool(
+            merge_persons, db, merge_data.target_id, merge_data.source_ids, user_id=current_user.id
+        )
+    except MergeError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return result
+
+
+def _exposure_response(person: Person) -> PersonExposureResponse:
+    credit = check_credit(person, 0)
+    return PersonExposureResponse(
+        person_id=person.id,
+        display_name=person.display_name,
+        credit_limit=credit.credit_limit,
+        open_exposure=credit.open_exposure,
+        open_contracts=person.open_contracts or 0,
+        available_credit=credit.available,
+        over_limit=credit.available is not None and credit.available < 0,
+        defaulter=person.defaulter
+    )
+
+
+@router.get("/credit/over-limit", response_model=PersonExposureListResponse)
+async def list_persons_over_limit(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff)
+):
+    """Clientes com valor em aberto acima do limite de crédito, do maior excesso ao menor"""
+    query = over_limit_query(db)
+    total = query.count()
+    
+    offset = (page - 1) * per_page
+    items = query.offset(offset).limit(per_page).all()
+    
+    return PersonExposureListResponse(
+        items=[_exposure_response(person) for person in items],
+        total=total,
+        page=page,
+        per_page=per_page,
+        pages=ceil(total / per_page) if total > 0 else 0
+    )
+
+
+@router.get("/{person_id}/exposure", response_model=PersonExposureResponse)
+async def get_person_exposure(
     person_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Obter detalhes de uma pessoa específica"""
+    """
+    Exposição de crédito do cliente: valor e quantidade de contratos em
+    aberto (aguardando aprovação, aprovados e ativos), limite e saldo disponível.
+    """
     person = db.query(Person).filter(Person.id == person_id).first()
     
     if not person:
@@ -134,6 +329,33 @@ async def get_person(
             detail="Pessoa não encontrada"
         )
     
+    return _exposure_response(person)
+
+
+@router.get("/{person_id}", response_model=PersonResponse)
+async def get_person(
+    person_id: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Obter detalhes de uma pessoa específica (suporta If-None-Match)"""
+    current_version = db.query(Person.version).filter(Person.id == person_id).scalar()
+    
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pessoa não encontrada"
+        )
+    
+    etag = make_etag(person_id, current_version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    person = db.query(Person).filter(Person.id == person_id).first()
+    
+    response.headers["ETag"] = make_etag(person.id, person.version)
     return person
 
 
@@ -183,14 +405,86 @@ async def create_person(
     return person
 
 
+@router.post("/import", response_model=ImportResponse)
+async def import_persons_file(
+    request: Request,
+    format: Optional[str] = Query(None, description=f"{' ou '.join(IMPORT_FORMATS)} (padrão: pelo Content-Type)"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=5000),
+    dry_run: bool = Query(False, description="Apenas validar, sem gravar"),
+    report: str = Query("json", pattern="^(json|csv)$", description="csv: baixa só as linhas com problema"),
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Cadastro em lote de pessoas (migração da base de clientes) a partir de
+    CSV, XLSX ou NDJSON. Requer role: staff, admin ou super_admin.
+    
+    O corpo é o próprio arquivo. Colunas/chaves = campos de criação da pessoa
+    (`types`, `document_type`, `full_name`, `cpf`, `phone`...); em planilhas,
+    `types` aceita "client, driver" e os campos objeto/lista vão como JSON.
+    
+    Mesmas validações de POST /persons, mais dígitos verificadores de
+    CPF/CNPJ. Documentos repetidos no arquivo ou já cadastrados são
+    reportados como "duplicate". Pessoas novas entram com status pendente.
+    Com `report=csv` a resposta é o relatório de erros para download (totais
+    nos headers X-Import-*).
+    """
+    fmt = detect_format(content_type, format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie CSV (text/csv), XLSX ou NDJSON (application/x-ndjson), ou informe ?format="
+        )
+    
+    if content_length and content_length > settings.MAX_IMPORT_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arquivo maior que {settings.MAX_IMPORT_SIZE // (1024 * 1024)}MB"
+        )
+    
+    try:
+        path = await spool_body(request.stream(), settings.MAX_IMPORT_SIZE)
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    try:
+        rows = read_rows(
+            path, fmt, json_fields=PERSON_IMPORT_JSON_FIELDS, list_fields=PERSON_IMPORT_LIST_FIELDS
+        )
+        result = await run_in_threadpool(
+            import_persons, db, rows, batch_size, user_id=current_user.id, dry_run=dry_run
+        )
+    except InvalidImportFile as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        os.unlink(path)
+    
+    summary = result.as_dict()
+    if report == "csv":
+        headers = {
+            "Content-Disposition": 'attachment; filename="importacao-pessoas-erros.csv"',
+            **{
+                f"X-Import-{name.replace('_', '-').title()}": str(summary[name])
+                for name in ("total", "created", "valid", "invalid", "duplicate", "error", "rows_per_second")
+            },
+        }
+        return Response(content=error_report_csv(result), media_type="text/csv; charset=utf-8", headers=headers)
+    
+    return summary
+
+
 @router.put("/{person_id}", response_model=PersonResponse)
 async def update_person(
     person_id: UUID,
     person_data: PersonUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Atualizar pessoa existente"""
+    """Atualizar pessoa existente (If-Match opcional, 412 em conflito)"""
     person = db.query(Person).filter(Person.id == person_id).first()
     
     if not person:
@@ -199,6 +493,8 @@ async def update_person(
             detail="Pessoa não encontrada"
         )
     
+    check_if_match(if_match, make_etag(person.id, person.version))
+    
     # Atualizar apenas campos fornecidos
     update_data = person_data.dict(exclude_unset=True, exclude={'address'})
     
@@ -207,13 +503,18 @@ async def update_person(
     
     # Atualizar endereço se fornecido
     if person_data.address:
-        person.address = person_data.address.dict()
+        address = person_data.address.dict()
+        if address != person.address:
+            # Endereço novo: o job de geocodificação recalcula as coordenadas
+            person.latitude = person.longitude = person.geocoded_at = None
+        person.address = address
     
     person.updated_by_id = current_user.id
     
-    db.commit()
+    commit_versioned(db)
     db.refresh(person)
     
+    response.headers["ETag"] = make_etag(person.id, person.version)
     return person
 
 
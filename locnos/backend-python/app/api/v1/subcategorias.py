@@ -3,14 +3,17 @@ Router API para Subcategorias
 CRUD completo
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import List, Optional
 from uuid import UUID
 from math import ceil
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.cache import response_cache, make_cache_key, catalog_tags, invalidate_catalog
+from app.services.category_tree import invalidate_category_tree
 from app.models.subcategoria import Subcategoria
 from app.models.user import User
 from app.schemas.subcategoria import (
@@ -20,6 +23,7 @@ from app.schemas.subcategoria import (
     SubcategoriaListaResposta
 )
 from app.api.deps import get_current_active_user, require_staff
+from app.api.etag import cached_response
 
 router = APIRouter()
 
@@ -30,12 +34,21 @@ async def listar_subcategorias(
     per_page: int = Query(50, ge=1, le=100),
     categoria_id: Optional[UUID] = None,
     ativo_apenas: bool = True,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Listar subcategorias com paginação.
-    Endpoint público.
+    Endpoint público, servido do cache de respostas.
     """
+    cache_key = make_cache_key("subcategorias", {
+        "page": page, "per_page": per_page,
+        "categoria_id": categoria_id, "ativo_apenas": ativo_apenas,
+    })
+    cached, generation = response_cache.lookup(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
+    
     query = db.query(Subcategoria)
     
     # Filtro por categoria pai
@@ -56,13 +69,16 @@ async def listar_subcategorias(
     offset = (page - 1) * per_page
     items = query.offset(offset).limit(per_page).all()
     
-    return SubcategoriaListaResposta(
+    body = SubcategoriaListaResposta(
         items=items,
         total=total,
         page=page,
         per_page=per_page,
         pages=ceil(total / per_page) if total > 0 else 0
-    )
+    ).model_dump_json().encode()
+    
+    cached = response_cache.set(cache_key, body, catalog_tags("subcategorias", categoria_id), generation)
+    return cached_response(cached, if_none_match, settings.CATALOG_MAX_AGE_SECONDS)
 
 
 @router.get("/{subcategoria_id}", response_model=SubcategoriaResposta)
@@ -107,6 +123,9 @@ async def criar_subcategoria(
     db.commit()
     db.refresh(subcategoria)
     
+    invalidate_catalog("subcategorias", subcategoria.categoria_id)
+    invalidate_category_tree()
+    
     return subcategoria
 
 
@@ -141,12 +160,17 @@ async def atualizar_subcategoria(
                 detail=f"Slug '{update_data['slug']}' já existe"
             )
     
+    old_categoria_id = subcategoria.categoria_id
+    
     for field, value in update_data.items():
         setattr(subcategoria, field, value)
     
     db.commit()
     db.refresh(subcategoria)
     
+    invalidate_catalog("subcategorias", old_categoria_id, subcategoria.categoria_id)
+    invalidate_category_tree()
+    
     return subcategoria
 
 
@@ -175,7 +199,11 @@ async def deletar_subcategoria(
             detail=f"Não é possível deletar. Existem {subcategoria.total_equipamentos} equipamentos nesta subcategoria."
         )
     
+    categoria_id = subcategoria.categoria_id
     db.delete(subcategoria)
     db.commit()
     
+    invalidate_catalog("subcategorias", categoria_id)
+    invalidate_category_tree()
+    
     return None
@@ -0,0 +1,452 @@
+"""
+Cache de respostas pré-serializadas (bytes) com invalidação por tags.
+
+- L1: LRU em memória por worker (com TTL)
+- L2 opcional: Redis compartilhado (REDIS_URL), habilitado por CACHE_USE_REDIS
+
+Cada entrada guarda o corpo JSON já serializado e o ETag calculado sobre ele,
+então um hit não passa pelo Pydantic nem pela consulta do endpoint.
+
+Invalidação por gerações: invalidar uma tag dá a ela um número novo de um
+contador global (Redis, Postgres com vários workers, ou memória com um só).
+Antes de consultar o banco, o endpoint anota o contador atual (`lookup`);
+a entrada é gravada com esse número e só é servida enquanto nenhuma das
+suas tags tiver geração maior. Assim a invalidação vale para todos os
+workers, e uma resposta lida antes de uma escrita não é gravada depois da
+invalidação correspondente.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+
+from .config import settings
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Corpo serializado + ETag de uma resposta (e a geração em que foi lido)"""
+    body: bytes
+    etag: str
+    generation: int = 0
+
+
+def make_cache_key(namespace: str, params: Dict[str, object]) -> str:
+    """
+    Chave determinística a partir dos parâmetros normalizados do endpoint.
+    Parâmetros None/"" são ignorados, a ordem não importa.
+    """
+    normalized = sorted(
+        (name, str(value.value if hasattr(value, "value") else value).strip().lower())
+        for name, value in params.items()
+        if value is not None and value != ""
+    )
+    digest = hashlib.sha1(json.dumps(normalized).encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def make_body_etag(body: bytes) -> str:
+    """ETag forte calculado sobre o corpo serializado"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class LRUCache:
+    """LRU thread-safe com TTL e índice tag -> chaves"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse, frozenset]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[CachedResponse, frozenset]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, tags = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value, tags
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None:
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        """Remove a chave e suas referências nas tags (chamar com lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """
+    Backend compartilhado entre workers.
+    Cada tag é um SET com as chaves que a referenciam.
+    """
+
+    PREFIX = "locnos:cache:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis  # dependência opcional
+
+        self.ttl_seconds = ttl_seconds
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Tuple[CachedResponse, list]]:
+        raw = self.client.hmget(self.PREFIX + key, "body", "etag", "tags", "generation")
+        if not raw or raw[0] is None:
+            return None
+        value = CachedResponse(body=raw[0], etag=raw[1].decode(), generation=int(raw[3] or 0))
+        return value, json.loads(raw[2] or "[]")
+
+    def set(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        pipe = self.client.pipeline()
+        pipe.hset(self.PREFIX + key, mapping={
+            "body": value.body, "etag": value.etag,
+            "tags": json.dumps(tags), "generation": value.generation,
+        })
+        pipe.expire(self.PREFIX + key, self.ttl_seconds)
+        for tag in tags:
+            pipe.sadd(self.PREFIX + "tag:" + tag, key)
+            pipe.expire(self.PREFIX + "tag:" + tag, self.ttl_seconds)
+        pipe.execute()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self.PREFIX + "tag:" + tag
+            keys = self.client.smembers(tag_key)
+            if keys:
+                removed += self.client.delete(*[self.PREFIX + k.decode() for k in keys])
+            self.client.delete(tag_key)
+        return removed
+
+
+class LocalGenerations:
+    """Gerações em memória: só servem com um único processo servindo o cache"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._counter = 0
+        self._tags: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        return self._counter
+
+    def max_for(self, tags: Iterable[str]) -> int:
+        return max((self._tags.get(tag, 0) for tag in tags), default=0)
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._counter += 1
+            for tag in tags:
+                self._tags[tag] = self._counter
+
+
+class RedisGenerations:
+    """Gerações no Redis do cache compartilhado (contador INCR + uma chave por tag)"""
+
+    name = "redis"
+    COUNTER = RedisCache.PREFIX + "generation"
+    TAG_PREFIX = RedisCache.PREFIX + "generation:"
+
+    def __init__(self, client):
+        self.client = client
+
+    def current(self) -> int:
+        return int(self.client.get(self.COUNTER) or 0)
+
+    def max_for(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        values = self.client.mget([self.TAG_PREFIX + tag for tag in tags])
+        return max(int(value or 0) for value in values)
+
+    def bump(self, tags: Iterable[str]) -> None:
+        generation = self.client.incr(self.COUNTER)
+        self.client.mset({self.TAG_PREFIX + tag: generation for tag in tags})
+
+
+class PostgresGenerations:
+    """
+    Gerações na tabela cache_geracoes (números da sequência cache_geracao_seq).
+    Custa uma consulta por chave primária a cada leitura do cache, bem menos
+    que a listagem que ela evita.
+    """
+
+    name = "postgres"
+
+    def current(self) -> int:
+        return self._scalar("SELECT coalesce(max(geracao), 0) FROM cache_geracoes")
+
+    def max_for(self, tags: Iterable[str]) -> int:
+        return self._scalar(
+            "SELECT coalesce(max(geracao), 0) FROM cache_geracoes WHERE tag = ANY(:tags)",
+            tags=list(tags),
+        )
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO cache_geracoes (tag, geracao) "
+                "SELECT tag, nextval('cache_geracao_seq') FROM unnest(CAST(:tags AS varchar[])) AS tag "
+                "ON CONFLICT (tag) DO UPDATE SET geracao = excluded.geracao"
+            ), {"tags": sorted(set(tags))})
+
+    @staticmethod
+    def _scalar(sql: str, **params) -> int:
+        with engine.connect() as connection:
+            return int(connection.execute(text(sql), params).scalar() or 0)
+
+
+class ResponseCache:
+    """
+    Cache de dois níveis com métricas de hit/miss.
+    Falhas do Redis ou do contador de gerações nunca derrubam a requisição:
+    o cache apenas é ignorado.
+    """
+
+    def __init__(self):
+        self.enabled = settings.CACHE_ENABLED
+        self.local = LRUCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+        self.shared: Optional[RedisCache] = None
+        self.generations = LocalGenerations()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        if self.enabled and settings.CACHE_USE_REDIS:
+            try:
+                self.shared = RedisCache(settings.REDIS_URL, settings.CACHE_TTL_SECONDS)
+                self.generations = RedisGenerations(self.shared.client)
+                # Com Redis, o L1 vive pouco para não reter memória de entradas invalidadas
+                self.local.ttl_seconds = min(settings.CACHE_TTL_SECONDS, settings.CACHE_LOCAL_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Cache Redis indisponível, usando apenas memória: {e}")
+        if self.enabled and self.shared is None and settings.WEB_CONCURRENCY > 1:
+            # Sem backend compartilhado, a invalidação de um worker precisa
+            # chegar aos L1 dos demais: as gerações ficam no banco
+            self.generations = PostgresGenerations()
+
+    def lookup(self, key: str) -> Tuple[Optional[CachedResponse], Optional[int]]:
+        """
+        Entrada válida da chave, ou (None, geração atual) num miss.
+        Chame antes de consultar o banco e repasse a geração ao `set`.
+        Geração None: contador indisponível, a resposta não deve ser gravada.
+        """
+        if not self.enabled:
+            return None, None
+
+        value = self._valid(self.local.get(key))
+        if value is None and self.shared is not None:
+            try:
+                found = self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Erro ao ler cache Redis: {e}")
+                found = None
+            value = self._valid(found)
+            if value is not None:
+                self.local.set(key, value, found[1])  # promove para o L1 com as mesmas tags
+
+        if value is not None:
+            self.hits += 1
+            return value, value.generation
+
+        self.misses += 1
+        try:
+            return None, self.generations.current()
+        except Exception as e:
+            logger.warning(f"Erro ao ler gerações do cache: {e}")
+            return None, None
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], generation: Optional[int]) -> CachedResponse:
+        """
+        Monta a resposta e grava no cache, a menos que alguma das tags tenha
+        sido invalidada depois de `generation` (a geração vista no `lookup`)
+        """
+        value = CachedResponse(body=body, etag=make_body_etag(body), generation=generation or 0)
+        if not self.enabled or generation is None:
+            return value
+
+        tags = list(tags)
+        try:
+            if self.generations.max_for(tags) > generation:
+                return value  # lida antes de uma escrita já invalidada
+        except Exception as e:
+            logger.warning(f"Erro ao ler gerações do cache: {e}")
+            return value
+
+        self.local.set(key, value, tags)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, tags)
+            except Exception as e:
+                logger.warning(f"Erro ao gravar cache Redis: {e}")
+        return value
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalida (em todos os workers) as entradas marcadas com qualquer uma das tags"""
+        self.invalidations += 1
+        try:
+            self.generations.bump(tags)
+        except Exception as e:
+            logger.warning(f"Erro ao avançar gerações do cache: {e}")
+        self.local.invalidate_tags(tags)
+        if self.shared is not None:
+            try:
+                self.shared.invalidate_tags(tags)
+            except Exception as e:
+                logger.warning(f"Erro ao invalidar cache Redis: {e}")
+
+    def _valid(self, found: Optional[Tuple[CachedResponse, Iterable[str]]]) -> Optional[CachedResponse]:
+        """Entrada cujas tags não foram invalidadas depois de gravada"""
+        if found is None:
+            return None
+        value, tags = found
+        try:
+            if self.generations.max_for(tags) > value.generation:
+                return None
+        except Exception as e:
+            logger.warning(f"Erro ao ler gerações do cache: {e}")
+            return None
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "memory+redis" if self.shared is not None else "memory",
+            "generations": self.generations.name,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class SingleFlight(Generic[T]):
+    """
+    Valor único calculado sob demanda e reaproveitado por `ttl_seconds`.
+
+    Com o valor expirado, requisições concorrentes esperam um único cálculo
+    (as demais recebem o resultado dele) em vez de repetir a consulta.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._value: Optional[T] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh(self) -> Optional[T]:
+        if self._value is not None and self._expires_at > time.monotonic():
+            return self._value
+        return None
+
+    def get(self, compute: Callable[[], T]) -> T:
+        value = self._fresh()
+        if value is not None:
+            return value
+        with self._lock:
+            value = self._fresh()
+            if value is None:  # ninguém calculou enquanto esperávamos o lock
+                value = compute()
+                self._value, self._expires_at = value, time.monotonic() + self.ttl_seconds
+            return value
+
+    def invalidate(self) -> None:
+        """A próxima leitura recalcula"""
+        self._expires_at = 0.0
+
+
+# ============================================================================
+# TAGS DO CATÁLOGO
+# ============================================================================
+
+def catalog_tags(namespace: str, *category_ids: object) -> list:
+    """
+    Tags de uma listagem: o namespace e as categorias filtradas (ou '*').
+    Filtro por categoria-pai: passe também as descendentes, para que escritas
+    em qualquer uma delas invalidem a listagem.
+    """
+    category_ids = [category_id for category_id in category_ids if category_id]
+    return [namespace] + [f"{namespace}:category:{category_id}" for category_id in category_ids or ["*"]]
+
+
+def invalidate_catalog(namespace: str, *category_ids: object) -> None:
+    """
+    Invalida listagens afetadas por escrita em itens das categorias informadas.
+    Sem categorias, invalida o namespace inteiro.
+    """
+    if not category_ids:
+        response_cache.invalidate(namespace)
+        return
+    tags = [f"{namespace}:category:*"]
+    tags += [f"{namespace}:category:{category_id}" for category_id in category_ids if category_id]
+    response_cache.invalidate(*tags)
+
+
+def invalidate_equipment(*category_ids: object) -> None:
+    """
+    Escrita em equipamentos: invalida as listagens do catálogo e as de
+    subcategorias, cujo total_equipamentos (mantido por trigger) muda junto.
+    """
+    invalidate_catalog("equipment", *category_ids)
+    invalidate_catalog("subcategorias", *category_ids)
+
+
+# Instância global (uma por worker)
+response_cache = ResponseCache()
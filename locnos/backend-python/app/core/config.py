@@ -57,6 +57,23 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Cache de respostas (catálogo público)
+    CACHE_ENABLED: bool = True
+    CACHE_USE_REDIS: bool = False  # Usa REDIS_URL como cache compartilhado
+    CACHE_MAX_ENTRIES: int = 2000
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCAL_TTL_SECONDS: int = 15  # TTL do L1 em memória quando há Redis
+    # Workers do servidor (uvicorn/gunicorn): com mais de um e sem Redis, as
+    # gerações do cache ficam no Postgres para a invalidação valer em todos
+    WEB_CONCURRENCY: int = 1
+    CATALOG_MAX_AGE_SECONDS: int = 60  # Cache-Control enviado ao navegador/CDN
+    CATEGORY_TREE_CHECK_SECONDS: int = 5  # Intervalo de conferência da versão da árvore de categorias
+    
+    DASHBOARD_STATS_TTL_SECONDS: int = 30  # Snapshot dos indicadores do dashboard (por worker)
+    
+    # Serialização rápida das listagens (validação única + orjson)
+    FAST_JSON_RESPONSES: bool = False
+    
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
@@ -96,6 +113,32 @@ class Settings(BaseSettings):
     
     # Upload
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    MAX_IMPORT_SIZE: int = 52428800  # 50MB (planilhas CSV/NDJSON)
+    IMPORT_BATCH_SIZE: int = 500  # Linhas por INSERT ... ON CONFLICT
+    
+    # Integração ERP (SAP B1): carga de pedidos em NDJSON
+    ERP_TIMEZONE: str = "America/Sao_Paulo"  # Fuso das datas sem fuso enviadas pelo ERP
+    ERP_FEED_URL: Optional[str] = None  # Feed NDJSON incremental (?since=<marca d'água>)
+    ERP_FEED_TOKEN: Optional[str] = None  # Enviado como Authorization: Bearer
+    
+    # Mídia (imagens de equipamentos e derivados)
+    STORAGE_BACKEND: str = "local"
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media"  # Prefixo público (pode ser absoluto, ex.: CDN)
+    IMAGE_WORKERS: int = 2  # Processos do pool de geração de derivados
+    
+    # Eventos em tempo real (SSE alimentado por LISTEN/NOTIFY)
+    SSE_MAX_CONNECTIONS: int = 500  # Conexões abertas por worker
+    SSE_QUEUE_MAX_EVENTS: int = 200  # Fila por conexão; estourou -> evento "resync"
+    SSE_QUEUE_MAX_BYTES: int = 262144  # 256KB por conexão
+    SSE_HEARTBEAT_SECONDS: int = 15  # Comentário "ping" para manter proxies abertos
+    
+    # Geocodificação de endereços (pessoas e pedidos)
+    GEOCODER_PROVIDER: str = "local"  # local (tabela CEP -> lat/lng) | nominatim (geopy)
+    GEOCODER_LOCAL_FILE: str = "data/ceps.csv"  # CSV: cep,latitude,longitude
+    GEOCODER_USER_AGENT: str = "locnos-geocoder"  # Exigido pela política do Nominatim
+    GEOCODER_CONCURRENCY: int = 8  # Consultas simultâneas ao provedor
+    GEOCODER_MAX_RETRIES: int = 4  # Tentativas com backoff em falhas temporárias
     
     # First Superuser (criado no seed)
     FIRST_SUPERUSER_EMAIL: EmailStr = "admin@locnos.com.br"
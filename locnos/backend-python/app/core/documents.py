@@ -0,0 +1,63 @@
+"""
+Validação de CPF e CNPJ (dígitos verificadores).
+
+Vetorizada com NumPy: um lote inteiro de documentos vira uma matriz de
+dígitos e os dois verificadores são calculados com um produto matricial,
+sem laço Python por documento (importações de milhares de cadastros).
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+
+CPF_LENGTH = 11
+CNPJ_LENGTH = 14
+
+# Pesos do 1º e 2º dígito verificador
+_CPF_WEIGHTS = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+_CNPJ_WEIGHTS = (
+    np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+    np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+)
+
+
+def _check_digit(digits: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Módulo 11: resto < 2 -> 0, senão 11 - resto (CPF e CNPJ)"""
+    remainder = (digits[:, :len(weights)] @ weights) % 11
+    return np.where(remainder < 2, 0, 11 - remainder)
+
+
+def _valid(values: Sequence[str], length: int, weights) -> np.ndarray:
+    valid = np.zeros(len(values), dtype=bool)
+    well_formed = [
+        i for i, value in enumerate(values)
+        if value and len(value) == length and value.isascii() and value.isdigit()
+    ]
+    if not well_formed:
+        return valid
+
+    digits = (
+        np.frombuffer("".join(values[i] for i in well_formed).encode("ascii"), dtype=np.uint8)
+        .reshape(-1, length)
+        .astype(np.int64) - ord("0")
+    )
+    first, second = weights
+    ok = (
+        (digits[:, length - 2] == _check_digit(digits, first))
+        & (digits[:, length - 1] == _check_digit(digits, second))
+        # 000.000.000-00, 111.111.111-11... passam no cálculo mas são inválidos
+        & (digits != digits[:, :1]).any(axis=1)
+    )
+    valid[well_formed] = ok
+    return valid
+
+
+def valid_cpfs(values: Sequence[str]) -> np.ndarray:
+    """Máscara booleana: CPF (11 dígitos, sem pontuação) válido"""
+    return _valid(values, CPF_LENGTH, _CPF_WEIGHTS)
+
+
+def valid_cnpjs(values: Sequence[str]) -> np.ndarray:
+    """Máscara booleana: CNPJ (14 dígitos, sem pontuação) válido"""
+    return _valid(values, CNPJ_LENGTH, _CNPJ_WEIGHTS)
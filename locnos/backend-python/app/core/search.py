@@ -0,0 +1,82 @@
+"""
+Infraestrutura de busca textual no PostgreSQL.
+
+- Extensões unaccent e pg_trgm
+- Configuração de full-text `pt_unaccent`: português + remoção de acentos
+  ("betoneira" encontra "betonêira" e vice-versa)
+- Função immutable_unaccent(), utilizável em índices de expressão
+"""
+
+from sqlalchemy import DDL, event, func, literal_column
+import re
+import unicodedata
+
+from .database import Base
+
+
+# Configuração de texto usada nos tsvector/tsquery
+TS_CONFIG = "pt_unaccent"
+_ts_config = literal_column(f"'{TS_CONFIG}'::regconfig")
+
+
+SEARCH_SETUP_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() é STABLE; o wrapper IMMUTABLE permite usá-lo em índices
+    """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{TS_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {TS_CONFIG} (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {TS_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+]
+
+
+# Garante extensões/config antes do create_all criar colunas e índices que dependem delas
+for _statement in SEARCH_SETUP_STATEMENTS:
+    event.listen(Base.metadata, "before_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+def ts_query(text: str):
+    """tsquery no formato de busca web ("betoneira 400l", "andaime -aluguel")"""
+    return func.websearch_to_tsquery(_ts_config, text)
+
+
+def unaccent(expression):
+    """immutable_unaccent(expr) - mesma normalização dos índices de expressão"""
+    return func.immutable_unaccent(expression)
+
+
+def normalize_text(value: str) -> str:
+    """Normalização em Python equivalente a lower(immutable_unaccent(...))"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def digits_only(value: str) -> str:
+    """Só os dígitos ("123.456.789-09" -> "12345678909")"""
+    return re.sub(r"\D", "", value or "")
+
+
+def escape_like(value: str) -> str:
+    """Escapa %, _ e \\ para uso literal em LIKE (escape padrão do PostgreSQL)"""
+    return re.sub(r"([\\%_])", r"\\\1", value)
+
+
+# Trechos destacados: até 2 fragmentos, termos marcados com <mark>
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter= … "
+
+
+def ts_headline(expression, query):
+    """ts_headline com a mesma configuração dos índices (destaca termos acentuados)"""
+    return func.ts_headline(_ts_config, expression, query, HEADLINE_OPTIONS)
@@ -0,0 +1,65 @@
+"""
+Caminho rápido de serialização para listagens (FAST_JSON_RESPONSES).
+
+Caminho padrão: objetos ORM -> modelos Pydantic (from_attributes) -> o FastAPI
+valida de novo contra o response_model -> jsonable_encoder -> json.dumps.
+
+Caminho rápido:
+- TypeAdapter(List[Schema]) valida os objetos ORM uma única vez
+- ou dicts montados direto das tuplas da consulta (sem Pydantic)
+- orjson codifica para bytes e a Response sai pronta (sem revalidação)
+
+A saída é a mesma do caminho padrão (Decimal como string, datas ISO 8601).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Iterable, List
+from uuid import UUID
+import json
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: cai para json da stdlib
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Tipos que o orjson (ou o json) não serializa nativamente"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON em bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: type) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def serialize_items(schema: type, objects: Iterable[Any]) -> List[dict]:
+    """Valida os objetos ORM uma única vez e devolve dicts prontos para o dumps()"""
+    adapter = _list_adapter(schema)
+    return adapter.dump_python(adapter.validate_python(list(objects), from_attributes=True))
+
+
+def json_response(payload: Any, **kwargs) -> Response:
+    """Response com o corpo já serializado (o FastAPI não revalida)"""
+    return Response(content=dumps(payload), media_type="application/json", **kwargs)
@@ -4,20 +4,22 @@ Execute: python -m app.create_contract_tables
 """
 
 from app.core.database import engine, Base
-from app.models import Contract, ContractItem, ContractStatus
+from app.models import Contract, ContractItem, ContractStatus, ContractEvent
 
 def create_tables():
     """Cria as tabelas de contratos no banco"""
     print("🔨 Criando tabelas de contratos...")
     
     try:
-        # Criar apenas as tabelas de Contract e ContractItem
+        # Criar apenas as tabelas de Contract, ContractItem e ContractEvent
         Contract.__table__.create(engine, checkfirst=True)
         ContractItem.__table__.create(engine, checkfirst=True)
+        ContractEvent.__table__.create(engine, checkfirst=True)
         
         print("✅ Tabelas criadas com sucesso!")
         print("   - contratos")
         print("   - itens_contrato")
+        print("   - contract_events")
         
     except Exception as e:
         print(f"❌ Erro ao criar tabelas: {e}")
@@ -0,0 +1,109 @@
+"""
+Script para atualizar o schema de bancos já existentes.
+create_all() só cria tabelas novas; colunas/índices adicionados
+em tabelas existentes são aplicados aqui de forma idempotente.
+Executa: python -m app.db_upgrade
+"""
+
+from sqlalchemy import text
+
+from app.core.database import engine, init_db
+from app.core.search import SEARCH_SETUP_STATEMENTS
+from app.models.equipment import EQUIPMENT_SEARCH_VECTOR_SQL, EQUIPMENT_COUNTER_STATEMENTS
+from app.models.person import (
+    PERSON_SEARCH_TEXT_SQL, PERSON_DISPLAY_NAME_SQL, DRIVER_TYPES_JSON,
+    PERSON_CREDIT_EXCESS_SQL, PERSON_OVER_LIMIT_SQL,
+)
+from app.services.change_events import NOTIFY_STATEMENTS
+import app.models  # noqa: F401 - registra todos os models no metadata
+
+
+UPGRADE_STATEMENTS = [
+    # Controle otimista de concorrência (ETag / If-Match)
+    'ALTER TABLE contratos ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1',
+    'ALTER TABLE equipamentos ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1',
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1',
+    
+    # Ordenação do catálogo por popularidade
+    'CREATE INDEX IF NOT EXISTS "ix_equipamentos_totalRentals" ON equipamentos ("totalRentals")',
+    
+    # Busca full-text (unaccent + português) e trigram nos códigos
+    *SEARCH_SETUP_STATEMENTS,
+    f'ALTER TABLE equipamentos ADD COLUMN IF NOT EXISTS "searchVector" tsvector '
+    f'GENERATED ALWAYS AS ({EQUIPMENT_SEARCH_VECTOR_SQL}) STORED',
+    'CREATE INDEX IF NOT EXISTS "ix_equipamentos_searchVector" ON equipamentos USING gin ("searchVector")',
+    'CREATE INDEX IF NOT EXISTS "ix_equipamentos_internalCode_trgm" ON equipamentos USING gin ("internalCode" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_equipamentos_barcode_trgm ON equipamentos USING gin (barcode gin_trgm_ops)',
+    
+    # Leitura de códigos (scanner): todos os códigos do equipamento indexados
+    'CREATE INDEX IF NOT EXISTS "ix_equipamentos_qrCode" ON equipamentos ("qrCode")',
+    
+    # Subcategoria do equipamento e contadores por categoria/subcategoria (triggers).
+    # Depois de instalar: python -m app.reconcile counters --fix
+    'ALTER TABLE equipamentos ADD COLUMN IF NOT EXISTS "subcategoryId" UUID REFERENCES subcategorias (id)',
+    'CREATE INDEX IF NOT EXISTS "ix_equipamentos_subcategoryId" ON equipamentos ("subcategoryId")',
+    *EQUIPMENT_COUNTER_STATEMENTS,
+    
+    # Busca de pessoas: texto normalizado (trigram) e prefixo de CPF/CNPJ
+    f'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS "searchText" text '
+    f'GENERATED ALWAYS AS ({PERSON_SEARCH_TEXT_SQL}) STORED',
+    'CREATE INDEX IF NOT EXISTS "ix_pessoas_searchText_trgm" ON pessoas USING gin ("searchText" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_cpf_prefix ON pessoas (cpf varchar_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_cnpj_prefix ON pessoas (cnpj varchar_pattern_ops)',
+    
+    # Filtros JSONB (tipo, dados do freteiro) e seletor de freteiros paginado
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_types ON pessoas USING gin (types jsonb_path_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_driver_data ON pessoas USING gin (driver_data jsonb_path_ops)',
+    f'CREATE INDEX IF NOT EXISTS ix_pessoas_drivers_name ON pessoas ({PERSON_DISPLAY_NAME_SQL}, id) '
+    f"WHERE active AND types @> '{DRIVER_TYPES_JSON}'::jsonb",
+    
+    # Deduplicação: cadastro mesclado em outro (tabela pessoas_duplicatas vem do create_all)
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS merged_into_id UUID REFERENCES pessoas (id)',
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_merged_into_id ON pessoas (merged_into_id)',
+    
+    # Exposição de crédito por cliente. Depois de instalar: python -m app.reconcile exposure --fix
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS open_exposure NUMERIC(12, 2) NOT NULL DEFAULT 0',
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS open_contracts INTEGER NOT NULL DEFAULT 0',
+    f'CREATE INDEX IF NOT EXISTS ix_pessoas_over_limit ON pessoas ({PERSON_CREDIT_EXCESS_SQL}) '
+    f'WHERE {PERSON_OVER_LIMIT_SQL}',
+    
+    # Coordenadas dos endereços (tabela geocodificacao_cache vem do create_all)
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS latitude NUMERIC(10, 8)',
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS longitude NUMERIC(11, 8)',
+    'ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP WITH TIME ZONE',
+    'CREATE INDEX IF NOT EXISTS ix_pessoas_coordenadas ON pessoas (latitude, longitude)',
+    'ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS latitude NUMERIC(10, 8)',
+    'ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS longitude NUMERIC(11, 8)',
+    'ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP WITH TIME ZONE',
+    'CREATE INDEX IF NOT EXISTS ix_pedidos_coordenadas ON pedidos (latitude, longitude)',
+    
+    # Séries do dashboard: alterações desde a última execução do job
+    # (tabelas dashboard_rollups* vêm do create_all). Depois: python -m app.rollups --backfill
+    'CREATE INDEX IF NOT EXISTS ix_pedidos_atualizado_em ON pedidos (atualizado_em)',
+    'CREATE INDEX IF NOT EXISTS ix_contratos_updated_at ON contratos (updated_at)',
+    
+    # Eventos em tempo real: pg_notify em pedidos, rotas e contratos
+    *NOTIFY_STATEMENTS,
+]
+
+
+def upgrade():
+    """Cria tabelas novas e aplica as alterações pendentes"""
+    print("🗄️  Atualizando schema do banco de dados...")
+
+    try:
+        init_db()
+
+        with engine.begin() as connection:
+            for statement in UPGRADE_STATEMENTS:
+                connection.execute(text(statement))
+
+        print(f"✅ Schema atualizado ({len(UPGRADE_STATEMENTS)} alterações verificadas)")
+
+    except Exception as e:
+        print(f"❌ Erro ao atualizar schema: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,115 @@
+"""
+Carga de pedidos do ERP (SAP B1) a partir de um feed NDJSON.
+
+Executa (ex.: cron a cada minuto nos picos de faturamento):
+    python -m app.erp_ingest pedidos.ndjson
+    cat pedidos.ndjson | python -m app.erp_ingest -
+    python -m app.erp_ingest --url https://erp/pedidos.ndjson   # padrão: ERP_FEED_URL
+    python -m app.erp_ingest pedidos.ndjson --dry-run --batch-size 1000
+
+Com --url a consulta é incremental: envia ?since=<marca d'água> (maior
+erp_atualizado_em já gravado, abaixo de qualquer linha que falhou).
+--full ignora a marca d'água.
+"""
+
+from urllib.parse import urlencode, urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.erp_ingest import ingest_pedidos, record_sync, sync_watermark
+from app.services.importers import InvalidImportFile, read_rows
+
+
+MAX_PRINTED_PROBLEMS = 50
+
+
+def _spool(stream) -> str:
+    """Copia o feed (stdin/HTTP) para um temporário, lido depois em streaming"""
+    fd, path = tempfile.mkstemp(prefix="erp-")
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+    return path
+
+
+def _feed_url(url: str, since) -> str:
+    if since is None:
+        return url
+    parts = urlsplit(url)
+    query = "&".join(filter(None, [parts.query, urlencode({"since": since.isoformat()})]))
+    return urlunsplit(parts._replace(query=query))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de pedidos do ERP (NDJSON, um pedido por linha)")
+    parser.add_argument("file", nargs="?", help="Arquivo NDJSON ('-' = stdin)")
+    parser.add_argument("--url", default=None, help="Feed HTTP do ERP (padrão: ERP_FEED_URL)")
+    parser.add_argument("--full", action="store_true", help="Com --url: ignora a marca d'água e busca tudo")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument("--timeout", type=int, default=300, help="Timeout do feed HTTP (segundos)")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas validar, sem gravar")
+    args = parser.parse_args()
+
+    url = args.url or (None if args.file else settings.ERP_FEED_URL)
+    if bool(args.file) == bool(url):
+        parser.error("Informe um arquivo NDJSON ou --url (ou ERP_FEED_URL), não ambos")
+    if args.batch_size < 1:
+        parser.error("--batch-size deve ser positivo")
+
+    db = SessionLocal()
+    path, temporary = args.file, args.file == "-" or url is not None
+    try:
+        if url:
+            since = None if args.full else sync_watermark(db)
+            request = Request(_feed_url(url, since), headers={"Accept": "application/x-ndjson"})
+            if settings.ERP_FEED_TOKEN:
+                request.add_header("Authorization", f"Bearer {settings.ERP_FEED_TOKEN}")
+            print(f"🔄 Baixando feed do ERP{f' (desde {since.isoformat()})' if since else ''}...")
+            with urlopen(request, timeout=args.timeout) as response:
+                path = _spool(response)
+        elif args.file == "-":
+            path = _spool(sys.stdin.buffer)
+
+        print(f"📦 Importando pedidos{' (dry-run)' if args.dry_run else ''}...")
+        try:
+            result = ingest_pedidos(db, read_rows(path, "ndjson"), args.batch_size, dry_run=args.dry_run)
+        except (InvalidImportFile, OSError) as e:
+            parser.error(str(e))
+        if not args.dry_run:
+            record_sync(db, result)
+    finally:
+        db.close()
+        if temporary and path:
+            os.unlink(path)
+
+    report = result.as_dict()
+    print(
+        f"   - {report['total']} linha(s) em {report['elapsed_seconds']:.1f}s "
+        f"({report['rows_per_second']:.0f} linhas/s)"
+    )
+    print(
+        f"       {report['created']} criado(s), {report['updated']} atualizado(s), "
+        f"{report['skipped']} sem alteração, {report['valid']} válido(s), "
+        f"{report['invalid']} inválido(s), {report['duplicate']} repetido(s), {report['error']} com erro"
+    )
+    if result.watermark:
+        print(f"   - Marca d'água do ERP: {result.watermark.isoformat()}")
+    elif result.high_water:
+        print("   - Marca d'água do ERP mantida: linha(s) com falha sem erp_atualizado_em legível")
+    problems = [entry for entry in report["results"] if entry["status"] in ("invalid", "error")]
+    for entry in problems[:MAX_PRINTED_PROBLEMS]:
+        print(f"   ⚠️  linha {entry['line']} ({entry['key'] or '-'}): {' | '.join(entry['errors'] or ())}")
+    if len(problems) > MAX_PRINTED_PROBLEMS:
+        print(f"   ... e mais {len(problems) - MAX_PRINTED_PROBLEMS} linha(s) com problema")
+
+    print("✅ Concluído" if not report["error"] else "❌ Concluído com erros")
+    return 1 if report["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
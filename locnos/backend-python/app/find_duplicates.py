@@ -0,0 +1,47 @@
+"""
+Job de deduplicação de pessoas: gera a fila de revisão (pessoas_duplicatas).
+
+Executa (ex.: cron semanal):
+    python -m app.find_duplicates                   # grava a fila
+    python -m app.find_duplicates --dry-run         # só mostra os pares
+    python -m app.find_duplicates --threshold 0.75
+"""
+
+import argparse
+
+from app.core.database import SessionLocal
+from app.services.person_dedupe import DEFAULT_THRESHOLD, run_dedupe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detecção de cadastros duplicados de pessoas")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help=f"Score mínimo (0-1) para sugerir o par (padrão: {DEFAULT_THRESHOLD})"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Não gravar a fila de revisão")
+    args = parser.parse_args()
+
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold deve estar entre 0 e 1")
+
+    db = SessionLocal()
+    try:
+        print("🔎 Procurando cadastros duplicados...")
+        report = run_dedupe(db, threshold=args.threshold, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    print(f"   - {report.persons} pessoa(s) ativas")
+    print(f"   - {report.blocks} bloco(s) comparados, {report.skipped_blocks} ignorado(s) por tamanho")
+    print(f"   - {report.comparisons} comparação(ões)")
+    print(f"   - {report.candidates} par(es) com score >= {args.threshold}")
+    for pair in report.top:
+        print(f"       {pair['score']:.2f} {pair['person_a_id']} ~ {pair['person_b_id']} ({', '.join(pair['reasons'])})")
+    if not args.dry_run:
+        print(f"   - {report.removed} pendente(s) antigo(s) removido(s) da fila")
+    print(f"✅ Concluído em {report.elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
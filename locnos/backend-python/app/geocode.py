@@ -0,0 +1,87 @@
+"""
+Job de geocodificação: preenche latitude/longitude de pessoas e pedidos e
+completa as paradas das rotas em aberto.
+
+Executa (ex.: cron noturno, ou depois de uma importação):
+    python -m app.geocode                              # pessoas, pedidos e rotas
+    python -m app.geocode pedidos rotas
+    python -m app.geocode --provider local --file data/ceps.csv
+    python -m app.geocode --provider nominatim --limit 500
+"""
+
+import argparse
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.geocoding import (
+    DEFAULT_BATCH_SIZE,
+    GEOCODERS,
+    fill_route_coordinates,
+    geocode_pedidos,
+    geocode_persons,
+    get_geocoder,
+)
+
+
+TARGETS = ("pessoas", "pedidos", "rotas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocodificação de endereços de pessoas e pedidos")
+    parser.add_argument("targets", nargs="*", help=f"Alvos: {', '.join(TARGETS)} (padrão: todos)")
+    parser.add_argument("--provider", choices=GEOCODERS, default=settings.GEOCODER_PROVIDER)
+    parser.add_argument("--file", help="CSV cep,latitude,longitude do provedor local (padrão: GEOCODER_LOCAL_FILE)")
+    parser.add_argument("--limit", type=int, help="Máximo de registros por alvo nesta execução")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.GEOCODER_CONCURRENCY)
+    parser.add_argument("--max-retries", type=int, default=settings.GEOCODER_MAX_RETRIES)
+    args = parser.parse_args()
+
+    targets = args.targets or TARGETS
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"Alvo(s) inválido(s): {', '.join(sorted(unknown))}")
+    if args.batch_size < 1 or args.concurrency < 1 or args.max_retries < 0:
+        parser.error("--batch-size e --concurrency devem ser positivos e --max-retries não negativo")
+
+    geocoder = None
+    if {"pessoas", "pedidos"} & set(targets):
+        try:
+            geocoder = get_geocoder(args.provider, args.file)
+        except (OSError, RuntimeError) as e:
+            parser.error(str(e))
+
+    options = {
+        "batch_size": args.batch_size,
+        "limit": args.limit,
+        "concurrency": args.concurrency,
+        "max_retries": args.max_retries,
+    }
+
+    db = SessionLocal()
+    try:
+        print(f"🗺️  Geocodificando ({args.provider})...")
+        reports = []
+        # Rotas depois dos pedidos: usam as coordenadas recém-gravadas
+        if "pessoas" in targets:
+            reports.append(geocode_persons(db, geocoder, **options))
+        if "pedidos" in targets:
+            reports.append(geocode_pedidos(db, geocoder, **options))
+        if "rotas" in targets:
+            reports.append(fill_route_coordinates(db))
+    finally:
+        db.close()
+
+    for report in reports:
+        print(f"   - {report.target}: {report.updated}/{report.rows} atualizado(s) em {report.elapsed:.1f}s")
+        if report.target != "rotas":
+            print(
+                f"       {report.addresses} endereço(s) distintos: {report.cached} do cache, "
+                f"{report.fetched} consultado(s), {report.not_found} não encontrado(s), "
+                f"{report.failed} com falha, {report.invalid} sem CEP/endereço"
+            )
+    print("✅ Concluído")
+
+
+if __name__ == "__main__":
+    main()
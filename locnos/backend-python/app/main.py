@@ -7,8 +7,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
+from urllib.parse import urlparse
 
 from app.core.config import settings
+from app.services.images import shutdown_image_pool
+from app.services.change_events import event_bus
 
 # Criar instância do FastAPI
 app = FastAPI(
@@ -64,6 +67,13 @@ async def api_health_check():
 
 
 
+@app.get("/health/cache")
+async def cache_stats():
+    """Métricas do cache de respostas do worker atual (hit ratio, entradas...)"""
+    from app.core.cache import response_cache
+    return response_cache.stats()
+
+
 @app.get(f"{settings.API_V1_STR}/test")
 async def test_endpoint():
     """Endpoint de teste"""
@@ -93,11 +103,15 @@ async def startup_event():
     print(f"📍 Ambiente: {settings.ENVIRONMENT}")
     print(f"🌐 Docs: http://{settings.HOST}:{settings.PORT}/docs")
     print("=" * 60)
+    # LISTEN desde o início: as notificações também invalidam caches do worker
+    event_bus.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado quando a aplicação encerra"""
+    shutdown_image_pool()
+    await event_bus.stop()
     print("\n👋 Encerrando aplicação...")
 
 
@@ -135,7 +149,7 @@ async def internal_error_handler(request, exc):
 # INCLUIR ROUTERS
 # ============================================================================
 
-from app.api.v1 import auth_router, equipment_router, persons_router, subcategorias_router, dashboard_router, contracts_router
+from app.api.v1 import auth_router, equipment_router, persons_router, subcategorias_router, dashboard_router, contracts_router, media_router, analytics_router, categories_router, events_router, pedidos_router
 
 app.include_router(
     auth_router,
@@ -155,6 +169,12 @@ app.include_router(
     tags=["Pessoas"]
 )
 
+app.include_router(
+    categories_router,
+    prefix=f"{settings.API_V1_STR}/categories",
+    tags=["Categorias"]
+)
+
 app.include_router(
     subcategorias_router,
     prefix=f"{settings.API_V1_STR}/subcategorias",
@@ -173,6 +193,37 @@ app.include_router(
     tags=["Contratos"]
 )
 
+app.include_router(
+    analytics_router,
+    prefix=f"{settings.API_V1_STR}/analytics",
+    tags=["Relatórios"]
+)
+
+app.include_router(
+    pedidos_router,
+    prefix=f"{settings.API_V1_STR}/pedidos",
+    tags=["Pedidos"]
+)
+
+app.include_router(
+    events_router,
+    prefix=f"{settings.API_V1_STR}/events",
+    tags=["Eventos"]
+)
+
+# Arquivos do storage local (imagens e derivados). Com MEDIA_URL absoluta sem
+# caminho (ex.: CDN na raiz do domínio) a mídia é servida fora daqui, e o
+# prefixo vazio transformaria a rota /{key:path} em catch-all
+media_prefix = urlparse(settings.MEDIA_URL).path.rstrip("/")
+if media_prefix:
+    app.include_router(
+        media_router,
+        prefix=media_prefix,
+        tags=["Mídia"]
+    )
+else:
+    print(f"⚠️  MEDIA_URL sem caminho ({settings.MEDIA_URL}): rota de mídia local não montada")
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,10 +4,16 @@ from .equipment import Equipment, EquipmentStatus
 from .category import Category
 from .subcategoria import Subcategoria
 from .person import Person, PersonType, PersonDocumentType, PersonStatus
+from .person_duplicate import PersonDuplicate, DuplicateStatus
 from .contract import Contract, ContractItem, ContractStatus
+from .contract_event import ContractEvent, ContractEventType
+from .geocode_cache import GeocodeCache
+from .dashboard_rollup import DashboardRollup, RollupWatermark
+from .cache_generation import CacheGeracao
 
 # Sistema Logística Droguista
 from .pedido import Pedido, StatusPedido, TipoFrete
+from .erp_sync import ErpSincronizacao
 from .transportadora import Transportadora
 from .veiculo import Veiculo, TipoVeiculo, StatusVeiculo
 from .rota import Rota, TipoRota, StatusRota
@@ -20,9 +26,15 @@ __all__ = [
     "Category",
     "Subcategoria",
     "Person", "PersonType", "PersonDocumentType", "PersonStatus",
+    "PersonDuplicate", "DuplicateStatus",
     "Contract", "ContractItem", "ContractStatus",
+    "ContractEvent", "ContractEventType",
+    "GeocodeCache",
+    "DashboardRollup", "RollupWatermark",
+    "CacheGeracao",
     # Logística
     "Pedido", "StatusPedido", "TipoFrete",
+    "ErpSincronizacao",
     "Transportadora",
     "Veiculo", "TipoVeiculo", "StatusVeiculo",
     "Rota", "TipoRota", "StatusRota",
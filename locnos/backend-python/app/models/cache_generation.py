@@ -0,0 +1,27 @@
+"""
+Model SQLAlchemy para as gerações do cache de respostas
+
+Com vários workers e sem Redis, cada worker tem seu próprio L1: a invalidação
+de um não alcança os demais. As tags invalidadas recebem aqui um número da
+sequência global, e uma entrada do cache só vale enquanto nenhuma das suas
+tags tiver geração maior que a vista quando a resposta foi lida do banco
+(ver app/core/cache.py).
+"""
+
+from sqlalchemy import Column, String, BigInteger, Sequence
+
+from app.core.database import Base
+
+
+cache_geracao_seq = Sequence("cache_geracao_seq", metadata=Base.metadata)
+
+
+class CacheGeracao(Base):
+    """Geração atual de uma tag do cache (último número da sequência usado)"""
+    __tablename__ = "cache_geracoes"
+
+    tag = Column(String(200), primary_key=True)
+    geracao = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<CacheGeracao {self.tag}: {self.geracao}>"
@@ -53,19 +53,24 @@ class Contract(Base):
     
     # Timestamps de auditoria
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     approved_at = Column(DateTime, nullable=True)
     activated_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
     cancelled_at = Column(DateTime, nullable=True)
     deleted_at = Column(DateTime, nullable=True)  # Soft delete
     
+    # Controle otimista de concorrência (UPDATE ... WHERE version = :v)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    
     # Relationships (ORM)
     customer = relationship("Person", foreign_keys=[customer_id], backref="contracts")
     created_by = relationship("User", foreign_keys=[created_by_id], backref="created_contracts")
     approved_by = relationship("User", foreign_keys=[approved_by_id], backref="approved_contracts")
     items = relationship("ContractItem", back_populates="contract", cascade="all, delete-orphan")
     
+    __mapper_args__ = {"version_id_col": version}
+    
     def __repr__(self):
         return f"<Contract {self.contract_number} - {self.status.value}>"
     
@@ -0,0 +1,65 @@
+"""
+Model SQLAlchemy para o histórico de eventos de Contratos
+
+Log append-only: cada criação, edição, transição de status ou exclusão gera
+uma linha nova, gravada na mesma transação da alteração do contrato (a nota
+de uma transição vai no payload do evento).
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Enum as SQLEnum, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import enum
+from app.core.database import Base
+from app.models.contract import ContractStatus
+import uuid
+
+
+class ContractEventType(str, enum.Enum):
+    """Tipos de evento registrados na linha do tempo do contrato"""
+    CRIADO = "criado"
+    ATUALIZADO = "atualizado"
+    STATUS_ALTERADO = "status_alterado"
+    EXCLUIDO = "excluido"
+
+
+class ContractEvent(Base):
+    """
+    Model de Evento de Contrato
+
+    Linhas nunca são atualizadas nem removidas; a linha do tempo é lida
+    com paginação por keyset sobre (contract_id, created_at, id).
+    """
+    __tablename__ = "contract_events"
+    __table_args__ = (
+        Index("ix_contract_events_timeline", "contract_id", "created_at", "id"),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    contract_id = Column(UUID(as_uuid=True), ForeignKey("contratos.id", ondelete="CASCADE"), nullable=False)
+
+    # Tipo e transição
+    event_type = Column(SQLEnum(ContractEventType), nullable=False, index=True)
+    from_status = Column(SQLEnum(ContractStatus), nullable=True)
+    to_status = Column(SQLEnum(ContractStatus), nullable=True)
+
+    # Quem executou a ação
+    actor_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=True)
+
+    # Dados adicionais (notas, motivo de cancelamento, campos alterados...)
+    payload = Column(JSONB, default={}, nullable=False)
+    # {
+    #   "notes": "Cliente confirmou retirada",
+    #   "changes": {"end_date": ["2024-12-01", "2024-12-05"]}
+    # }
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships (ORM)
+    contract = relationship("Contract", backref="events")
+    actor = relationship("User", foreign_keys=[actor_id])
+
+    def __repr__(self):
+        return f"<ContractEvent {self.event_type.value} {self.contract_id}>"
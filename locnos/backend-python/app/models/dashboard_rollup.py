@@ -0,0 +1,42 @@
+"""
+Models SQLAlchemy para as séries históricas do dashboard
+
+Agregados diários pré-calculados (pedidos por status, contratos criados e
+encerrados, receita), mantidos pelo job incremental python -m app.rollups.
+O endpoint de séries só lê estas tabelas, nunca o histórico completo.
+"""
+
+from sqlalchemy import Column, String, Date, DateTime, Integer, Numeric
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class DashboardRollup(Base):
+    """Contagem e valor de uma métrica em um dia (fuso local), por dimensão"""
+    __tablename__ = "dashboard_rollups"
+
+    metric = Column(String(40), primary_key=True)      # orders, contracts_created, contracts_closed
+    day = Column(Date, primary_key=True)
+    dimension = Column(String(50), primary_key=True)   # status ou "all"
+
+    count = Column(Integer, default=0, nullable=False)
+    value = Column(Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DashboardRollup {self.metric} {self.day} {self.dimension}: {self.count}>"
+
+
+class RollupWatermark(Base):
+    """
+    Marca d'água por tabela de origem: maior carimbo de alteração já
+    agregado. A próxima execução só reprocessa os dias tocados depois dela.
+    """
+    __tablename__ = "dashboard_rollup_watermarks"
+
+    source = Column(String(40), primary_key=True)      # pedidos, contratos
+    high_water = Column(DateTime(timezone=True), nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RollupWatermark {self.source} {self.high_water}>"
@@ -2,14 +2,83 @@
 Model SQLAlchemy para Equipamentos
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey, Computed, Index, DDL, event, literal_column
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.ext.hybrid import hybrid_property
 import uuid
 import enum
 
 from app.core.database import Base
+from app.core.search import TS_CONFIG
+
+
+# Documento de busca: nome (A), marca/tags (B), descrição (C)
+EQUIPMENT_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(brand, '')), 'B') || "
+    f"setweight(jsonb_to_tsvector('{TS_CONFIG}', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'C')"
+)
+
+
+def _counter_deltas_sql(*sources: str) -> str:
+    """
+    Aplica a categorias/subcategorias o saldo de equipamentos visíveis das
+    transition tables (novas: +1, antigas: -1), uma atualização por linha afetada
+    """
+    deltas = " UNION ALL ".join(
+        f'SELECT "categoryId" AS category_id, "subcategoryId" AS subcategory_id, {sign}1 AS delta '
+        f"FROM {table} WHERE visible"
+        for table, sign in (source.split(":") for source in sources)
+    )
+    return f"""
+        WITH deltas AS ({deltas}),
+        categories AS (
+            UPDATE categorias c
+            SET "totalEquipment" = coalesce(c."totalEquipment", 0) + d.delta, "updatedAt" = now()
+            FROM (
+                SELECT category_id, sum(delta) AS delta FROM deltas
+                WHERE category_id IS NOT NULL GROUP BY category_id HAVING sum(delta) <> 0
+            ) d
+            WHERE c.id = d.category_id
+        )
+        UPDATE subcategorias s
+        SET total_equipamentos = coalesce(s.total_equipamentos, 0) + d.delta, atualizado_em = now()
+        FROM (
+            SELECT subcategory_id, sum(delta) AS delta FROM deltas
+            WHERE subcategory_id IS NOT NULL GROUP BY subcategory_id HAVING sum(delta) <> 0
+        ) d
+        WHERE s.id = d.subcategory_id;"""
+
+
+# Contadores Category.total_equipment / Subcategoria.total_equipamentos
+# (equipamentos visíveis; o soft delete desmarca visible). Triggers por
+# instrução: imports em lote atualizam cada categoria uma vez por INSERT/UPDATE.
+EQUIPMENT_COUNTER_STATEMENTS = [
+    f"""
+    CREATE OR REPLACE FUNCTION equipamentos_contadores() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN{_counter_deltas_sql("novas:+")}
+        ELSIF TG_OP = 'UPDATE' THEN{_counter_deltas_sql("novas:+", "antigas:-")}
+        ELSE{_counter_deltas_sql("antigas:-")}
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS equipamentos_contadores_insert ON equipamentos",
+    "CREATE TRIGGER equipamentos_contadores_insert AFTER INSERT ON equipamentos "
+    "REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION equipamentos_contadores()",
+    "DROP TRIGGER IF EXISTS equipamentos_contadores_update ON equipamentos",
+    "CREATE TRIGGER equipamentos_contadores_update AFTER UPDATE ON equipamentos "
+    "REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION equipamentos_contadores()",
+    "DROP TRIGGER IF EXISTS equipamentos_contadores_delete ON equipamentos",
+    "CREATE TRIGGER equipamentos_contadores_delete AFTER DELETE ON equipamentos "
+    "REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION equipamentos_contadores()",
+]
 
 
 class EquipmentStatus(str, enum.Enum):
@@ -25,6 +94,18 @@ class Equipment(Base):
     """Model de Equipamento"""
     
     __tablename__ = "equipamentos"
+    __table_args__ = (
+        Index("ix_equipamentos_searchVector", "searchVector", postgresql_using="gin"),
+        # Busca parcial por código (ex.: "BET-0" ou final do código de barras)
+        Index(
+            "ix_equipamentos_internalCode_trgm", "internalCode",
+            postgresql_using="gin", postgresql_ops={"internalCode": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_equipamentos_barcode_trgm", "barcode",
+            postgresql_using="gin", postgresql_ops={"barcode": "gin_trgm_ops"}
+        ),
+    )
     
     # Identificação
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -36,7 +117,7 @@ class Equipment(Base):
     # Categoria e Subcategoria
     # Categoria e Subcategoria
     category_id = Column("categoryId", UUID(as_uuid=True), ForeignKey("categorias.id"), nullable=False, index=True)
-    # subcategory_id = Column("subcategoryId", UUID(as_uuid=True), ForeignKey("subcategorias.id"), nullable=True, index=True)
+    subcategory_id = Column("subcategoryId", UUID(as_uuid=True), ForeignKey("subcategorias.id"), nullable=True, index=True)
     
     # 🆕 NOVOS CAMPOS - Informações Expandidas
     brand = Column(String(100))  # Marca do equipamento
@@ -46,7 +127,7 @@ class Equipment(Base):
     internal_code = Column("internalCode", String(50), unique=True, nullable=False, index=True)
     serial_number = Column("serialNumber", String(100), unique=True)
     barcode = Column("barcode", String(100), unique=True, index=True)
-    qr_code = Column("qrCode", String(500))
+    qr_code = Column("qrCode", String(500), index=True)
     
     # Especificações (JSON flexível)
     specifications = Column(JSONB, default={})
@@ -115,7 +196,7 @@ class Equipment(Base):
     
     # Estatísticas
     # Estatísticas
-    total_rentals = Column("totalRentals", Integer, default=0)
+    total_rentals = Column("totalRentals", Integer, default=0, index=True)
     total_days_rented = Column("totalDaysRented", Integer, default=0)
     total_revenue = Column("totalRevenue", Numeric(10, 2), default=0)
     utilization_rate = Column("utilizationRate", Numeric(5, 2), default=0)
@@ -157,6 +238,9 @@ class Equipment(Base):
     # Tags para busca
     tags = Column(JSONB, default=[])
     
+    # Full-text (coluna gerada pelo banco; deferred para não trafegar nas listagens)
+    search_vector = deferred(Column("searchVector", TSVECTOR, Computed(EQUIPMENT_SEARCH_VECTOR_SQL, persisted=True)))
+    
     # Auditoria
     # Auditoria
     created_by_id = Column("createdById", UUID(as_uuid=True))
@@ -164,6 +248,11 @@ class Equipment(Base):
     created_at = Column("createdAt", DateTime(timezone=True), server_default=func.now())
     updated_at = Column("updatedAt", DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Controle otimista de concorrência (UPDATE ... WHERE version = :v)
+    version = Column("version", Integer, default=1, server_default="1", nullable=False)
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     def __repr__(self):
         return f"<Equipment {self.name} ({self.internal_code})>"
     
@@ -172,7 +261,7 @@ class Equipment(Base):
         """Verifica se está disponível para locação"""
         return self.status == EquipmentStatus.AVAILABLE and self.quantity_available > 0
     
-    @property
+    @hybrid_property
     def primary_image(self) -> str:
         """Retorna a URL da imagem principal"""
         if self.images and isinstance(self.images, list):
@@ -181,3 +270,16 @@ class Equipment(Base):
                     return img.get('url')
             return self.images[0].get('url') if self.images else None
         return None
+    
+    @primary_image.inplace.expression
+    @classmethod
+    def _primary_image_expression(cls):
+        """Mesma regra em SQL: imagem com isPrimary ou a primeira do array"""
+        primary = func.jsonb_path_query_first(
+            cls.images, literal_column("'$[*] ? (@.isPrimary == true).url'::jsonpath")
+        )
+        return func.coalesce(primary.op("#>>")(literal_column("'{}'")), cls.images[0]["url"].astext)
+
+
+for _statement in EQUIPMENT_COUNTER_STATEMENTS:
+    event.listen(Equipment.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,35 @@
+"""
+Model SQLAlchemy para o estado da integração com o ERP (SAP B1)
+
+Um registro por fonte (ex.: "pedidos"): marca d'água da última versão do ERP
+recebida e o resumo da última carga. A marca d'água é o `since` da próxima
+consulta incremental ao ERP (python -m app.erp_ingest --url ...).
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer, Numeric
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ErpSincronizacao(Base):
+    """Marca d'água e vazão da última carga de uma fonte do ERP"""
+    __tablename__ = "erp_sincronizacoes"
+
+    fonte = Column(String(40), primary_key=True)  # pedidos
+    # Maior carimbo de alteração do ERP (UpdateDate) já gravado
+    ultima_alteracao_erp = Column(DateTime(timezone=True))
+    ultima_execucao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Resumo da última carga
+    total = Column(Integer, default=0, nullable=False)
+    criados = Column(Integer, default=0, nullable=False)
+    atualizados = Column(Integer, default=0, nullable=False)
+    ignorados = Column(Integer, default=0, nullable=False)  # sem alteração, versão antiga ou já expedido
+    invalidos = Column(Integer, default=0, nullable=False)
+    erros = Column(Integer, default=0, nullable=False)
+    duracao_segundos = Column(Numeric(10, 3), default=0, nullable=False)
+    linhas_por_segundo = Column(Numeric(12, 1), default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<ErpSincronizacao {self.fonte} até {self.ultima_alteracao_erp}>"
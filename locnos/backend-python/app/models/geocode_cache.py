@@ -0,0 +1,33 @@
+"""
+Model SQLAlchemy para o cache de geocodificação
+
+Um registro por endereço normalizado (ver app.services.geocoding.address_key),
+compartilhado por pessoas e pedidos: o mesmo endereço só é consultado no
+provedor uma vez. Endereços não encontrados também ficam guardados
+(latitude/longitude nulas) para não repetir a consulta a cada execução.
+"""
+
+from sqlalchemy import Column, String, Numeric, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class GeocodeCache(Base):
+    """Endereço normalizado -> coordenadas"""
+    __tablename__ = "geocodificacao_cache"
+
+    address_key = Column(String(500), primary_key=True)
+    latitude = Column(Numeric(10, 8))   # NULL = não encontrado
+    longitude = Column(Numeric(11, 8))
+    # "endereco" (logradouro), "cep" (centro do CEP), "regiao" (prefixo do CEP)
+    precision = Column(String(20))
+    provider = Column(String(30), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @property
+    def found(self) -> bool:
+        return self.latitude is not None
+
+    def __repr__(self):
+        return f"<GeocodeCache {self.address_key} ({self.latitude}, {self.longitude})>"
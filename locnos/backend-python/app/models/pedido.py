@@ -5,7 +5,7 @@ Este modelo representa o pedido no fluxo de expedição logística,
 desde o faturamento no ERP até a entrega final ao cliente.
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -45,6 +45,10 @@ class Pedido(Base):
     """
     
     __tablename__ = "pedidos"
+    __table_args__ = (
+        # Roteirização: pedidos por região (caixa de latitude/longitude)
+        Index("ix_pedidos_coordenadas", "latitude", "longitude"),
+    )
     
     # =========================================================================
     # IDENTIFICAÇÃO
@@ -81,6 +85,10 @@ class Pedido(Base):
     #   "estado": "SP",
     #   "referencia": "Próximo ao Metrô Trianon"
     # }
+    # Coordenadas do endereço de entrega (python -m app.geocode)
+    latitude = Column(Numeric(10, 8))
+    longitude = Column(Numeric(11, 8))
+    geocoded_at = Column(DateTime(timezone=True))
     
     # =========================================================================
     # STATUS E WORKFLOW
@@ -225,7 +233,8 @@ class Pedido(Base):
     criado_por_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"))
     atualizado_por_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"))
     criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Indexado: o job de séries do dashboard lê os pedidos alterados desde a última execução
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     
     def __repr__(self):
         return f"<Pedido {self.numero_pedido} - Status: {self.status.value}>"
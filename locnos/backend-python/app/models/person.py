@@ -3,10 +3,11 @@ Model SQLAlchemy para Pessoas (Unified Person Registry)
 Substitui o conceito de "Cliente" por "Pessoa" com múltiplos tipos
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Enum, Numeric, Text, ForeignKey, Computed, Index, text, case
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.ext.hybrid import hybrid_property
 import uuid
 import enum
 
@@ -37,6 +38,24 @@ class PersonStatus(str, enum.Enum):
     INACTIVE = "inactive"    # Inativo
 
 
+# Predicado do índice parcial de freteiros (mesmo literal de Person.types.contains)
+DRIVER_TYPES_JSON = '["driver"]'
+
+# Exposição acima do limite de crédito (limite 0 = sem limite definido)
+PERSON_OVER_LIMIT_SQL = "credit_limit > 0 AND open_exposure > credit_limit"
+PERSON_CREDIT_EXCESS_SQL = "(open_exposure - credit_limit)"
+
+# Nome de exibição (ordenação da lista de freteiros)
+PERSON_DISPLAY_NAME_SQL = "coalesce(full_name, trade_name, company_name)"
+
+# Texto de busca: nomes + email em minúsculas e sem acentos (índice trigram)
+PERSON_SEARCH_TEXT_SQL = (
+    "lower(immutable_unaccent("
+    "coalesce(full_name, '') || ' ' || coalesce(company_name, '') || ' ' || "
+    "coalesce(trade_name, '') || ' ' || coalesce(email, '')))"
+)
+
+
 class Person(Base):
     """
     Model de Pessoa Unificado
@@ -46,6 +65,36 @@ class Person(Base):
     """
     
     __tablename__ = "pessoas"
+    __table_args__ = (
+        # Busca parcial/aproximada por nome, razão social, fantasia e email
+        Index(
+            "ix_pessoas_searchText_trgm", "searchText",
+            postgresql_using="gin", postgresql_ops={"searchText": "gin_trgm_ops"}
+        ),
+        # Prefixo de documento (LIKE '123%') independente da collation
+        Index("ix_pessoas_cpf_prefix", "cpf", postgresql_ops={"cpf": "varchar_pattern_ops"}),
+        Index("ix_pessoas_cnpj_prefix", "cnpj", postgresql_ops={"cnpj": "varchar_pattern_ops"}),
+        # Filtro por tipo (types @> '["driver"]') e por dados do freteiro
+        # (driver_data @> '{"vehicle_type": "..."}')
+        Index("ix_pessoas_types", "types", postgresql_using="gin", postgresql_ops={"types": "jsonb_path_ops"}),
+        Index(
+            "ix_pessoas_driver_data", "driver_data",
+            postgresql_using="gin", postgresql_ops={"driver_data": "jsonb_path_ops"}
+        ),
+        # Seletor de freteiros: só os motoristas ativos, já na ordem da listagem
+        # (a página é lida direto do índice, sem ordenar todos os freteiros)
+        Index(
+            "ix_pessoas_drivers_name", text(PERSON_DISPLAY_NAME_SQL), "id",
+            postgresql_where=text(f"active AND types @> '{DRIVER_TYPES_JSON}'::jsonb"),
+        ),
+        # Relatório de clientes acima do limite (só os estourados entram no índice)
+        Index(
+            "ix_pessoas_over_limit", text(PERSON_CREDIT_EXCESS_SQL),
+            postgresql_where=text(PERSON_OVER_LIMIT_SQL),
+        ),
+        # Consultas por região (caixa de latitude/longitude)
+        Index("ix_pessoas_coordenadas", "latitude", "longitude"),
+    )
     
     # Identificação
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -86,6 +135,11 @@ class Person(Base):
     #   "city": "São Paulo",
     #   "state": "SP"
     # }
+    # Coordenadas do endereço (job de geocodificação: python -m app.geocode).
+    # Zeradas quando o endereço muda, para serem recalculadas.
+    latitude = Column(Numeric(10, 8))
+    longitude = Column(Numeric(11, 8))
+    geocoded_at = Column(DateTime(timezone=True))
     
     # Referências Pessoais (OBRIGATÓRIO para tipo CLIENT - mínimo 2)
     references = Column(JSONB, default=[])
@@ -121,6 +175,11 @@ class Person(Base):
     total_rentals = Column(Integer, default=0)  # Total de locações
     total_spent = Column(Numeric(10, 2), default=0)  # Total gasto
     
+    # Exposição de crédito (mantida pelas transições de contrato): valor e
+    # quantidade dos contratos em aberto (aguardando aprovação, aprovados e ativos)
+    open_exposure = Column(Numeric(12, 2), default=0, server_default="0", nullable=False)
+    open_contracts = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # 🆕 Dados Específicos por Tipo (JSONB flexível)
     
     # Dados de Funcionário (se type inclui EMPLOYEE)
@@ -165,6 +224,12 @@ class Person(Base):
     # Visibilidade
     active = Column(Boolean, default=True, nullable=False, index=True)
     
+    # Cadastro mesclado em outro (deduplicação); inativo a partir da mescla
+    merged_into_id = Column(UUID(as_uuid=True), ForeignKey("pessoas.id"), index=True)
+    
+    # Busca (coluna gerada pelo banco; deferred para não trafegar nas listagens)
+    search_text = deferred(Column("searchText", Text, Computed(PERSON_SEARCH_TEXT_SQL, persisted=True)))
+    
     # Auditoria
     created_by_id = Column(UUID(as_uuid=True))
     updated_by_id = Column(UUID(as_uuid=True))
@@ -174,6 +239,11 @@ class Person(Base):
     # Client since (para CLIENTs)
     customer_since = Column(DateTime(timezone=True))
     
+    # Controle otimista de concorrência (UPDATE ... WHERE version = :v)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     def __repr__(self):
         name = self.full_name or self.company_name or f"Person {self.id}"
         return f"<Person {name} ({', '.join(self.types or [])})>"
@@ -198,7 +268,7 @@ class Person(Base):
         """Verifica se a pessoa é fornecedor"""
         return PersonType.SUPPLIER in (self.types or [])
     
-    @property
+    @hybrid_property
     def display_name(self) -> str:
         """Nome para exibição"""
         if self.document_type == PersonDocumentType.CPF:
@@ -206,6 +276,17 @@ class Person(Base):
         else:
             return self.trade_name or self.company_name or "Sem nome"
     
+    @display_name.expression
+    def display_name(cls):
+        """Mesma regra em SQL (listagens projetadas direto do banco)"""
+        return case(
+            (
+                cls.document_type == PersonDocumentType.CPF,
+                func.coalesce(func.nullif(cls.full_name, ""), "Sem nome"),
+            ),
+            else_=func.coalesce(func.nullif(cls.trade_name, ""), func.nullif(cls.company_name, ""), "Sem nome"),
+        )
+    
     @property
     def formatted_document(self) -> str:
         """Documento formatado (CPF ou CNPJ)"""
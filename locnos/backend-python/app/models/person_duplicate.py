@@ -0,0 +1,57 @@
+"""
+Model SQLAlchemy para candidatos a cadastro duplicado de Pessoas
+
+Preenchido pelo job de deduplicação (python -m app.find_duplicates) e
+revisado na tela de duplicados: cada par é mesclado ou descartado.
+"""
+
+from sqlalchemy import Column, Float, DateTime, ForeignKey, Enum as SQLEnum, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import enum
+import uuid
+
+from app.core.database import Base
+
+
+class DuplicateStatus(str, enum.Enum):
+    """Situação da revisão do par"""
+    PENDING = "pending"        # Aguardando revisão
+    MERGED = "merged"          # Cadastros mesclados
+    DISMISSED = "dismissed"    # Não são a mesma pessoa (não volta a ser sugerido)
+
+
+class PersonDuplicate(Base):
+    """
+    Par de pessoas possivelmente duplicadas
+
+    person_a_id < person_b_id (par não ordenado guardado uma única vez).
+    """
+    __tablename__ = "pessoas_duplicatas"
+    __table_args__ = (
+        UniqueConstraint("person_a_id", "person_b_id", name="uq_pessoas_duplicatas_par"),
+        # Fila de revisão: pendentes por score
+        Index("ix_pessoas_duplicatas_fila", "status", "score"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    person_a_id = Column(UUID(as_uuid=True), ForeignKey("pessoas.id", ondelete="CASCADE"), nullable=False, index=True)
+    person_b_id = Column(UUID(as_uuid=True), ForeignKey("pessoas.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # 0..1 (semelhança dos nomes + evidências em comum)
+    score = Column(Float, nullable=False)
+    # Chaves em comum que aproximaram o par: ["telefone", "email", "nome", "endereco"]
+    reasons = Column(JSONB, default=[], nullable=False)
+
+    status = Column(SQLEnum(DuplicateStatus), default=DuplicateStatus.PENDING, nullable=False)
+    detected_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    reviewed_by_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=True)
+    reviewed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships (ORM)
+    person_a = relationship("Person", foreign_keys=[person_a_id])
+    person_b = relationship("Person", foreign_keys=[person_b_id])
+
+    def __repr__(self):
+        return f"<PersonDuplicate {self.person_a_id} ~ {self.person_b_id} ({self.score:.2f})>"
@@ -0,0 +1,68 @@
+"""
+Impressão em lote de etiquetas patrimoniais (PDF).
+
+Executa:
+    python -m app.print_labels                              # todo o inventário
+    python -m app.print_labels --category <uuid> --layout a4-3x7
+    python -m app.print_labels --search furadeira --output furadeiras.pdf
+"""
+
+from itertools import chain
+from uuid import UUID
+import argparse
+import os
+import time
+
+from app.core.database import SessionLocal
+from app.models.equipment import EquipmentStatus
+from app.services.catalog import catalog_filters, descendant_category_ids
+from app.services.images import shutdown_image_pool
+from app.services.labels import LAYOUTS, load_labels, write_labels_pdf
+
+
+def print_labels(output: str, layout: str, workers: int, category_id=None, status=None, search=None) -> None:
+    db = SessionLocal()
+
+    try:
+        # Mesmos filtros do GET /equipment/labels: busca full-text do catálogo,
+        # categorias descendentes e equipamentos ocultos incluídos
+        filters = catalog_filters(
+            search, descendant_category_ids(db, category_id), status, None, None, None, False, visible_only=False
+        )
+        conditions = list(chain.from_iterable(filters.values()))
+
+        labels = load_labels(db, conditions)
+    finally:
+        db.close()
+
+    if not labels:
+        print("⚠️  Nenhum equipamento encontrado")
+        return
+
+    print(f"🏷️  {len(labels)} etiqueta(s) no layout {layout} com {workers} processo(s)")
+    started = time.perf_counter()
+    try:
+        with open(output, "wb") as f:
+            pages = write_labels_pdf(labels, f, layout, workers=workers)
+    finally:
+        shutdown_image_pool()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {output}: {pages} página(s) em {elapsed:.1f}s ({len(labels) / elapsed:.0f} etiquetas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Etiquetas patrimoniais dos equipamentos")
+    parser.add_argument("--category", type=UUID, help="Apenas uma categoria (e as descendentes)")
+    parser.add_argument("--status", choices=[s.value for s in EquipmentStatus], help="Apenas um status")
+    parser.add_argument("--search", help="Busca do catálogo (nome, marca, tags, descrição ou código)")
+    parser.add_argument("--layout", default="a4-3x11", choices=list(LAYOUTS), help="Folha de etiquetas")
+    parser.add_argument("--output", default="etiquetas.pdf", help="Arquivo PDF de saída")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Processos do pool")
+    args = parser.parse_args()
+
+    print_labels(args.output, args.layout, args.workers, args.category, args.status and EquipmentStatus(args.status), args.search)
+
+
+if __name__ == "__main__":
+    main()
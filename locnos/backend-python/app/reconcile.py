@@ -0,0 +1,76 @@
+"""
+Job de reconciliação dos contadores mantidos incrementalmente.
+Recalcula a partir da fonte e reporta divergências (drift).
+
+Executa (ex.: cron noturno):
+    python -m app.reconcile            # apenas relatório
+    python -m app.reconcile --fix      # corrige as divergências
+"""
+
+import argparse
+import sys
+
+from app.core.database import SessionLocal
+from app.services.rental_stats import reconcile_rental_stats
+from app.services.catalog_counters import reconcile_catalog_counters
+from app.services.credit import reconcile_exposure
+
+
+# Alvo -> função (db, fix) -> relatório {tabela: [linhas divergentes], "fixed": bool}
+TARGETS = {
+    "rental-stats": reconcile_rental_stats,
+    "counters": reconcile_catalog_counters,
+    "exposure": reconcile_exposure,
+}
+
+
+def run(targets, fix: bool = False) -> int:
+    """Executa os alvos selecionados e retorna o total de linhas divergentes"""
+    db = SessionLocal()
+    total_drift = 0
+
+    try:
+        for name in targets:
+            print(f"🔎 Reconciliando {name}...")
+            report = TARGETS[name](db, fix=fix)
+
+            for table, rows in report.items():
+                if table == "fixed":
+                    continue
+                total_drift += len(rows)
+                print(f"   - {table}: {len(rows)} divergência(s)")
+                for row in rows[:20]:
+                    print(f"       {row}")
+                if len(rows) > 20:
+                    print(f"       ... e mais {len(rows) - 20}")
+
+            if report.get("fixed"):
+                print("   ✅ Divergências corrigidas")
+
+    finally:
+        db.close()
+
+    return total_drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconciliação de contadores")
+    parser.add_argument(
+        "targets", nargs="*", metavar="TARGET",
+        help=f"Alvos a reconciliar: {', '.join(TARGETS)} (padrão: todos)"
+    )
+    parser.add_argument("--fix", action="store_true", help="Corrigir as divergências encontradas")
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"Alvo(s) desconhecido(s): {', '.join(sorted(unknown))}")
+
+    drift = run(args.targets or list(TARGETS), fix=args.fix)
+
+    # Código de saída != 0 quando há drift sem correção (útil para alertas do cron)
+    sys.exit(1 if drift and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Reprocessamento em lote das imagens do catálogo.
+Regera os derivados WebP a partir dos originais (ex.: após mudar tamanhos
+ou qualidade em app/services/images.py) usando o pool de processos.
+
+Executa:
+    python -m app.reprocess_images                 # todas as imagens
+    python -m app.reprocess_images --missing       # só derivados ausentes
+    python -m app.reprocess_images --workers 8
+"""
+
+from concurrent.futures import as_completed
+from pathlib import PurePosixPath
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from app.core.cache import invalidate_catalog
+from app.core.database import SessionLocal
+from app.models.equipment import Equipment
+from app.services.images import (
+    DERIVATIVES,
+    CONTENT_TYPES,
+    InvalidImage,
+    get_image_pool,
+    image_entry,
+    image_keys,
+    render_derivatives,
+    shutdown_image_pool,
+)
+from app.services.storage import get_storage
+
+
+def _original_extension(image: dict) -> str:
+    return PurePosixPath(image.get("originalUrl", "")).suffix.lstrip(".") or "jpg"
+
+
+def _source_path(storage, key: str):
+    """Caminho local do original (baixa para um temporário em backends remotos)"""
+    path = storage.local_path(key)
+    if path is not None:
+        return str(path), False
+
+    fd, tmp = tempfile.mkstemp(prefix="reprocess-")
+    with os.fdopen(fd, "wb") as target, storage.open(key) as source:
+        shutil.copyfileobj(source, target)
+    return tmp, True
+
+
+def reprocess(workers: int, missing_only: bool = False) -> None:
+    storage = get_storage()
+    db = SessionLocal()
+
+    try:
+        equipments = db.query(Equipment).filter(Equipment.images.isnot(None)).all()
+
+        # Hash -> extensão do original (a mesma foto pode estar em vários equipamentos)
+        originals = {}
+        legacy = 0
+        for equipment in equipments:
+            for image in equipment.images or []:
+                if isinstance(image, dict) and image.get("hash"):
+                    originals[image["hash"]] = _original_extension(image)
+                else:
+                    legacy += 1
+
+        if missing_only:
+            originals = {
+                digest: extension for digest, extension in originals.items()
+                if not all(storage.exists(image_keys(digest, extension)[name]) for name in DERIVATIVES)
+            }
+
+        print(f"🖼️  {len(originals)} imagem(ns) para processar com {workers} processo(s)")
+        if legacy:
+            print(f"   - {legacy} imagem(ns) antiga(s) sem original armazenado (apenas URL) ignorada(s)")
+
+        pool = get_image_pool(workers)
+        started = time.perf_counter()
+        results = {}
+        output_bytes = 0
+        failures = 0
+
+        futures = {}
+        for digest, extension in originals.items():
+            key = image_keys(digest, extension)["original"]
+            if not storage.exists(key):
+                failures += 1
+                print(f"   ⚠️  Original ausente: {key}")
+                continue
+            path, temporary = _source_path(storage, key)
+            futures[pool.submit(render_derivatives, path)] = (digest, extension, path, temporary)
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            digest, extension, path, temporary = futures[future]
+            try:
+                result = future.result()
+            except InvalidImage as e:
+                failures += 1
+                print(f"   ⚠️  {digest[:12]}: {e}")
+                continue
+            finally:
+                if temporary:
+                    os.unlink(path)
+
+            keys = image_keys(digest, extension)
+            for name, data in result["derivatives"].items():
+                storage.save_bytes(keys[name], data, CONTENT_TYPES["webp"])
+                output_bytes += len(data)
+            results[digest] = result
+
+            if done % 100 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"   ... {done}/{len(futures)} ({done / elapsed:.1f} imagens/s)")
+
+        elapsed = time.perf_counter() - started
+
+        # Atualiza os itens de Equipment.images (novos derivados/dimensões)
+        updated = 0
+        for equipment in equipments:
+            images = []
+            changed = False
+            for image in equipment.images or []:
+                result = results.get(image.get("hash")) if isinstance(image, dict) else None
+                if result is None:
+                    images.append(image)
+                    continue
+                entry = image_entry(storage, image["hash"], _original_extension(image), result["width"], result["height"])
+                entry["isPrimary"] = bool(image.get("isPrimary"))
+                changed = changed or entry != image
+                images.append(entry)
+            if changed:
+                equipment.images = images
+                updated += 1
+
+        db.commit()
+        if updated:
+            invalidate_catalog("equipment")
+
+        rate = len(results) / elapsed if elapsed > 0 else 0.0
+        print(f"✅ {len(results)} processada(s) em {elapsed:.1f}s ({rate:.1f} imagens/s, "
+              f"{output_bytes / 1024 / 1024:.1f}MB gerados)")
+        print(f"   - {updated} equipamento(s) atualizado(s), {failures} falha(s)")
+
+    finally:
+        shutdown_image_pool()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocessamento das imagens do catálogo")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Processos do pool")
+    parser.add_argument("--missing", action="store_true", help="Processar apenas imagens sem derivados")
+    args = parser.parse_args()
+
+    reprocess(args.workers, missing_only=args.missing)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Job das séries históricas do dashboard (tabelas dashboard_rollups).
+
+Executa (ex.: cron a cada 5 minutos):
+    python -m app.rollups                          # incremental (desde a marca d'água)
+    python -m app.rollups --backfill               # recalcula todo o histórico
+    python -m app.rollups contratos --backfill --start 2024-01-01 --end 2024-12-31
+"""
+
+import argparse
+from datetime import date
+
+from app.core.database import SessionLocal
+from app.services.rollups import BACKFILL_CHUNK_DAYS, SOURCES, refresh_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualização das séries históricas do dashboard")
+    parser.add_argument("sources", nargs="*", help=f"Origens: {', '.join(SOURCES)} (padrão: todas)")
+    parser.add_argument("--backfill", action="store_true", help="Recalcular o histórico em vez do incremental")
+    parser.add_argument("--start", type=date.fromisoformat, help="Início do backfill (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Fim do backfill, inclusive (AAAA-MM-DD)")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS, help="Dias por transação no backfill")
+    args = parser.parse_args()
+
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"Origem(ns) inválida(s): {', '.join(sorted(unknown))}")
+    if (args.start or args.end) and not args.backfill:
+        parser.error("--start/--end só valem com --backfill")
+    if args.chunk_days < 1:
+        parser.error("--chunk-days deve ser positivo")
+
+    options = {"start": args.start, "end": args.end, "chunk_days": args.chunk_days} if args.backfill else {}
+
+    db = SessionLocal()
+    try:
+        print(f"📈 Atualizando séries do dashboard ({'backfill' if args.backfill else 'incremental'})...")
+        report = refresh_rollups(db, args.sources or None, backfill=args.backfill, **options)
+    finally:
+        db.close()
+
+    for source, days in report.items():
+        print(f"   - {source}: {days} dia(s) recalculado(s)")
+    print("✅ Concluído")
+
+
+if __name__ == "__main__":
+    main()
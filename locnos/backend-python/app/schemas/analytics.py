@@ -0,0 +1,48 @@
+"""
+Schemas Pydantic para relatórios gerenciais
+"""
+
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+
+class UtilizationTotals(BaseModel):
+    """Totais de capacidade, ocupação e receita de um recorte"""
+    capacity_unit_days: int
+    occupied_unit_days: int
+    idle_days: int
+    utilization: float  # %
+    revenue: float
+
+
+class UtilizationMonth(UtilizationTotals):
+    month: str  # AAAA-MM
+
+
+class CategoryUtilization(UtilizationTotals):
+    category_id: UUID
+    name: Optional[str] = None
+    equipment_count: int
+    months: List[UtilizationMonth]
+
+
+class EquipmentUtilization(UtilizationTotals):
+    equipment_id: UUID
+    name: str
+    internal_code: str
+    category_id: UUID
+
+
+class UtilizationReportResponse(BaseModel):
+    """Relatório de utilização e receita de uma janela de datas"""
+    start: date
+    end: date
+    days: int
+    equipment_count: int
+    rental_count: int
+    summary: UtilizationTotals
+    months: List[UtilizationMonth]
+    categories: List[CategoryUtilization]
+    equipment: List[EquipmentUtilization]
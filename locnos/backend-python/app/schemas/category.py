@@ -0,0 +1,37 @@
+"""
+Schemas Pydantic para Categorias
+"""
+
+from pydantic import BaseModel
+from typing import Optional, List
+from uuid import UUID
+
+
+class SubcategoriaResumo(BaseModel):
+    """Subcategoria dentro da árvore de categorias"""
+    id: UUID
+    nome: str
+    slug: str
+    icone: Optional[str] = None
+    ordem: int = 0
+    total_equipamentos: int = 0
+
+
+class CategoryTreeNode(BaseModel):
+    """Categoria com filhas e subcategorias"""
+    id: UUID
+    name: str
+    slug: str
+    description: Optional[str] = None
+    icon: Optional[str] = None
+    image: Optional[str] = None
+    order: int = 0
+    total_equipment: int = 0
+    subcategorias: List[SubcategoriaResumo] = []
+    children: List["CategoryTreeNode"] = []
+
+
+class CategoryTreeResponse(BaseModel):
+    """Árvore de categorias ativas"""
+    version: str
+    items: List[CategoryTreeNode]
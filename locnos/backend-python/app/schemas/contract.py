@@ -4,9 +4,11 @@ Schemas Pydantic para Contratos de Locação
 
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from decimal import Decimal
+from uuid import UUID
 from app.models.contract import ContractStatus
+from app.models.contract_event import ContractEventType
 
 
 # ============================================================================
@@ -166,6 +168,32 @@ class ContractCalculation(BaseModel):
     items: List[dict]  # Lista com cálculo de cada item
 
 
+# ============================================================================
+# EVENT SCHEMAS
+# ============================================================================
+
+class ContractEventResponse(BaseModel):
+    """Schema de um evento da linha do tempo do contrato"""
+    id: UUID
+    contract_id: UUID
+    event_type: ContractEventType
+    from_status: Optional[ContractStatus] = None
+    to_status: Optional[ContractStatus] = None
+    actor_id: Optional[UUID] = None
+    actor_name: Optional[str] = None
+    payload: Dict[str, Any] = {}
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ContractEventListResponse(BaseModel):
+    """Página da linha do tempo (paginação por cursor)"""
+    items: List[ContractEventResponse]
+    next_cursor: Optional[str] = None
+
+
 # ============================================================================
 # FILTER SCHEMAS
 # ============================================================================
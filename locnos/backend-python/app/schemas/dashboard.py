@@ -0,0 +1,70 @@
+"""
+Schemas Pydantic para os indicadores do dashboard
+"""
+
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+
+class OrderStats(BaseModel):
+    total: int
+    pending: int          # Aguardando expedição
+    in_transit: int       # Em rota
+    overdue: int          # Previsão de entrega vencida e ainda não entregues
+    failed: int           # Última tentativa de entrega sem sucesso
+
+
+class EquipmentStats(BaseModel):
+    total: int
+    available: int        # Disponível e com unidades livres
+    rented: int
+    maintenance: int
+
+
+class FleetStats(BaseModel):
+    active_vehicles: int
+    available: int
+    in_route: int
+    maintenance: int
+
+
+class ContractStats(BaseModel):
+    open: int                 # Aguardando aprovação, aprovados e ativos
+    awaiting_approval: int
+    active: int
+    overdue: int              # Ativos com data de término vencida
+    finished_this_month: int
+
+
+class RevenueStats(BaseModel):
+    active: float             # Valor dos contratos ativos
+    open: float               # Valor de todos os contratos em aberto
+    this_month: float         # Contratos finalizados no mês corrente
+
+
+class DashboardStatsResponse(BaseModel):
+    """Indicadores do dashboard (snapshot de curta duração)"""
+    orders: OrderStats
+    equipment: EquipmentStats
+    fleet: FleetStats
+    contracts: ContractStats
+    revenue: RevenueStats
+    generated_at: datetime
+
+
+class TimeSeriesPoint(BaseModel):
+    period: date              # Dia, segunda-feira da semana ou 1º dia do mês
+    dimension: str            # Status (pedidos, contratos encerrados) ou "all"
+    count: int
+    value: float
+
+
+class TimeSeriesResponse(BaseModel):
+    """Série histórica lida dos rollups diários"""
+    metric: str
+    granularity: str
+    start: date
+    end: date
+    points: List[TimeSeriesPoint]
+    as_of: Optional[datetime] = None  # Última alteração já agregada (None = ainda sem rollup)
@@ -4,7 +4,7 @@ Schemas Pydantic para Equipment (request/response)
 
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
 from uuid import UUID
 from decimal import Decimal
 
@@ -100,6 +100,10 @@ class EquipmentResponse(EquipmentBase):
     tags: List[str] = []
     created_at: datetime
     
+    # Preenchidos apenas em buscas (?search=)
+    search_rank: Optional[float] = None
+    highlight: Optional[str] = None
+    
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -112,6 +116,96 @@ class EquipmentListResponse(BaseModel):
     pages: int
 
 
+class EquipmentListItem(BaseModel):
+    """
+    Item compacto da listagem (?fields=).
+    Só os campos pedidos são preenchidos e serializados (exclude_unset).
+    """
+    id: UUID
+    name: Optional[str] = None
+    description: Optional[str] = None
+    internal_code: Optional[str] = None
+    category_id: Optional[UUID] = None
+    brand: Optional[str] = None
+    status: Optional[str] = None
+    daily_rate: Optional[Decimal] = None
+    weekly_rate: Optional[Decimal] = None
+    monthly_rate: Optional[Decimal] = None
+    quantity_total: Optional[int] = None
+    quantity_available: Optional[int] = None
+    featured: Optional[bool] = None
+    total_rentals: Optional[int] = None
+    primary_image: Optional[str] = None
+    created_at: Optional[datetime] = None
+    search_rank: Optional[float] = None
+    highlight: Optional[str] = None
+
+
+class EquipmentCompactListResponse(BaseModel):
+    """Lista paginada com itens compactos"""
+    items: List[EquipmentListItem]
+    total: int
+    page: int
+    per_page: int
+    pages: int
+
+
+class FacetBucket(BaseModel):
+    """Valor de uma faceta e quantidade de equipamentos"""
+    value: str
+    label: Optional[str] = None
+    count: int
+
+
+class EquipmentFacetsResponse(BaseModel):
+    """Contagens por faceta para a barra de filtros do catálogo"""
+    total: int
+    category: List[FacetBucket] = []
+    status: List[FacetBucket] = []
+    brand: List[FacetBucket] = []
+    price: List[FacetBucket] = []
+
+
+class ScanEquipment(BaseModel):
+    """Resumo do equipamento encontrado na leitura"""
+    id: UUID
+    name: str
+    internal_code: str
+    status: str
+    quantity_total: int
+    quantity_available: int
+    primary_image: Optional[str] = None
+
+
+class ScanActiveContract(BaseModel):
+    """Contrato ativo (ou aprovado aguardando retirada) do equipamento"""
+    id: UUID
+    contract_number: str
+    status: str
+    customer_name: Optional[str] = None
+    start_date: date
+    end_date: date
+
+
+class EquipmentScanResult(BaseModel):
+    """Resultado da leitura de um código"""
+    code: str
+    matched_field: str  # internal_code, barcode, serial_number ou qr_code
+    equipment: ScanEquipment
+    active_contract: Optional[ScanActiveContract] = None
+
+
+class ScanBatchRequest(BaseModel):
+    """Códigos lidos em sequência no scanner"""
+    codes: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class ScanBatchResponse(BaseModel):
+    """Resultados na ordem dos códigos lidos + códigos não encontrados"""
+    results: List[EquipmentScanResult]
+    not_found: List[str]
+
+
 class EquipmentAvailabilityCheck(BaseModel):
     """Schema para verificar disponibilidade"""
     equipment_id: UUID
@@ -126,3 +220,26 @@ class EquipmentAvailabilityResponse(BaseModel):
     quantity_available: int
     estimated_price: Decimal
     rental_days: int
+
+
+class ImportRowResult(BaseModel):
+    """Resultado de uma linha importada"""
+    line: int
+    key: Optional[str] = None  # código interno (equipamentos), CPF/CNPJ (pessoas) ou número do pedido
+    status: str  # created, updated, skipped, valid (dry_run), invalid, duplicate, error
+    errors: Optional[List[str]] = None
+
+
+class ImportResponse(BaseModel):
+    """Resumo e resultados linha a linha de uma importação em lote"""
+    total: int
+    created: int
+    updated: int
+    skipped: int = 0
+    valid: int
+    invalid: int
+    duplicate: int
+    error: int
+    elapsed_seconds: float
+    rows_per_second: float
+    results: List[ImportRowResult]
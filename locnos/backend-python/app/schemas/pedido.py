@@ -0,0 +1,131 @@
+"""
+Schemas Pydantic para Pedidos (integração com o ERP)
+"""
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime
+from typing import Optional, List
+from decimal import Decimal
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.core.search import digits_only
+from app.models.pedido import TipoFrete
+from app.schemas.equipment import ImportResponse
+
+
+class ItemPedidoImport(BaseModel):
+    """Item do pedido vindo do ERP (gravado em pedidos.itens)"""
+    codigo: str = Field(..., min_length=1, max_length=60)
+    descricao: Optional[str] = Field(None, max_length=300)
+    quantidade: float = Field(..., gt=0)
+    unidade: str = Field("UN", max_length=10)
+    valor_unitario: Optional[float] = Field(None, ge=0)
+    valor_total: Optional[float] = Field(None, ge=0)
+    codigo_barras: Optional[str] = Field(None, max_length=50)
+    peso_unitario_kg: Optional[float] = Field(None, ge=0, description="Peso bruto por unidade")
+    quantidade_por_volume: Optional[float] = Field(None, gt=0, description="Unidades por caixa/volume")
+
+
+class EnderecoEntregaImport(BaseModel):
+    """Endereço de entrega (mesmas chaves de pedidos.endereco_entrega)"""
+    cep: str = Field(..., min_length=8, max_length=9)
+    logradouro: str = Field(..., min_length=1, max_length=200)
+    numero: Optional[str] = Field(None, max_length=20)
+    complemento: Optional[str] = Field(None, max_length=100)
+    bairro: Optional[str] = Field(None, max_length=100)
+    cidade: str = Field(..., min_length=2, max_length=100)
+    estado: str = Field(..., min_length=2, max_length=2, description="UF - 2 letras")
+    referencia: Optional[str] = Field(None, max_length=200)
+
+
+class PedidoImport(BaseModel):
+    """
+    Pedido faturado vindo do ERP (uma linha do NDJSON).
+    
+    Cliente e vendedor pelo id ou pelo CPF/CNPJ cadastrado. Datas sem fuso
+    são interpretadas em ERP_TIMEZONE. `erp_atualizado_em` (UpdateDate do
+    documento) ordena as versões: uma versão mais antiga que a gravada é
+    ignorada. Peso total e volumes são calculados a partir dos itens.
+    """
+    numero_pedido: str = Field(..., min_length=1, max_length=50)
+    numero_nf: Optional[str] = Field(None, max_length=50)
+    erp_pedido_id: Optional[str] = Field(None, max_length=50)
+    erp_atualizado_em: Optional[datetime] = None
+    
+    data_pedido: datetime
+    data_faturamento: Optional[datetime] = None
+    data_prevista_entrega: Optional[datetime] = None
+    
+    cliente_id: Optional[UUID] = None
+    cliente_documento: Optional[str] = Field(None, description="CPF/CNPJ do cliente")
+    vendedor_id: Optional[UUID] = None
+    vendedor_documento: Optional[str] = Field(None, description="CPF/CNPJ do vendedor")
+    
+    regiao_entrega: Optional[str] = Field(None, max_length=100)
+    endereco_entrega: EnderecoEntregaImport
+    
+    tipo_frete: TipoFrete = TipoFrete.CIF
+    valor_frete: Decimal = Field(Decimal(0), ge=0)
+    valor_total: Decimal = Field(..., ge=0)
+    valor_produtos: Optional[Decimal] = Field(None, ge=0)
+    valor_descontos: Decimal = Field(Decimal(0), ge=0)
+    cubagem_m3: Optional[Decimal] = Field(None, ge=0)
+    
+    itens: List[ItemPedidoImport] = Field(default_factory=list, max_length=2000)
+    
+    observacoes: Optional[str] = None
+    observacoes_entrega: Optional[str] = None
+    urgente: bool = False
+    prioridade: int = Field(0, ge=0, le=2)
+    cancelado: bool = Field(False, description="Pedido/NF cancelado no ERP")
+    
+    @field_validator('data_pedido', 'data_faturamento', 'data_prevista_entrega', 'erp_atualizado_em')
+    @classmethod
+    def local_timezone(cls, v: Optional[datetime]) -> Optional[datetime]:
+        """Datas sem fuso vêm no horário local do ERP"""
+        if v is not None and v.tzinfo is None:
+            return v.replace(tzinfo=ZoneInfo(settings.ERP_TIMEZONE))
+        return v
+    
+    @field_validator('cliente_documento', 'vendedor_documento')
+    @classmethod
+    def document_digits(cls, v: Optional[str]) -> Optional[str]:
+        """CPF/CNPJ só com dígitos"""
+        if v is None:
+            return None
+        digits = digits_only(v)
+        if len(digits) not in (11, 14):
+            raise ValueError('CPF/CNPJ deve ter 11 ou 14 dígitos')
+        return digits
+    
+    @model_validator(mode='after')
+    def require_customer(self) -> 'PedidoImport':
+        """Cliente é obrigatório (id ou documento)"""
+        if self.cliente_id is None and self.cliente_documento is None:
+            raise ValueError('Informe cliente_id ou cliente_documento')
+        return self
+
+
+class PedidoImportResponse(ImportResponse):
+    """Resultado da carga de pedidos do ERP"""
+    erp_high_water: Optional[datetime] = None  # marca d'água desta carga (abaixo das linhas que falharam)
+
+
+class ErpSyncResponse(BaseModel):
+    """Estado da sincronização de uma fonte do ERP"""
+    fonte: str
+    ultima_alteracao_erp: Optional[datetime] = None
+    ultima_execucao: datetime
+    total: int
+    criados: int
+    atualizados: int
+    ignorados: int
+    invalidos: int
+    erros: int
+    duracao_segundos: float
+    linhas_por_segundo: float
+    
+    class Config:
+        from_attributes = True
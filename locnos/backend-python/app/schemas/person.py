@@ -198,6 +198,9 @@ class PersonUpdate(BaseModel):
 class PersonResponse(PersonBase):
     """Schema para resposta de Person"""
     id: UUID
+    
+    # Já validado na escrita; revalidar EmailStr na saída custa ~0,5ms por linha
+    email: Optional[str] = None
     status: str
     active: bool
     
@@ -207,6 +210,10 @@ class PersonResponse(PersonBase):
     total_rentals: int
     total_spent: Decimal
     
+    # Coordenadas do endereço (preenchidas pelo job de geocodificação)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    
     # Approval
     approved_by_id: Optional[UUID]
     approved_at: Optional[datetime]
@@ -229,3 +236,69 @@ class PersonListResponse(BaseModel):
     page: int
     per_page: int
     pages: int
+
+
+# ============================================================================
+# Deduplicação
+# ============================================================================
+
+class PersonDuplicateResponse(BaseModel):
+    """Par de cadastros possivelmente duplicados"""
+    id: UUID
+    score: float
+    reasons: List[str]
+    status: str
+    detected_at: datetime
+    reviewed_at: Optional[datetime] = None
+    person_a: PersonResponse
+    person_b: PersonResponse
+    
+    class Config:
+        from_attributes = True
+
+
+class PersonDuplicateListResponse(BaseModel):
+    """Fila de revisão paginada"""
+    items: List[PersonDuplicateResponse]
+    total: int
+    page: int
+    per_page: int
+    pages: int
+
+
+class PersonMergeRequest(BaseModel):
+    """Mescla: `source_ids` passam a apontar para `target_id`"""
+    target_id: UUID
+    source_ids: List[UUID] = Field(..., min_length=1, max_length=20)
+
+
+class PersonMergeResponse(BaseModel):
+    """Resultado da mescla"""
+    target: PersonResponse
+    merged: List[UUID]
+    repointed: Dict[str, int]  # "tabela.coluna" -> linhas reapontadas
+
+
+# ============================================================================
+# Crédito
+# ============================================================================
+
+class PersonExposureResponse(BaseModel):
+    """Exposição de crédito do cliente (contratos em aberto x limite)"""
+    person_id: UUID
+    display_name: str
+    credit_limit: Optional[Decimal] = None  # None = sem limite definido
+    open_exposure: Decimal
+    open_contracts: int
+    available_credit: Optional[Decimal] = None
+    over_limit: bool
+    defaulter: bool
+
+
+class PersonExposureListResponse(BaseModel):
+    """Relatório paginado de clientes acima do limite"""
+    items: List[PersonExposureResponse]
+    total: int
+    page: int
+    per_page: int
+    pages: int
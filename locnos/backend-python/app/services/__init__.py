@@ -0,0 +1 @@
+# Serviços de domínio reutilizados pelos routers
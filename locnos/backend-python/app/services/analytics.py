@@ -0,0 +1,273 @@
+"""
+Relatório de utilização e receita dos equipamentos a partir do histórico de
+contratos.
+
+Uma consulta traz os itens locados que cruzam a janela; a ocupação diária é
+montada com NumPy em uma matriz equipamento x dia (vetores de diferença +
+cumsum, sem laço por dia) e agregada por mês e por categoria.
+
+- Ocupação: contratos ATIVO e FINALIZADO (reservas não contam), do início até
+  o fim previsto ou, em atraso, até a devolução (finalizados) ou hoje (ativos)
+- Capacidade: quantity_total a partir da aquisição (ou cadastro)
+- Receita: diária do item x quantidade, por dia locado dentro da janela
+- Dias ociosos: dias em que o equipamento existia e nenhuma unidade saiu
+"""
+
+from datetime import date
+from typing import List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import case, cast, func, Date
+from sqlalchemy.orm import Session
+
+from app.models import Category, Contract, ContractItem, ContractStatus, Equipment
+
+
+MAX_WINDOW_DAYS = 3 * 366
+
+RENTED_STATUSES = (ContractStatus.ATIVO, ContractStatus.FINALIZADO)
+
+EQUIPMENT_SORTS = ("idle", "utilization", "revenue")
+
+
+def _rate(occupied, capacity):
+    """Utilização em % (0 quando não há capacidade)"""
+    occupied = np.asarray(occupied, dtype=np.float64)
+    capacity = np.asarray(capacity, dtype=np.float64)
+    return np.round(np.divide(occupied * 100, capacity, out=np.zeros_like(occupied), where=capacity > 0), 2)
+
+
+def _totals(capacity, occupied, idle, revenue) -> dict:
+    return {
+        "capacity_unit_days": int(capacity),
+        "occupied_unit_days": int(occupied),
+        "idle_days": int(idle),
+        "utilization": float(_rate(occupied, capacity)),
+        "revenue": round(float(revenue), 2),
+    }
+
+
+def _monthly(labels, capacity, occupied, idle, revenue) -> List[dict]:
+    return [
+        {"month": label, **_totals(capacity[i], occupied[i], idle[i], revenue[i])}
+        for i, label in enumerate(labels)
+    ]
+
+
+def _rental_end():
+    """
+    Último dia ocupado: o fim previsto, estendido até a devolução nos
+    finalizados e até hoje nos ativos em atraso (devolução antecipada cobra o
+    período contratado, como no contrato ainda ativo)
+    """
+    return case(
+        (
+            (Contract.status == ContractStatus.FINALIZADO) & Contract.finished_at.isnot(None),
+            func.greatest(Contract.end_date, cast(Contract.finished_at, Date))
+        ),
+        (Contract.status == ContractStatus.ATIVO, func.greatest(Contract.end_date, func.current_date())),
+        else_=Contract.end_date
+    )
+
+
+def utilization_report(
+    db: Session,
+    start: date,
+    end: date,
+    category_ids: Optional[Sequence[UUID]] = None,
+    top: int = 50,
+    sort: str = "idle",
+) -> dict:
+    """
+    Utilização, dias ociosos e receita por mês, por categoria e por
+    equipamento (os `top` primeiros segundo `sort`) entre `start` e `end`.
+    """
+    equipment_query = db.query(
+        Equipment.id,
+        Equipment.name,
+        Equipment.internal_code,
+        Equipment.category_id,
+        Equipment.quantity_total,
+        cast(func.coalesce(Equipment.acquisition_date, Equipment.created_at), Date),
+    )
+    rental_end = _rental_end()
+    rental_query = (
+        db.query(
+            ContractItem.equipment_id,
+            Contract.start_date,
+            rental_end,
+            ContractItem.quantity,
+            ContractItem.daily_rate,
+        )
+        .join(Contract, Contract.id == ContractItem.contract_id)
+        .filter(
+            Contract.status.in_(RENTED_STATUSES),
+            Contract.deleted_at.is_(None),
+            Contract.start_date <= end,
+            rental_end >= start,
+        )
+    )
+    if category_ids:
+        equipment_query = equipment_query.filter(Equipment.category_id.in_(category_ids))
+        rental_query = (
+            rental_query
+            .join(Equipment, Equipment.id == ContractItem.equipment_id)
+            .filter(Equipment.category_id.in_(category_ids))
+        )
+
+    equipments = equipment_query.all()
+    rentals = rental_query.all()
+    categories = {row[3] for row in equipments}
+    category_names = dict(
+        db.query(Category.id, Category.name).filter(Category.id.in_(categories)).all()
+    ) if categories else {}
+
+    return build_report(equipments, rentals, category_names, start, end, top=top, sort=sort)
+
+
+def build_report(
+    equipments: Sequence[tuple],
+    rentals: Sequence[tuple],
+    category_names: dict,
+    start: date,
+    end: date,
+    top: int = 50,
+    sort: str = "idle",
+) -> dict:
+    """
+    Cálculo do relatório (sem banco).
+    equipments: (id, name, internal_code, category_id, quantity_total, owned_since)
+    rentals: (equipment_id, start_date, end_date, quantity, daily_rate)
+    """
+    n_days = (end - start).days + 1
+
+    ids = [row[0] for row in equipments]
+    index = {equipment_id: i for i, equipment_id in enumerate(ids)}
+    n_equipment = len(ids)
+
+    window_start = np.datetime64(start, "D")
+    days = window_start + np.arange(n_days)
+
+    # Categorias
+    category_of = [row[3] for row in equipments]
+    categories = list(dict.fromkeys(category_of))
+    category_index = {category_id: i for i, category_id in enumerate(categories)}
+    category_row = np.fromiter((category_index[c] for c in category_of), dtype=np.intp, count=n_equipment)
+    n_categories = len(categories)
+
+    # Capacidade (unidades por dia) a partir da data de posse
+    quantity_total = np.fromiter((max(row[4] or 0, 0) for row in equipments), dtype=np.int32, count=n_equipment)
+    owned_since = np.array([row[5] or start for row in equipments], dtype="datetime64[D]").reshape(-1)
+    owned_offset = np.clip((owned_since - window_start).astype(np.int64), 0, n_days)
+    capacity = np.where(np.arange(n_days)[None, :] >= owned_offset[:, None], quantity_total[:, None], 0).astype(np.int32)
+
+    # Itens locados -> intervalos [s, e) em dias da janela
+    rentals = [row for row in rentals if row[0] in index]
+    n_rentals = len(rentals)
+    rental_row = np.fromiter((index[row[0]] for row in rentals), dtype=np.intp, count=n_rentals)
+    rental_start = np.array([row[1] for row in rentals], dtype="datetime64[D]").reshape(-1)
+    rental_stop = np.array([row[2] for row in rentals], dtype="datetime64[D]").reshape(-1)
+    s = np.clip((rental_start - window_start).astype(np.int64), 0, n_days)
+    e = np.maximum(np.clip((rental_stop - window_start).astype(np.int64) + 1, 0, n_days), s)
+    quantity = np.fromiter((row[3] or 0 for row in rentals), dtype=np.int32, count=n_rentals)
+    daily_amount = np.fromiter((float(row[4] or 0) for row in rentals), dtype=np.float64, count=n_rentals) * quantity
+
+    # Ocupação: +qtd no primeiro dia, -qtd após o último, soma acumulada
+    diff = np.zeros((n_equipment, n_days + 1), dtype=np.int32)
+    np.add.at(diff, (rental_row, s), quantity)
+    np.add.at(diff, (rental_row, e), -quantity)
+    occupied = np.cumsum(diff[:, :-1], axis=1, dtype=np.int32)
+    del diff
+    idle = (occupied == 0) & (capacity > 0)
+    np.minimum(occupied, capacity, out=occupied)  # sobreposição de contratos não passa de 100%
+
+    # Receita diária por categoria (a matriz por equipamento não é necessária)
+    revenue_diff = np.zeros((n_categories, n_days + 1), dtype=np.float64)
+    np.add.at(revenue_diff, (category_row[rental_row], s), daily_amount)
+    np.add.at(revenue_diff, (category_row[rental_row], e), -daily_amount)
+    category_daily_revenue = np.cumsum(revenue_diff[:, :-1], axis=1)
+    equipment_revenue = np.bincount(rental_row, weights=daily_amount * np.maximum(e - s, 0), minlength=n_equipment)
+
+    # Dias -> meses
+    months = days.astype("datetime64[M]")
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    month_labels = [str(month) for month in months[month_starts]]
+
+    def by_month(matrix):
+        if matrix.shape[0] == 0:
+            return np.zeros((0, len(month_starts)), dtype=np.int64)
+        return np.add.reduceat(matrix, month_starts, axis=1, dtype=np.int64 if matrix.dtype != np.float64 else np.float64)
+
+    equipment_month_capacity = by_month(capacity)
+    equipment_month_occupied = by_month(occupied)
+    equipment_month_idle = by_month(idle)
+    category_month_revenue = by_month(category_daily_revenue)
+
+    def per_category(matrix):
+        result = np.zeros((n_categories, matrix.shape[1]), dtype=matrix.dtype)
+        np.add.at(result, category_row, matrix)
+        return result
+
+    category_month_capacity = per_category(equipment_month_capacity)
+    category_month_occupied = per_category(equipment_month_occupied)
+    category_month_idle = per_category(equipment_month_idle)
+
+    equipment_count = np.bincount(category_row, minlength=n_categories)
+
+    category_items = []
+    for i, category_id in enumerate(categories):
+        category_items.append({
+            "category_id": category_id,
+            "name": category_names.get(category_id),
+            "equipment_count": int(equipment_count[i]),
+            **_totals(
+                category_month_capacity[i].sum(), category_month_occupied[i].sum(),
+                category_month_idle[i].sum(), category_month_revenue[i].sum()
+            ),
+            "months": _monthly(
+                month_labels, category_month_capacity[i], category_month_occupied[i],
+                category_month_idle[i], category_month_revenue[i]
+            ),
+        })
+    category_items.sort(key=lambda item: -item["revenue"])
+
+    # Por equipamento: só os `top` primeiros (10k linhas não cabem em um relatório)
+    equipment_capacity = equipment_month_capacity.sum(axis=1)
+    equipment_occupied = equipment_month_occupied.sum(axis=1)
+    equipment_idle = equipment_month_idle.sum(axis=1)
+    equipment_utilization = _rate(equipment_occupied, equipment_capacity)
+    order_key = {
+        "idle": -equipment_idle,
+        "utilization": -equipment_utilization,
+        "revenue": -equipment_revenue,
+    }[sort]
+    selected = np.argsort(order_key, kind="stable")[:top]
+
+    equipment_items = [
+        {
+            "equipment_id": ids[i],
+            "name": equipments[i][1],
+            "internal_code": equipments[i][2],
+            "category_id": equipments[i][3],
+            **_totals(equipment_capacity[i], equipment_occupied[i], equipment_idle[i], equipment_revenue[i]),
+        }
+        for i in selected
+    ]
+
+    month_capacity = category_month_capacity.sum(axis=0)
+    month_occupied = category_month_occupied.sum(axis=0)
+    month_idle = category_month_idle.sum(axis=0)
+    month_revenue = category_month_revenue.sum(axis=0) if n_categories else np.zeros(len(month_starts))
+
+    return {
+        "start": start,
+        "end": end,
+        "days": n_days,
+        "equipment_count": n_equipment,
+        "rental_count": n_rentals,
+        "summary": _totals(month_capacity.sum(), month_occupied.sum(), month_idle.sum(), month_revenue.sum()),
+        "months": _monthly(month_labels, month_capacity, month_occupied, month_idle, month_revenue),
+        "categories": category_items,
+        "equipment": equipment_items,
+    }
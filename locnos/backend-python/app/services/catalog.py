@@ -0,0 +1,92 @@
+"""
+Filtros do catálogo de equipamentos.
+
+Compartilhados pela listagem/facetas (GET /equipment), pelas etiquetas
+(GET /equipment/labels) e pelo CLI de impressão (python -m app.print_labels).
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_, func, case, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from app.core.search import ts_query
+from app.models.equipment import Equipment, EquipmentStatus
+from app.services.category_tree import get_category_tree
+
+
+def search_terms(search: Optional[str]):
+    """
+    Condição e ranking da busca textual.
+    GIN(searchVector) + GIN trigram nos códigos (sem seq scan).
+    """
+    tsquery = ts_query(search)
+    code_pattern = f"%{search}%"
+    condition = or_(
+        Equipment.search_vector.op("@@")(tsquery),
+        Equipment.internal_code.ilike(code_pattern),
+        Equipment.barcode.ilike(code_pattern)
+    )
+    # Match no código interno sobe para o topo
+    rank = func.ts_rank(Equipment.search_vector, tsquery) + case(
+        (Equipment.internal_code.ilike(code_pattern), 1.0), else_=0.0
+    )
+    return condition, rank, tsquery
+
+
+def descendant_category_ids(db: Session, category_id: Optional[UUID]) -> Optional[Tuple[UUID, ...]]:
+    """Categoria filtrada e todas as descendentes (snapshot da árvore em memória)"""
+    if not category_id:
+        return None
+    return get_category_tree(db).category_ids(category_id)
+
+
+def catalog_filters(
+    search: Optional[str],
+    category_ids: Optional[Sequence[UUID]],
+    status: Optional[EquipmentStatus],
+    brand: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    available_only: bool,
+    visible_only: bool = True
+) -> Dict[str, list]:
+    """
+    Condições do catálogo agrupadas por faceta.
+    "base" vale sempre; as demais são ignoradas ao contar a própria faceta.
+    """
+    filters = {"base": [], "category": [], "status": [], "brand": [], "price": []}
+    
+    if visible_only:
+        filters["base"].append(Equipment.visible == True)
+    
+    if search:
+        filters["base"].append(search_terms(search)[0])
+    
+    if available_only:
+        filters["base"] += [
+            Equipment.status == EquipmentStatus.AVAILABLE,
+            Equipment.quantity_available > 0
+        ]
+    
+    if category_ids:
+        # Um único parâmetro array: o texto do SQL não muda com a profundidade da árvore
+        filters["category"].append(
+            Equipment.category_id == any_(bindparam("category_ids", list(category_ids), type_=ARRAY(PG_UUID(as_uuid=True))))
+        )
+    
+    if status:
+        filters["status"].append(Equipment.status == status)
+    
+    if brand:
+        filters["brand"].append(Equipment.brand == brand)
+    
+    if min_price:
+        filters["price"].append(Equipment.daily_rate >= min_price)
+    
+    if max_price:
+        filters["price"].append(Equipment.daily_rate <= max_price)
+    
+    return filters
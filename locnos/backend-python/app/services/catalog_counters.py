@@ -0,0 +1,84 @@
+"""
+Contadores de equipamentos por categoria e subcategoria.
+
+Category.total_equipment e Subcategoria.total_equipamentos contam os
+equipamentos visíveis e são mantidos pelos triggers de equipamentos
+(EQUIPMENT_COUNTER_STATEMENTS em app/models/equipment.py). A reconciliação
+recalcula a partir da tabela de equipamentos em uma passada set-based.
+"""
+
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import invalidate_catalog
+from app.models import Category, Equipment, Subcategoria
+
+
+def _expected_counts(model, counter, key, label: str):
+    """Subquery com as linhas cujo contador diverge da contagem real"""
+    counts = (
+        select(key.label("id"), func.count().label("total"))
+        .where(Equipment.visible == True, key.isnot(None))
+        .group_by(key)
+        .subquery()
+    )
+    expected = func.coalesce(counts.c.total, 0)
+
+    return (
+        select(
+            model.id.label("id"),
+            label.label("name"),
+            counter.label("current"),
+            expected.label("expected"),
+        )
+        .outerjoin(counts, counts.c.id == model.id)
+        .where(counter.is_distinct_from(expected))
+        .subquery()
+    )
+
+
+def reconcile_catalog_counters(db: Session, fix: bool = False) -> dict:
+    """
+    Confere os contadores de categorias e subcategorias.
+    Com fix=True cada tabela é corrigida com um único UPDATE ... FROM (subquery)
+    e as listagens de subcategorias em cache são invalidadas (a árvore de
+    categorias se reconstrói pelo updatedAt que o UPDATE renova).
+
+    Returns:
+        dict: {"categorias": [...], "subcategorias": [...], "fixed": bool}
+    """
+    targets = {
+        "categorias": (
+            Category, "total_equipment",
+            _expected_counts(Category, Category.total_equipment, Equipment.category_id, Category.name),
+        ),
+        "subcategorias": (
+            Subcategoria, "total_equipamentos",
+            _expected_counts(Subcategoria, Subcategoria.total_equipamentos, Equipment.subcategory_id, Subcategoria.nome),
+        ),
+    }
+
+    report = {
+        table: [
+            {"id": row.id, "name": row.name, "drift": {field: [row.current, row.expected]}}
+            for row in db.execute(select(drift))
+        ]
+        for table, (_, field, drift) in targets.items()
+    }
+    report["fixed"] = False
+
+    if fix:
+        for table, (model, field, drift) in targets.items():
+            if report[table]:
+                db.execute(
+                    update(model)
+                    .where(model.id == drift.c.id)
+                    .values({field: drift.c.expected})
+                    .execution_options(synchronize_session=False)
+                )
+        db.commit()
+        if report["categorias"] or report["subcategorias"]:
+            invalidate_catalog("subcategorias")
+        report["fixed"] = True
+
+    return report
@@ -0,0 +1,180 @@
+"""
+Árvore de categorias em memória (Categoria > filhas > Subcategoria).
+
+Um snapshot imutável por worker, com:
+- a árvore de categorias ativas já serializada (GET /categories/tree)
+- categoria -> ids dela e de todas as descendentes (filtro do catálogo com
+  `categoryId = ANY(:ids)`, sem consulta recursiva por request)
+
+O snapshot é reconstruído quando o carimbo de versão muda. O carimbo
+(contagem + maior updatedAt de categorias e subcategorias) é conferido no
+banco no máximo a cada CATEGORY_TREE_CHECK_SECONDS; escritas feitas neste
+worker descartam o snapshot na hora (invalidate_category_tree).
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from uuid import UUID
+import hashlib
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import invalidate_equipment, make_body_etag, CachedResponse
+from app.core.config import settings
+from app.models.category import Category
+from app.models.subcategoria import Subcategoria
+from app.schemas.category import CategoryTreeNode, CategoryTreeResponse, SubcategoriaResumo
+
+
+@dataclass(frozen=True)
+class CategoryTree:
+    """Snapshot imutável da hierarquia"""
+    version: str
+    parents: Mapping[UUID, Optional[UUID]]
+    descendants: Mapping[UUID, Tuple[UUID, ...]]
+    subcategorias: Mapping[UUID, Tuple[UUID, ...]]
+    response: CachedResponse
+
+    def category_ids(self, category_id: UUID) -> Tuple[UUID, ...]:
+        """A categoria e todas as descendentes (ela mesma se for desconhecida)"""
+        return self.descendants.get(category_id, (category_id,))
+
+    def subcategoria_ids(self, category_id: UUID) -> Tuple[UUID, ...]:
+        """Subcategorias da categoria e das descendentes"""
+        return tuple(
+            subcategoria_id
+            for descendant in self.category_ids(category_id)
+            for subcategoria_id in self.subcategorias.get(descendant, ())
+        )
+
+
+def _version_stamp(db: Session) -> str:
+    """Carimbo barato: muda em qualquer inserção, alteração ou exclusão"""
+    stamp = db.execute(select(
+        select(func.count()).select_from(Category).scalar_subquery(),
+        select(func.max(Category.updated_at)).scalar_subquery(),
+        select(func.count()).select_from(Subcategoria).scalar_subquery(),
+        select(func.max(Subcategoria.atualizado_em)).scalar_subquery(),
+    )).one()
+    return hashlib.sha1(repr(tuple(stamp)).encode()).hexdigest()[:16]
+
+
+def _build(db: Session, version: str) -> CategoryTree:
+    categories = db.query(Category).order_by(Category.order, Category.name).all()
+    subcategorias = db.query(Subcategoria).order_by(Subcategoria.ordem, Subcategoria.nome).all()
+
+    known = {category.id for category in categories}
+    parents = {
+        category.id: category.parent_id if category.parent_id in known else None
+        for category in categories
+    }
+    children = defaultdict(list)
+    for category in categories:
+        if parents[category.id] is not None:
+            children[parents[category.id]].append(category)
+
+    subcategorias_by_category = defaultdict(list)
+    for subcategoria in subcategorias:
+        subcategorias_by_category[subcategoria.categoria_id].append(subcategoria)
+
+    # Descendentes de cada categoria (iterativo e à prova de ciclos no parentId)
+    descendants: Dict[UUID, Tuple[UUID, ...]] = {}
+    for category in categories:
+        seen = [category.id]
+        visited = {category.id}
+        stack = [category.id]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child.id not in visited:
+                    visited.add(child.id)
+                    seen.append(child.id)
+                    stack.append(child.id)
+        descendants[category.id] = tuple(seen)
+
+    # Árvore pública: só ativas (uma categoria inativa esconde o ramo)
+    def node(category: Category, path: frozenset) -> CategoryTreeNode:
+        return CategoryTreeNode(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            description=category.description,
+            icon=category.icon,
+            image=category.image,
+            order=category.order or 0,
+            total_equipment=category.total_equipment or 0,
+            subcategorias=[
+                SubcategoriaResumo(
+                    id=subcategoria.id,
+                    nome=subcategoria.nome,
+                    slug=subcategoria.slug,
+                    icone=subcategoria.icone,
+                    ordem=subcategoria.ordem or 0,
+                    total_equipamentos=subcategoria.total_equipamentos or 0,
+                )
+                for subcategoria in subcategorias_by_category.get(category.id, ())
+                if subcategoria.ativo
+            ],
+            children=[
+                node(child, path | {child.id})
+                for child in children.get(category.id, ())
+                if child.active and child.id not in path
+            ],
+        )
+
+    roots = [category for category in categories if parents[category.id] is None and category.active]
+    body = CategoryTreeResponse(
+        version=version,
+        items=[node(category, frozenset({category.id})) for category in roots]
+    ).model_dump_json().encode()
+
+    return CategoryTree(
+        version=version,
+        parents=MappingProxyType(parents),
+        descendants=MappingProxyType(descendants),
+        subcategorias=MappingProxyType({
+            category_id: tuple(subcategoria.id for subcategoria in items)
+            for category_id, items in subcategorias_by_category.items()
+        }),
+        response=CachedResponse(body=body, etag=make_body_etag(body)),
+    )
+
+
+_snapshot: Optional[CategoryTree] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_category_tree(db: Session) -> CategoryTree:
+    """Snapshot atual (confere o carimbo no banco no máximo a cada N segundos)"""
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _checked_at < settings.CATEGORY_TREE_CHECK_SECONDS:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and _snapshot is not snapshot:
+            return _snapshot  # outra thread acabou de reconstruir
+
+        version = _version_stamp(db)
+        if _snapshot is None or _snapshot.version != version:
+            changed = _snapshot is not None
+            _snapshot = _build(db, version)
+            if changed:
+                # Hierarquia ou contadores mudaram em outro worker: listagens
+                # filtradas por categoria e totais das subcategorias
+                invalidate_equipment()
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def invalidate_category_tree() -> None:
+    """Descarta o snapshot (chamar após escrever em categorias/subcategorias)"""
+    global _snapshot
+    with _lock:
+        _snapshot = None
@@ -0,0 +1,333 @@
+"""
+Eventos de alteração em tempo real (Server-Sent Events).
+
+Triggers em pedidos, rotas e contratos chamam pg_notify no canal CHANNEL
+quando um campo observado muda (status do pedido, progresso da rota,
+transição do contrato). A notificação só sai no COMMIT e vale para
+qualquer escritor: API, jobs e integrações com o ERP.
+
+Cada worker mantém uma única conexão LISTEN, aberta no startup (ou no
+primeiro assinante) e reaberta com backoff se cair, e distribui cada
+notificação às conexões SSE inscritas no tópico e no tenant. Os eventos são
+avisos: o cliente busca de novo só o que mudou.
+
+Como todo worker recebe todas as notificações, elas também descartam o
+snapshot dos indicadores do dashboard de cada worker, inclusive quando a
+escrita veio de outro worker ou de um job.
+
+Backpressure: cada conexão tem uma fila limitada em eventos e em bytes.
+Um cliente lento que estoura o limite tem a fila descartada e recebe um
+único `resync` (buscar tudo de novo), sem segurar memória do worker nem
+atrasar os demais. Todos recebem `resync` depois de uma reconexão do
+LISTEN, porque as notificações do intervalo se perderam.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import random
+
+from sqlalchemy import DDL, event
+
+from app.core.config import settings
+from app.models import Contract, Pedido, Rota
+from app.services.dashboard_stats import invalidate_dashboard_stats
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "locnos_eventos"
+
+# Tópico -> (tabela, campos observados além do id)
+TOPICS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "pedidos": ("pedidos", ("status", "rota_id", "veiculo_id")),
+    "rotas": (
+        "rotas",
+        (
+            "status", "quantidade_pedidos", "quantidade_entregas_concluidas",
+            "quantidade_entregas_falhadas", "localizacao_atual",
+        ),
+    ),
+    "contratos": ("contratos", ("status", "customer_id", "deleted_at")),
+}
+
+_NOTIFY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION notificar_alteracao() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    campos text[] := ARRAY['id'] || string_to_array(TG_ARGV[1], ',');
+    antigo jsonb;
+    novo jsonb;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        SELECT jsonb_object_agg(key, value) INTO antigo FROM jsonb_each(to_jsonb(OLD)) WHERE key = ANY (campos);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        SELECT jsonb_object_agg(key, value) INTO novo FROM jsonb_each(to_jsonb(NEW)) WHERE key = ANY (campos);
+    END IF;
+    -- UPDATE sem mudança nos campos observados não gera evento
+    IF TG_OP = 'UPDATE' AND novo = antigo THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('{CHANNEL}', (
+        jsonb_build_object('topic', TG_ARGV[0], 'op', lower(TG_OP), 'schema', TG_TABLE_SCHEMA)
+        || coalesce(novo, antigo)
+    )::text);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def _notify_statements(topic: str) -> list:
+    table, fields = TOPICS[topic]
+    return [
+        _NOTIFY_FUNCTION,
+        f"DROP TRIGGER IF EXISTS {table}_eventos ON {table}",
+        f"CREATE TRIGGER {table}_eventos AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION notificar_alteracao('{topic}', '{','.join(fields)}')",
+    ]
+
+
+NOTIFY_STATEMENTS = [statement for topic in TOPICS for statement in _notify_statements(topic)]
+
+
+for _topic, _model in (("pedidos", Pedido), ("rotas", Rota), ("contratos", Contract)):
+    for _statement in _notify_statements(_topic):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+def tenant_for_schema(schema: str) -> str:
+    """Tenant de uma tabela (um schema por tenant; o public é o tenant padrão)"""
+    return settings.DEFAULT_TENANT if schema in (None, "public") else schema
+
+
+def tenant_for_user(user) -> str:
+    """Tenant do usuário (hoje todos os usuários pertencem ao tenant padrão)"""
+    return settings.DEFAULT_TENANT
+
+
+# ============================================================================
+# ASSINANTES
+# ============================================================================
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    id: int
+    topic: str
+    tenant: str
+    data: str  # JSON serializado uma vez para todos os assinantes
+
+
+# Marcador devolvido por Subscriber.get: descartar o estado local e buscar tudo de novo
+RESYNC = object()
+
+
+class TooManySubscribers(Exception):
+    """Limite de conexões SSE do worker atingido"""
+
+
+class Subscriber:
+    """Conexão SSE: fila limitada por quantidade e por bytes"""
+
+    def __init__(self, topics: Iterable[str], tenant: str, max_events: int, max_bytes: int):
+        self.topics: FrozenSet[str] = frozenset(topics)
+        self.tenant = tenant
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._queue: Deque[ChangeEvent] = deque()
+        self._bytes = 0
+        self._overflowed = False
+        self._wakeup = asyncio.Event()
+
+    def accepts(self, event: ChangeEvent) -> bool:
+        return event.topic in self.topics and event.tenant == self.tenant
+
+    def push(self, event: ChangeEvent) -> None:
+        if self._overflowed:
+            self.dropped += 1
+            return
+        if len(self._queue) >= self.max_events or self._bytes + len(event.data) > self.max_bytes:
+            self.dropped += len(self._queue) + 1
+            self.resync()
+            return
+        self._queue.append(event)
+        self._bytes += len(event.data)
+        self._wakeup.set()
+
+    def resync(self) -> None:
+        """Descarta o que está na fila: o cliente vai buscar tudo de novo"""
+        self._queue.clear()
+        self._bytes = 0
+        self._overflowed = True
+        self._wakeup.set()
+
+    async def get(self, timeout: float):
+        """Próximo evento, RESYNC, ou None se nada chegou em `timeout` segundos"""
+        while True:
+            if self._overflowed:
+                self._overflowed = False
+                return RESYNC
+            if self._queue:
+                event = self._queue.popleft()
+                self._bytes -= len(event.data)
+                return event
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+
+# ============================================================================
+# LISTEN / FAN-OUT
+# ============================================================================
+
+class EventBus:
+    """Uma conexão LISTEN por worker, distribuída entre os assinantes"""
+
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._sequence = 0
+        self.listening = False
+        self.received = 0
+        self.reconnects = 0
+
+    def subscribe(self, topics: Iterable[str], tenant: str) -> Subscriber:
+        if len(self._subscribers) >= settings.SSE_MAX_CONNECTIONS:
+            raise TooManySubscribers()
+        subscriber = Subscriber(topics, tenant, settings.SSE_QUEUE_MAX_EVENTS, settings.SSE_QUEUE_MAX_BYTES)
+        self._subscribers.add(subscriber)
+        self.start()
+        return subscriber
+
+    def start(self) -> None:
+        """Abre o LISTEN deste worker, se ainda não estiver aberto"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen_forever())
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "subscribers": len(self._subscribers),
+            "received": self.received,
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers),
+            "reconnects": self.reconnects,
+        }
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _connect():
+        """Conexão dedicada (fora do pool), em autocommit, com keepalive TCP para detectar queda"""
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        from app.core.database import engine
+
+        connection = psycopg2.connect(
+            engine.url.set(drivername="postgresql").render_as_string(hide_password=False),
+            keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+        )
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    async def _listen_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        connected_before = False
+
+        while True:
+            try:
+                connection = await asyncio.to_thread(self._connect)
+            except Exception as e:
+                delay = min(self.RECONNECT_MAX_SECONDS, 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"LISTEN {CHANNEL} indisponível, nova tentativa em {delay:.1f}s: {e}")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            lost = asyncio.Event()
+            fileno = connection.fileno()
+            loop.add_reader(fileno, self._on_readable, connection, lost)
+            self.listening = True
+            if connected_before:
+                # Notificações do intervalo sem LISTEN se perderam
+                self.reconnects += 1
+                invalidate_dashboard_stats()
+                for subscriber in list(self._subscribers):
+                    subscriber.resync()
+            connected_before = True
+
+            try:
+                await lost.wait()
+                logger.warning(f"Conexão LISTEN {CHANNEL} perdida, reconectando")
+            finally:
+                self.listening = False
+                loop.remove_reader(fileno)
+                connection.close()
+
+    def _on_readable(self, connection, lost: asyncio.Event) -> None:
+        import psycopg2
+
+        try:
+            connection.poll()
+        except psycopg2.Error:
+            lost.set()
+            return
+        while connection.notifies:
+            self._dispatch(connection.notifies.pop(0).payload)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            topic = data.pop("topic")
+            tenant = tenant_for_schema(data.pop("schema", None))
+        except (ValueError, KeyError, AttributeError):
+            logger.warning(f"Notificação inválida em {CHANNEL}: {payload[:200]}")
+            return
+        # Enums chegam pelo nome (EM_ROTA); a API usa o valor (em_rota)
+        if isinstance(data.get("status"), str):
+            data["status"] = data["status"].lower()
+
+        self.received += 1
+        self._sequence += 1
+        invalidate_dashboard_stats()
+        event = ChangeEvent(self._sequence, topic, tenant, json.dumps(data, separators=(",", ":")))
+        for subscriber in list(self._subscribers):
+            if subscriber.accepts(event):
+                subscriber.push(event)
+
+
+# Instância global (uma por worker)
+event_bus = EventBus()
+
+
+def format_sse(event: str, data: str, event_id: Optional[int] = None) -> bytes:
+    """Mensagem no formato text/event-stream"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
@@ -0,0 +1,100 @@
+"""
+Serviço de eventos de contrato (log append-only + linha do tempo)
+"""
+
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import tuple_
+from typing import Optional, List, Tuple
+from datetime import datetime
+from uuid import UUID
+import base64
+
+from app.models import Contract, ContractStatus, ContractEvent, ContractEventType, User
+
+
+def record_contract_event(
+    db: Session,
+    contract: Contract,
+    event_type: ContractEventType,
+    actor: Optional[User] = None,
+    from_status: Optional[ContractStatus] = None,
+    to_status: Optional[ContractStatus] = None,
+    payload: Optional[dict] = None,
+) -> ContractEvent:
+    """
+    Adiciona um evento à sessão atual.
+
+    Não faz commit: o evento é persistido junto com a alteração do contrato,
+    na mesma transação do endpoint que o chamou.
+    """
+    event = ContractEvent(
+        contract=contract,
+        event_type=event_type,
+        from_status=from_status,
+        to_status=to_status,
+        actor_id=actor.id if actor else None,
+        payload=payload or {},
+    )
+    db.add(event)
+    return event
+
+
+def encode_cursor(event: ContractEvent) -> str:
+    """Cursor opaco com a posição (created_at, id) do último evento da página"""
+    raw = f"{event.created_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    Raises:
+        ValueError: se o cursor estiver malformado
+    """
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    created_at, event_id = raw.split("|", 1)
+    return datetime.fromisoformat(created_at), UUID(event_id)
+
+
+def list_contract_events(
+    db: Session,
+    contract_id: UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    event_type: Optional[ContractEventType] = None,
+) -> Tuple[List[ContractEvent], Optional[str]]:
+    """
+    Lista a linha do tempo do contrato, do mais recente para o mais antigo.
+
+    Paginação por keyset: cada página continua a partir de (created_at, id)
+    do último item, usando o índice ix_contract_events_timeline sem OFFSET.
+
+    Returns:
+        tuple: (eventos, cursor da próxima página ou None)
+    """
+    query = db.query(ContractEvent).options(
+        joinedload(ContractEvent.actor)
+    ).filter(ContractEvent.contract_id == contract_id)
+
+    if event_type:
+        query = query.filter(ContractEvent.event_type == event_type)
+
+    if cursor:
+        created_at, event_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(ContractEvent.created_at, ContractEvent.id) < tuple_(created_at, event_id)
+        )
+
+    # Busca um item a mais para saber se existe próxima página
+    events = query.order_by(
+        ContractEvent.created_at.desc(),
+        ContractEvent.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1])
+
+    return events, next_cursor
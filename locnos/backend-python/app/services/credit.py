@@ -0,0 +1,222 @@
+"""
+Exposição de crédito dos clientes.
+
+Person.open_exposure / open_contracts guardam o valor e a quantidade dos
+contratos em aberto (aguardando aprovação, aprovados e ativos). São
+atualizados de forma incremental nas transições de status e na edição de
+contratos em aberto (`col = col + :delta`, na mesma transação), então a
+checagem de crédito é O(1): limite x exposição já somada.
+
+A entrada em aberto (rascunho -> aguardando aprovação) usa um UPDATE
+condicional: o saldo só é somado se couber no limite, sem corrida entre
+dois pedidos simultâneos do mesmo cliente. A reconciliação recalcula tudo
+a partir dos contratos em uma passada set-based.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, not_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Contract, ContractStatus, Person
+
+
+OPEN_STATUSES = (
+    ContractStatus.AGUARDANDO_APROVACAO,
+    ContractStatus.APROVADO,
+    ContractStatus.ATIVO,
+)
+
+
+class CreditDenied(Exception):
+    """Cliente inadimplente ou sem limite disponível"""
+
+
+@dataclass
+class CreditCheck:
+    """Resultado da checagem (limite None = sem limite definido)"""
+    approved: bool
+    credit_limit: Optional[Decimal]
+    open_exposure: Decimal
+    requested: Decimal
+    reason: Optional[str] = None
+
+    @property
+    def available(self) -> Optional[Decimal]:
+        if self.credit_limit is None:
+            return None
+        return self.credit_limit - self.open_exposure
+
+
+def _limit(person: Person) -> Optional[Decimal]:
+    """Limite 0/NULL = sem limite definido (cadastros antigos)"""
+    limit = person.credit_limit or Decimal(0)
+    return limit if limit > 0 else None
+
+
+def check_credit(person: Person, amount: Decimal) -> CreditCheck:
+    """Checagem O(1) com a exposição já mantida no cadastro (não grava nada)"""
+    amount = Decimal(amount or 0)
+    exposure = person.open_exposure or Decimal(0)
+    limit = _limit(person)
+
+    reason = None
+    if person.defaulter:
+        reason = "Cliente inadimplente"
+    elif limit is not None and exposure + amount > limit:
+        reason = (
+            f"Limite de crédito excedido: limite R$ {limit:.2f}, em aberto R$ {exposure:.2f}, "
+            f"solicitado R$ {amount:.2f}"
+        )
+    return CreditCheck(reason is None, limit, exposure, amount, reason)
+
+
+def exposure_delta(old_status: ContractStatus, new_status: ContractStatus) -> int:
+    """+1 ao entrar em aberto, -1 ao sair, 0 se não mudou de situação"""
+    return int(new_status in OPEN_STATUSES) - int(old_status in OPEN_STATUSES)
+
+
+def apply_exposure(
+    db: Session,
+    customer_id: UUID,
+    amount: Decimal,
+    contracts: int = 0,
+    enforce_limit: bool = False,
+) -> bool:
+    """
+    Soma `amount` (e `contracts`) à exposição do cliente.
+
+    Com enforce_limit=True o UPDATE só acontece se o cliente não estiver
+    inadimplente e o novo saldo couber no limite. Não faz commit.
+
+    Returns:
+        bool: False se o limite barrou a atualização
+    """
+    exposure = func.coalesce(Person.open_exposure, 0) + amount
+    conditions = [Person.id == customer_id]
+    if enforce_limit:
+        conditions.append(not_(Person.defaulter))
+        conditions.append(or_(
+            func.coalesce(Person.credit_limit, 0) <= 0,
+            exposure <= Person.credit_limit,
+        ))
+
+    result = db.execute(
+        update(Person)
+        .where(*conditions)
+        .values(
+            open_exposure=exposure,
+            open_contracts=func.coalesce(Person.open_contracts, 0) + contracts,
+            version=Person.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def apply_contract_exposure(
+    db: Session,
+    contract: Contract,
+    old_status: ContractStatus,
+    new_status: ContractStatus,
+) -> None:
+    """
+    Aplica à exposição a transição de status do contrato.
+    Entrar em aberto respeita o limite (CreditDenied); sair sempre libera.
+    """
+    delta = exposure_delta(old_status, new_status)
+    if not delta:
+        return
+
+    amount = (contract.total_value or Decimal(0)) * delta
+    if not apply_exposure(db, contract.customer_id, amount, delta, enforce_limit=delta > 0):
+        customer = db.get(Person, contract.customer_id)
+        db.refresh(customer)
+        raise CreditDenied(
+            check_credit(customer, contract.total_value).reason or "Limite de crédito excedido"
+        )
+
+
+def over_limit_query(db: Session):
+    """Clientes com exposição acima do limite (índice parcial ix_pessoas_over_limit)"""
+    excess = Person.open_exposure - Person.credit_limit
+    return (
+        db.query(Person)
+        .filter(Person.credit_limit > 0, Person.open_exposure > Person.credit_limit)
+        .order_by(excess.desc())
+    )
+
+
+# ============================================================================
+# RECONCILIAÇÃO
+# ============================================================================
+
+def _expected_exposure():
+    """Subquery com as linhas cuja exposição diverge da soma dos contratos em aberto"""
+    contracts = (
+        select(
+            Contract.customer_id.label("customer_id"),
+            func.sum(Contract.total_value).label("exposure"),
+            func.count().label("contracts"),
+        )
+        .where(Contract.deleted_at.is_(None), Contract.status.in_(OPEN_STATUSES))
+        .group_by(Contract.customer_id)
+        .subquery()
+    )
+    expected = {
+        "open_exposure": func.coalesce(contracts.c.exposure, 0),
+        "open_contracts": func.coalesce(contracts.c.contracts, 0),
+    }
+
+    return (
+        select(
+            Person.id.label("id"),
+            *[getattr(Person, field).label(f"current_{field}") for field in expected],
+            *[expr.label(field) for field, expr in expected.items()],
+        )
+        .outerjoin(contracts, contracts.c.customer_id == Person.id)
+        .where(or_(*[getattr(Person, field).is_distinct_from(expr) for field, expr in expected.items()]))
+        .subquery()
+    ), list(expected)
+
+
+def reconcile_exposure(db: Session, fix: bool = False) -> dict:
+    """
+    Recalcula a exposição de todos os clientes a partir dos contratos.
+    Com fix=True corrige com um único UPDATE ... FROM (subquery).
+
+    Returns:
+        dict: {"persons": [...], "fixed": bool}
+    """
+    drift, fields = _expected_exposure()
+
+    report = {
+        "persons": [
+            {
+                "id": row["id"],
+                "drift": {
+                    field: [row[f"current_{field}"], row[field]]
+                    for field in fields
+                    if row[f"current_{field}"] != row[field]
+                },
+            }
+            for row in db.execute(select(drift)).mappings()
+        ],
+        "fixed": False,
+    }
+
+    if fix:
+        if report["persons"]:
+            db.execute(
+                update(Person)
+                .where(Person.id == drift.c.id)
+                .values(version=Person.version + 1, **{field: drift.c[field] for field in fields})
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        report["fixed"] = True
+
+    return report
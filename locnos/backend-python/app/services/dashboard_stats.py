@@ -0,0 +1,129 @@
+"""
+Indicadores do dashboard.
+
+Uma consulta por tabela: todas as contagens e somas de pedidos, equipamentos,
+veículos e contratos saem de um único SELECT com agregados filtrados
+(`COUNT(*) FILTER (WHERE ...)`), em vez de um COUNT por indicador.
+
+O resultado (já serializado, com ETag) fica num snapshot por worker válido
+por DASHBOARD_STATS_TTL_SECONDS. Quando expira, requisições simultâneas
+aguardam um único recálculo (SingleFlight); mudanças de status de contrato
+descartam o snapshot na hora.
+
+"Hoje" e "este mês" seguem o fuso local (ROLLUP_TIMEZONE), como as séries.
+"""
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import CachedResponse, SingleFlight, make_body_etag
+from app.core.config import settings
+from app.models import (
+    Contract, ContractStatus, Equipment, EquipmentStatus,
+    Pedido, StatusPedido, Veiculo, StatusVeiculo,
+)
+from app.schemas.dashboard import (
+    ContractStats, DashboardStatsResponse, EquipmentStats, FleetStats, OrderStats, RevenueStats,
+)
+from app.services.credit import OPEN_STATUSES
+from app.services.rollups import ROLLUP_TIMEZONE, utc_bounds
+
+
+def _count(*conditions):
+    """COUNT(*) FILTER (WHERE ...) (sem condições: COUNT(*))"""
+    return func.count().filter(*conditions) if conditions else func.count()
+
+
+def _sum(column, *conditions):
+    return func.coalesce(func.sum(column).filter(*conditions), 0)
+
+
+def compute_dashboard_stats(db: Session) -> DashboardStatsResponse:
+    """Calcula os indicadores (quatro consultas, uma por tabela)"""
+    now = datetime.now(timezone.utc)
+    today = now.astimezone(ZoneInfo(ROLLUP_TIMEZONE)).date()
+    # Início do mês local; finished_at é gravado em UTC sem fuso (datetime.utcnow)
+    month_start, _ = utc_bounds(today.replace(day=1), today, naive_utc=True)
+
+    orders = db.execute(select(
+        _count().label("total"),
+        _count(Pedido.status == StatusPedido.PENDENTE_EXPEDICAO).label("pending"),
+        _count(Pedido.status == StatusPedido.EM_ROTA).label("in_transit"),
+        _count(
+            Pedido.data_prevista_entrega < now,
+            Pedido.status.notin_([StatusPedido.ENTREGUE, StatusPedido.CANCELADO]),
+        ).label("overdue"),
+        _count(Pedido.status == StatusPedido.ENTREGA_FALHOU).label("failed"),
+    ).select_from(Pedido)).one()
+
+    equipment = db.execute(select(
+        _count().label("total"),
+        _count(Equipment.status == EquipmentStatus.AVAILABLE, Equipment.quantity_available > 0).label("available"),
+        _count(Equipment.status == EquipmentStatus.RENTED).label("rented"),
+        _count(Equipment.status == EquipmentStatus.MAINTENANCE).label("maintenance"),
+    ).select_from(Equipment).where(Equipment.visible.is_(True))).one()
+
+    fleet = db.execute(select(
+        _count(Veiculo.ativo.is_(True)).label("active_vehicles"),
+        _count(Veiculo.ativo.is_(True), Veiculo.status == StatusVeiculo.DISPONIVEL).label("available"),
+        _count(Veiculo.ativo.is_(True), Veiculo.status == StatusVeiculo.EM_ROTA).label("in_route"),
+        _count(Veiculo.ativo.is_(True), Veiculo.status == StatusVeiculo.MANUTENCAO).label("maintenance"),
+    ).select_from(Veiculo)).one()
+
+    active = Contract.status == ContractStatus.ATIVO
+    finished_this_month = (Contract.status == ContractStatus.FINALIZADO) & (Contract.finished_at >= month_start)
+    contracts = db.execute(
+        select(
+            _count(Contract.status.in_(OPEN_STATUSES)).label("open"),
+            _count(Contract.status == ContractStatus.AGUARDANDO_APROVACAO).label("awaiting_approval"),
+            _count(active).label("active"),
+            _count(active, Contract.end_date < today).label("overdue"),
+            _count(finished_this_month).label("finished_this_month"),
+            _sum(Contract.total_value, active).label("revenue_active"),
+            _sum(Contract.total_value, Contract.status.in_(OPEN_STATUSES)).label("revenue_open"),
+            _sum(Contract.total_value, finished_this_month).label("revenue_month"),
+        )
+        .select_from(Contract)
+        .where(Contract.deleted_at.is_(None))
+    ).one()
+
+    return DashboardStatsResponse(
+        orders=OrderStats(**orders._mapping),
+        equipment=EquipmentStats(**equipment._mapping),
+        fleet=FleetStats(**fleet._mapping),
+        contracts=ContractStats(
+            open=contracts.open,
+            awaiting_approval=contracts.awaiting_approval,
+            active=contracts.active,
+            overdue=contracts.overdue,
+            finished_this_month=contracts.finished_this_month,
+        ),
+        revenue=RevenueStats(
+            active=float(contracts.revenue_active),
+            open=float(contracts.revenue_open),
+            this_month=float(contracts.revenue_month),
+        ),
+        generated_at=now,
+    )
+
+
+_snapshot: SingleFlight[CachedResponse] = SingleFlight(settings.DASHBOARD_STATS_TTL_SECONDS)
+
+
+def get_dashboard_stats(db: Session) -> CachedResponse:
+    """Snapshot atual já serializado (recalcula no máximo uma vez por TTL)"""
+    def build() -> CachedResponse:
+        stats = compute_dashboard_stats(db)
+        # ETag só dos indicadores: recalcular sem mudança continua dando 304
+        etag = make_body_etag(stats.model_dump_json(exclude={"generated_at"}).encode())
+        return CachedResponse(body=stats.model_dump_json().encode(), etag=etag)
+
+    return _snapshot.get(build)
+
+
+def invalidate_dashboard_stats() -> None:
+    """Descarta o snapshot deste worker (ex.: após mudança de status de contrato)"""
+    _snapshot.invalidate()
@@ -0,0 +1,364 @@
+"""
+Carga de pedidos faturados do ERP (SAP B1) em NDJSON.
+
+- Um pedido por linha, lido em streaming (importers.read_rows) e validado
+  por PedidoImport; clientes e vendedores informados por CPF/CNPJ são
+  resolvidos com uma única consulta IN por lote
+- Peso total e volumes são calculados a partir dos itens
+- Gravação em lotes com INSERT ... ON CONFLICT (numero_pedido) DO UPDATE,
+  um round trip por lote. Um pedido existente só é atualizado se ainda não
+  saiu do armazém (EDITABLE_STATUSES), se a versão recebida não é mais
+  antiga que a gravada (erp_atualizado_em) e se algum campo do ERP mudou.
+  Caso contrário a linha fica "skipped" sem tocar no registro: atualizado_em,
+  séries do dashboard e eventos em tempo real não são disparados, e reenviar
+  o mesmo feed é idempotente
+- Status, rota, separação e demais dados da expedição pertencem ao WMS/TMS
+  e nunca são sobrescritos; o ERP só consegue cancelar o pedido
+- Ao fim, a marca d'água e a vazão da carga são gravadas em
+  erp_sincronizacoes. A marca d'água é o maior erp_atualizado_em gravado,
+  mas nunca passa de uma linha que falhou (inválida ou erro de banco):
+  fica logo abaixo da versão mais antiga que falhou, para a próxima
+  consulta incremental trazê-la de novo; se a linha que falhou não tem
+  carimbo legível, a marca d'água não avança nesta carga. Uploads manuais
+  (POST /pedidos/import) ficam em outra fonte e não movem a marca d'água
+  da integração
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from math import ceil
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo
+import time
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import and_, case, func, literal_column, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import ErpSincronizacao, Pedido, Person, StatusPedido
+from app.schemas.pedido import ItemPedidoImport, PedidoImport
+from app.services.importers import ImportResult, ImportRow, validation_errors, write_batch
+
+
+ERP_SOURCE = "pedidos"
+# Uploads manuais: resumo próprio, sem mexer na marca d'água da integração
+UPLOAD_SOURCE = "pedidos:upload"
+
+# Pedido ainda no armazém: o ERP pode alterar (ou cancelar)
+EDITABLE_STATUSES = (
+    StatusPedido.PENDENTE_EXPEDICAO,
+    StatusPedido.EM_SEPARACAO,
+    StatusPedido.SEPARADO,
+    StatusPedido.EM_CONFERENCIA,
+    StatusPedido.CONFERIDO,
+    StatusPedido.AGUARDANDO_CARGA,
+)
+
+# Colunas que pertencem ao ERP (atualizadas e comparadas no upsert)
+ERP_COLUMNS = (
+    "numero_nf", "erp_pedido_id",
+    "data_pedido", "data_faturamento", "data_prevista_entrega",
+    "cliente_id", "vendedor_id",
+    "regiao_entrega", "endereco_entrega",
+    "tipo_frete", "valor_frete",
+    "peso_total_kg", "volumes", "cubagem_m3",
+    "valor_total", "valor_produtos", "valor_descontos",
+    "itens",
+    "observacoes", "observacoes_entrega",
+    "urgente", "prioridade",
+)
+
+# Campos do PedidoImport gravados sem conversão
+_DIRECT_FIELDS = frozenset(ERP_COLUMNS) - {"cliente_id", "vendedor_id", "endereco_entrega", "itens", "peso_total_kg", "volumes"}
+
+SKIPPED_MESSAGE = "Sem alteração, versão mais antiga que a gravada ou pedido já expedido"
+
+
+_STAMP = TypeAdapter(datetime)
+
+
+@dataclass
+class PedidoIngestResult(ImportResult):
+    """Resultado da carga + carimbos de alteração do ERP gravados e que falharam"""
+    high_water: Optional[datetime] = None   # maior versão gravada
+    low_failed: Optional[datetime] = None   # menor versão que falhou
+    unstamped_failures: int = 0             # falhas sem carimbo legível
+
+    def advance(self, stamp: Optional[datetime]) -> None:
+        if stamp is not None and (self.high_water is None or stamp > self.high_water):
+            self.high_water = stamp
+
+    def fail(self, stamp: Optional[datetime]) -> None:
+        """Versão não gravada: a marca d'água não pode passar dela"""
+        if stamp is None:
+            self.unstamped_failures += 1
+        elif self.low_failed is None or stamp < self.low_failed:
+            self.low_failed = stamp
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Marca d'água segura desta carga (None: não avança)"""
+        if self.unstamped_failures or self.high_water is None:
+            return None
+        if self.low_failed is not None:
+            return min(self.high_water, self.low_failed - timedelta(microseconds=1))
+        return self.high_water
+
+    def as_dict(self) -> dict:
+        return {**super().as_dict(), "erp_high_water": self.watermark}
+
+
+def _raw_stamp(data: Optional[dict]) -> Optional[datetime]:
+    """erp_atualizado_em de uma linha que não passou na validação (None se ilegível)"""
+    try:
+        stamp = _STAMP.validate_python((data or {})["erp_atualizado_em"])
+    except (KeyError, TypeError, ValidationError):
+        return None
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=ZoneInfo(settings.ERP_TIMEZONE))
+
+
+def pedido_totals(itens: Sequence[ItemPedidoImport]) -> Tuple[Decimal, int]:
+    """
+    Peso bruto (kg) e volumes do pedido.
+    Volumes por item: quantidade / unidades por volume, arredondado para
+    cima; item sem embalagem informada conta 1 volume. Mínimo de 1 volume.
+    """
+    peso = sum(
+        (Decimal(str(item.quantidade)) * Decimal(str(item.peso_unitario_kg))
+         for item in itens if item.peso_unitario_kg is not None),
+        Decimal(0),
+    )
+    volumes = sum(
+        ceil(round(item.quantidade / item.quantidade_por_volume, 6)) if item.quantidade_por_volume else 1
+        for item in itens
+    )
+    return peso.quantize(Decimal("0.001")), max(volumes, 1)
+
+
+def _resolve_people(db: Session, items: Sequence[PedidoImport]) -> Tuple[set, Dict[str, UUID]]:
+    """Ids existentes e CPF/CNPJ -> id de clientes e vendedores do lote (uma consulta)"""
+    ids = {
+        person_id for item in items
+        for person_id in (item.cliente_id, item.vendedor_id) if person_id is not None
+    }
+    documents = {
+        document for item in items
+        for document in (item.cliente_documento, item.vendedor_documento) if document
+    }
+    found, by_document = set(), {}
+    if ids or documents:
+        for person_id, cpf, cnpj in db.query(Person.id, Person.cpf, Person.cnpj).filter(
+            or_(Person.id.in_(ids), Person.cpf.in_(documents), Person.cnpj.in_(documents))
+        ):
+            found.add(person_id)
+            for document in (cpf, cnpj):
+                if document:
+                    by_document[document] = person_id
+    return found, by_document
+
+
+def _person_id(person_id: Optional[UUID], document: Optional[str], found: set, by_document: Dict[str, UUID]) -> Optional[UUID]:
+    if person_id is not None:
+        return person_id if person_id in found else None
+    return by_document.get(document) if document else None
+
+
+def _pedido_values(item: PedidoImport, cliente_id: UUID, vendedor_id: Optional[UUID], user_id: Optional[UUID], synced_at: datetime) -> dict:
+    """Linha do INSERT (chaves = nomes das colunas)"""
+    peso, volumes = pedido_totals(item.itens)
+    return {
+        **item.model_dump(include=set(_DIRECT_FIELDS)),
+        **item.model_dump(mode="json", include={"endereco_entrega", "itens"}, exclude_none=True),
+        "id": uuid4(),
+        "numero_pedido": item.numero_pedido,
+        "cliente_id": cliente_id,
+        "vendedor_id": vendedor_id,
+        "peso_total_kg": peso,
+        "volumes": volumes,
+        "status": StatusPedido.CANCELADO if item.cancelado else StatusPedido.PENDENTE_EXPEDICAO,
+        "ativo": True,
+        "erp_sincronizado": True,
+        # Versão do ERP; sem UpdateDate no feed, vale o momento da carga
+        "erp_ultima_sincronizacao": item.erp_atualizado_em or synced_at,
+        "criado_por_id": user_id,
+        "atualizado_por_id": user_id,
+    }
+
+
+def _pedido_upsert(rows: List[dict]):
+    """INSERT ... ON CONFLICT (numero_pedido) DO UPDATE condicional (ver docstring do módulo)"""
+    table = Pedido.__table__
+    current = table.c
+    stmt = insert(table).values(rows)
+    excluded = stmt.excluded
+
+    cancel = and_(excluded.status == StatusPedido.CANCELADO, current.status != StatusPedido.CANCELADO)
+    same_address = current.endereco_entrega == excluded.endereco_entrega
+
+    updates = {name: excluded[name] for name in ERP_COLUMNS}
+    updates.update(
+        status=case((cancel, excluded.status), else_=current.status),
+        # Endereço alterado: coordenadas voltam para o job de geocodificação
+        latitude=case((same_address, current.latitude), else_=None),
+        longitude=case((same_address, current.longitude), else_=None),
+        geocoded_at=case((same_address, current.geocoded_at), else_=None),
+        erp_sincronizado=excluded.erp_sincronizado,
+        erp_ultima_sincronizacao=excluded.erp_ultima_sincronizacao,
+        atualizado_por_id=excluded.atualizado_por_id,
+        atualizado_em=func.now(),
+    )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[current.numero_pedido],
+        set_=updates,
+        where=and_(
+            current.status.in_(EDITABLE_STATUSES),
+            or_(
+                current.erp_ultima_sincronizacao.is_(None),
+                excluded.erp_ultima_sincronizacao >= current.erp_ultima_sincronizacao,
+            ),
+            or_(
+                tuple_(*(current[name] for name in ERP_COLUMNS)).is_distinct_from(
+                    tuple_(*(excluded[name] for name in ERP_COLUMNS))
+                ),
+                cancel,
+            ),
+        ),
+    ).returning(current.numero_pedido, literal_column("xmax = 0").label("inserted"))
+
+
+def _add_written(result: PedidoIngestResult, line: int, item: PedidoImport, inserted: Optional[bool]) -> None:
+    if inserted is None:
+        result.add(line, "skipped", item.numero_pedido, [SKIPPED_MESSAGE])
+    else:
+        result.add(line, "created" if inserted else "updated", item.numero_pedido)
+    result.advance(item.erp_atualizado_em)
+
+
+def _write_pedido_batch(db: Session, batch: List[Tuple[int, PedidoImport, dict]], result: PedidoIngestResult):
+    """Grava um lote (ver importers.write_batch); sem linha retornada = skipped"""
+    def record(rows, returned):
+        inserted = {numero: created for numero, created in returned}
+        for line, item, _ in rows:
+            _add_written(result, line, item, inserted.get(item.numero_pedido))
+
+    def fail(entry, message):
+        line, item, _ = entry
+        result.add(line, "error", item.numero_pedido, [message])
+        result.fail(item.erp_atualizado_em)
+
+    write_batch(db, batch, lambda rows: _pedido_upsert([values for _, _, values in rows]), record, fail)
+
+
+def ingest_pedidos(
+    db: Session,
+    rows: Iterable[ImportRow],
+    batch_size: int,
+    user_id: Optional[UUID] = None,
+    dry_run: bool = False,
+) -> PedidoIngestResult:
+    """
+    Upsert de pedidos do ERP pelo numero_pedido.
+    Número repetido no mesmo lote: vale a última linha (as anteriores ficam
+    como "duplicate"). Cada lote é confirmado (commit) ao terminar.
+    """
+    result = PedidoIngestResult()
+    started = time.perf_counter()
+    synced_at = datetime.now(timezone.utc)
+    batch: Dict[str, Tuple[int, PedidoImport]] = {}
+
+    def flush():
+        if not batch:
+            return
+        items = list(batch.values())
+        batch.clear()
+
+        found, by_document = _resolve_people(db, [item for _, item in items])
+        ready = []
+        for line, item in items:
+            cliente_id = _person_id(item.cliente_id, item.cliente_documento, found, by_document)
+            vendedor_id = _person_id(item.vendedor_id, item.vendedor_documento, found, by_document)
+            errors = []
+            if cliente_id is None:
+                errors.append("cliente: não encontrado")
+            if vendedor_id is None and (item.vendedor_id or item.vendedor_documento):
+                errors.append("vendedor: não encontrado")
+            if errors:
+                result.add(line, "invalid", item.numero_pedido, errors)
+                result.fail(item.erp_atualizado_em)
+            elif dry_run:
+                result.add(line, "valid", item.numero_pedido)
+            else:
+                ready.append((line, item, _pedido_values(item, cliente_id, vendedor_id, user_id, synced_at)))
+
+        if ready:
+            _write_pedido_batch(db, ready, result)
+            db.commit()
+
+    for row in rows:
+        result.total += 1
+        if row.error:
+            result.add(row.line, "invalid", None, [row.error])
+            result.fail(None)
+            continue
+        try:
+            item = PedidoImport.model_validate(row.data)
+        except ValidationError as e:
+            key = row.data.get("numero_pedido")
+            result.add(row.line, "invalid", str(key) if key is not None else None, validation_errors(e))
+            result.fail(_raw_stamp(row.data))
+            continue
+
+        previous = batch.pop(item.numero_pedido, None)
+        if previous is not None:
+            result.add(previous[0], "duplicate", item.numero_pedido, [f"Substituída pela linha {row.line}"])
+        batch[item.numero_pedido] = (row.line, item)
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    result.results.sort(key=lambda entry: entry["line"])
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# ============================================================================
+# MARCA D'ÁGUA
+# ============================================================================
+
+def record_sync(db: Session, result: PedidoIngestResult, source: str = ERP_SOURCE) -> None:
+    """
+    Grava o resumo da carga e a marca d'água segura (result.watermark).
+    A marca d'água só avança (GREATEST ignora NULL).
+    """
+    counts = {
+        "total": result.total,
+        "criados": result.counts.get("created", 0),
+        "atualizados": result.counts.get("updated", 0),
+        "ignorados": result.counts.get("skipped", 0),
+        "invalidos": result.counts.get("invalid", 0),
+        "erros": result.counts.get("error", 0),
+        "duracao_segundos": round(result.elapsed, 3),
+        "linhas_por_segundo": round(result.total / result.elapsed, 1) if result.elapsed > 0 else 0,
+    }
+    table = ErpSincronizacao.__table__
+    stmt = insert(table).values(fonte=source, ultima_alteracao_erp=result.watermark, **counts)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.fonte],
+        set_={
+            "ultima_alteracao_erp": func.greatest(table.c.ultima_alteracao_erp, stmt.excluded.ultima_alteracao_erp),
+            "ultima_execucao": func.now(),
+            **{name: stmt.excluded[name] for name in counts},
+        },
+    ))
+    db.commit()
+
+
+def sync_watermark(db: Session, source: str = ERP_SOURCE) -> Optional[datetime]:
+    """Marca d'água da fonte (`since` da próxima consulta incremental ao ERP)"""
+    state = db.get(ErpSincronizacao, source)
+    return state.ultima_alteracao_erp if state else None
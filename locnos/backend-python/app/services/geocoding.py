@@ -0,0 +1,485 @@
+"""
+Geocodificação de endereços (pessoas, pedidos e paradas das rotas).
+
+Provedores plugáveis (mesma interface, escolhidos em GEOCODER_PROVIDER):
+- local: tabela CEP -> latitude/longitude em CSV, offline e sem custo
+  (também usada em testes); CEP desconhecido cai no centro da região
+  (5 primeiros dígitos)
+- nominatim: OpenStreetMap via geopy (dependência opcional, 1 req/s)
+
+Fluxo do job (python -m app.geocode), por lote de registros sem coordenadas:
+1. endereço -> chave normalizada (minúsculas, sem acentos, CEP só dígitos);
+   endereços iguais de cadastros diferentes viram uma consulta só
+2. chaves conhecidas vêm do cache persistente (geocodificacao_cache) em um IN
+3. as demais vão ao provedor por um pool limitado de workers asyncio, com
+   backoff exponencial nas falhas temporárias (timeout, limite de requisições)
+4. resultados (inclusive "não encontrado") gravados no cache e coordenadas
+   escritas nas colunas latitude/longitude em um UPDATE executemany
+"""
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import asyncio
+import csv
+import logging
+import random
+import re
+import time
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.search import digits_only, normalize_text
+from app.models import GeocodeCache, Pedido, Person, Rota, StatusPedido, StatusRota
+
+
+logger = logging.getLogger(__name__)
+
+GEOCODERS = ("local", "nominatim")
+
+# Campos do endereço canônico e os nomes usados em cada cadastro
+# (pessoas: street/number/...; pedidos: logradouro/numero/...)
+ADDRESS_FIELDS = {
+    "cep": ("cep",),
+    "street": ("street", "logradouro"),
+    "number": ("number", "numero"),
+    "neighborhood": ("neighborhood", "bairro"),
+    "city": ("city", "cidade"),
+    "state": ("state", "estado", "uf"),
+}
+
+# Backoff das falhas temporárias: 0,5s, 1s, 2s, 4s... (com jitter), até 30s
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class GeocodeResult(NamedTuple):
+    latitude: float
+    longitude: float
+    precision: str  # "endereco", "cep" ou "regiao"
+
+
+class GeocoderUnavailable(Exception):
+    """Falha temporária do provedor (timeout, limite de requisições): tentar de novo"""
+
+
+# ============================================================================
+# ENDEREÇOS
+# ============================================================================
+
+def canonical_address(address) -> Dict[str, str]:
+    """Endereço de pessoa ou pedido -> campos canônicos normalizados (só os preenchidos)"""
+    if not isinstance(address, dict):
+        return {}
+
+    result = {}
+    for field, aliases in ADDRESS_FIELDS.items():
+        value = next((address[alias] for alias in aliases if address.get(alias)), None)
+        if value is None:
+            continue
+        if field == "cep":
+            value = digits_only(str(value))
+            if len(value) != 8:
+                continue
+        else:
+            value = " ".join(re.sub(r"[^\w]+", " ", normalize_text(str(value))).split())
+        if value:
+            result[field] = value
+    return result
+
+
+def address_key(address) -> Optional[str]:
+    """
+    Chave do cache: campos canônicos em ordem fixa ("01310100|av paulista|1578|...").
+    None se não há CEP nem logradouro + cidade (nada que um provedor resolva).
+    """
+    parts = canonical_address(address)
+    if "cep" not in parts and not ("street" in parts and "city" in parts):
+        return None
+    return "|".join(parts.get(field, "") for field in ADDRESS_FIELDS)[:500]
+
+
+def address_from_key(key: str) -> Dict[str, str]:
+    """Inverso de address_key (os workers só recebem a chave)"""
+    return {field: value for field, value in zip(ADDRESS_FIELDS, key.split("|")) if value}
+
+
+# ============================================================================
+# PROVEDORES
+# ============================================================================
+
+class Geocoder(ABC):
+    """Interface dos provedores"""
+
+    name: str
+    # Limite de consultas simultâneas imposto pelo provedor (None = sem limite)
+    max_concurrency: Optional[int] = None
+
+    @abstractmethod
+    async def geocode(self, address: Dict[str, str]) -> Optional[GeocodeResult]:
+        """
+        Endereço canônico -> coordenadas (None = não encontrado).
+        Levanta GeocoderUnavailable em falhas temporárias.
+        """
+        ...
+
+
+class LocalFileGeocoder(Geocoder):
+    """Tabela CEP -> coordenadas em CSV (colunas cep, latitude, longitude)"""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ceps: Dict[str, Tuple[float, float]] = {}
+        regions = defaultdict(lambda: [0.0, 0.0, 0])
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                cep = digits_only(row.get("cep"))
+                try:
+                    coordinates = (float(row["latitude"]), float(row["longitude"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if len(cep) != 8:
+                    continue
+                self._ceps[cep] = coordinates
+                region = regions[cep[:5]]
+                region[0] += coordinates[0]
+                region[1] += coordinates[1]
+                region[2] += 1
+
+        # Centro de cada região (média dos CEPs conhecidos com o mesmo prefixo)
+        self._regions = {
+            prefix: (latitude / count, longitude / count)
+            for prefix, (latitude, longitude, count) in regions.items()
+        }
+
+    async def geocode(self, address: Dict[str, str]) -> Optional[GeocodeResult]:
+        cep = address.get("cep")
+        if not cep:
+            return None
+        if cep in self._ceps:
+            return GeocodeResult(*self._ceps[cep], "cep")
+        if cep[:5] in self._regions:
+            return GeocodeResult(*self._regions[cep[:5]], "regiao")
+        return None
+
+
+class NominatimGeocoder(Geocoder):
+    """OpenStreetMap (Nominatim) via geopy, busca estruturada restrita ao Brasil"""
+
+    name = "nominatim"
+    # Política de uso do serviço público: no máximo 1 requisição por segundo
+    max_concurrency = 1
+
+    def __init__(self, user_agent: str, timeout: int = 10):
+        try:
+            from geopy import exc
+            from geopy.extra.rate_limiter import RateLimiter
+            from geopy.geocoders import Nominatim
+        except ImportError as e:
+            raise RuntimeError("O provedor nominatim requer o pacote geopy (requirements.txt)") from e
+
+        self._geocode = RateLimiter(
+            Nominatim(user_agent=user_agent, timeout=timeout).geocode,
+            min_delay_seconds=1, max_retries=0, swallow_exceptions=False,
+        )
+        self._query_error = exc.GeocoderQueryError
+        self._transient = exc.GeocoderServiceError
+
+    async def geocode(self, address: Dict[str, str]) -> Optional[GeocodeResult]:
+        street = " ".join(filter(None, (address.get("number"), address.get("street"))))
+        query = {
+            "street": street,
+            "city": address.get("city"),
+            "state": address.get("state"),
+            "postalcode": address.get("cep"),
+            "country": "Brasil",
+        }
+        query = {key: value for key, value in query.items() if value}
+
+        try:
+            location = await asyncio.to_thread(self._geocode, query, country_codes="br")
+        except self._query_error:
+            return None
+        except self._transient as e:
+            raise GeocoderUnavailable(str(e)) from e
+
+        if location is None:
+            return None
+        return GeocodeResult(location.latitude, location.longitude, "endereco" if street else "cep")
+
+
+def get_geocoder(provider: Optional[str] = None, local_file: Optional[str] = None) -> Geocoder:
+    """Provedor configurado em GEOCODER_PROVIDER (ou o informado)"""
+    provider = provider or settings.GEOCODER_PROVIDER
+    if provider == "local":
+        return LocalFileGeocoder(local_file or settings.GEOCODER_LOCAL_FILE)
+    if provider == "nominatim":
+        return NominatimGeocoder(settings.GEOCODER_USER_AGENT)
+    raise ValueError(f"GEOCODER_PROVIDER não suportado: {provider}")
+
+
+# ============================================================================
+# POOL DE CONSULTAS
+# ============================================================================
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+async def geocode_batch(
+    geocoder: Geocoder,
+    keys: List[str],
+    concurrency: int,
+    max_retries: int,
+) -> Dict[str, Optional[GeocodeResult]]:
+    """
+    Consulta o provedor com no máximo `concurrency` workers simultâneos.
+
+    Chaves que esgotaram as tentativas ficam fora do resultado: não entram
+    no cache e são tentadas de novo na próxima execução.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for key in keys:
+        queue.put_nowait(key)
+    results: Dict[str, Optional[GeocodeResult]] = {}
+
+    async def worker():
+        while True:
+            try:
+                key = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            for attempt in range(max_retries + 1):
+                try:
+                    results[key] = await geocoder.geocode(address_from_key(key))
+                    break
+                except GeocoderUnavailable as e:
+                    if attempt == max_retries:
+                        logger.warning("Geocodificação falhou após %s tentativas (%s): %s", attempt + 1, key, e)
+                        break
+                    await asyncio.sleep(_backoff(attempt))
+
+    workers = min(concurrency, geocoder.max_concurrency or concurrency, len(keys))
+    await asyncio.gather(*(worker() for _ in range(max(workers, 1))))
+    return results
+
+
+# ============================================================================
+# JOB
+# ============================================================================
+
+@dataclass
+class GeocodeReport:
+    """Resumo de uma execução por alvo"""
+    target: str
+    rows: int = 0          # registros sem coordenadas lidos
+    invalid: int = 0       # sem CEP nem logradouro + cidade
+    addresses: int = 0     # endereços distintos
+    cached: int = 0        # resolvidos pelo cache
+    fetched: int = 0       # consultados no provedor
+    not_found: int = 0     # provedor (ou cache) sem resultado
+    failed: int = 0        # falhas temporárias esgotadas (tentadas na próxima execução)
+    updated: int = 0       # registros que receberam coordenadas
+    elapsed: float = 0.0
+
+
+def resolve_addresses(
+    db: Session,
+    geocoder: Geocoder,
+    keys: List[str],
+    report: GeocodeReport,
+    concurrency: int,
+    max_retries: int,
+) -> Dict[str, GeocodeResult]:
+    """Chaves -> coordenadas encontradas, passando pelo cache persistente"""
+    results: Dict[str, Optional[GeocodeResult]] = {}
+    for entry in db.query(GeocodeCache).filter(GeocodeCache.address_key.in_(keys)):
+        results[entry.address_key] = (
+            GeocodeResult(float(entry.latitude), float(entry.longitude), entry.precision)
+            if entry.found else None
+        )
+    report.cached += len(results)
+
+    missing = [key for key in keys if key not in results]
+    if missing:
+        fetched = asyncio.run(geocode_batch(geocoder, missing, concurrency, max_retries))
+        report.fetched += len(fetched)
+        report.failed += len(missing) - len(fetched)
+        if fetched:
+            db.execute(
+                insert(GeocodeCache)
+                .values([
+                    {
+                        "address_key": key,
+                        "latitude": result.latitude if result else None,
+                        "longitude": result.longitude if result else None,
+                        "precision": result.precision if result else None,
+                        "provider": geocoder.name,
+                    }
+                    for key, result in fetched.items()
+                ])
+                .on_conflict_do_nothing(index_elements=["address_key"])
+            )
+        results.update(fetched)
+
+    report.not_found += sum(1 for result in results.values() if result is None)
+    return {key: result for key, result in results.items() if result is not None}
+
+
+def _geocode_rows(
+    db: Session,
+    geocoder: Geocoder,
+    report: GeocodeReport,
+    model,
+    address_column,
+    filters: list,
+    batch_size: int,
+    limit: Optional[int],
+    concurrency: int,
+    max_retries: int,
+) -> None:
+    """Registros sem coordenadas, em lotes por id (keyset)"""
+    table = model.__table__
+    # Só grava se o endereço não mudou desde a leitura e ainda está sem coordenadas
+    write_back = (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c[address_column.key] == bindparam("b_address", type_=JSONB),
+            table.c.latitude.is_(None),
+        )
+        .values(
+            latitude=bindparam("b_latitude"),
+            longitude=bindparam("b_longitude"),
+            geocoded_at=func.now(),
+            # Coordenadas não contam como alteração do cadastro (updated_at/atualizado_em)
+            **{column.key: column for column in table.c if column.onupdate is not None},
+        )
+    )
+
+    last_id = None
+    while limit is None or report.rows < limit:
+        size = batch_size if limit is None else min(batch_size, limit - report.rows)
+        query = select(model.id, address_column).where(
+            model.latitude.is_(None), address_column.isnot(None), *filters
+        )
+        if last_id is not None:
+            query = query.where(model.id > last_id)
+        rows = db.execute(query.order_by(model.id).limit(size)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        report.rows += len(rows)
+
+        keyed = []
+        for row_id, address in rows:
+            key = address_key(address)
+            if key is None:
+                report.invalid += 1
+            else:
+                keyed.append((row_id, address, key))
+
+        keys = list(dict.fromkeys(key for _, _, key in keyed))
+        report.addresses += len(keys)
+        found = resolve_addresses(db, geocoder, keys, report, concurrency, max_retries) if keys else {}
+
+        updates = [
+            {"b_id": row_id, "b_address": address, "b_latitude": found[key].latitude, "b_longitude": found[key].longitude}
+            for row_id, address, key in keyed
+            if key in found
+        ]
+        if updates:
+            report.updated += db.execute(write_back, updates).rowcount
+        db.commit()
+
+
+def geocode_persons(db: Session, geocoder: Geocoder, **options) -> GeocodeReport:
+    """Pessoas ativas (não mescladas) sem coordenadas"""
+    report = GeocodeReport("pessoas")
+    started = time.perf_counter()
+    _geocode_rows(
+        db, geocoder, report, Person, Person.address,
+        [Person.active.is_(True), Person.merged_into_id.is_(None)],
+        **options,
+    )
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def geocode_pedidos(db: Session, geocoder: Geocoder, **options) -> GeocodeReport:
+    """Pedidos ativos ainda não entregues/cancelados sem coordenadas"""
+    report = GeocodeReport("pedidos")
+    started = time.perf_counter()
+    _geocode_rows(
+        db, geocoder, report, Pedido, Pedido.endereco_entrega,
+        [Pedido.ativo.is_(True), Pedido.status.notin_([StatusPedido.ENTREGUE, StatusPedido.CANCELADO])],
+        **options,
+    )
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# Rotas cujas paradas ainda podem ser roteirizadas
+OPEN_ROUTE_STATUSES = (
+    StatusRota.PLANEJADA,
+    StatusRota.EM_CARREGAMENTO,
+    StatusRota.CARREGADA,
+    StatusRota.EM_ROTA,
+)
+
+
+def fill_route_coordinates(db: Session) -> GeocodeReport:
+    """
+    Completa latitude/longitude das paradas (sequencia_entregas) das rotas
+    em aberto com as coordenadas já gravadas nos pedidos.
+    """
+    report = GeocodeReport("rotas")
+    started = time.perf_counter()
+
+    routes = db.query(Rota).filter(Rota.status.in_(OPEN_ROUTE_STATUSES)).all()
+    pending = {}
+    for route in routes:
+        for stop in route.sequencia_entregas or []:
+            if isinstance(stop, dict) and stop.get("latitude") is None and stop.get("pedido_id"):
+                try:
+                    pending[str(stop["pedido_id"])] = UUID(str(stop["pedido_id"]))
+                except ValueError:
+                    report.invalid += 1
+    report.rows = len(pending)
+
+    coordinates = {
+        str(pedido_id): (float(latitude), float(longitude))
+        for pedido_id, latitude, longitude in db.query(Pedido.id, Pedido.latitude, Pedido.longitude).filter(
+            Pedido.id.in_(list(pending.values())), Pedido.latitude.isnot(None)
+        )
+    } if pending else {}
+
+    for route in routes:
+        stops = route.sequencia_entregas or []
+        changed = False
+        filled = []
+        for stop in stops:
+            if isinstance(stop, dict) and stop.get("latitude") is None and str(stop.get("pedido_id")) in coordinates:
+                latitude, longitude = coordinates[str(stop["pedido_id"])]
+                stop = {**stop, "latitude": latitude, "longitude": longitude}
+                changed = True
+                report.updated += 1
+            filled.append(stop)
+        if changed:
+            # Lista nova: o JSONB só é gravado quando o atributo é reatribuído
+            route.sequencia_entregas = filled
+
+    db.commit()
+    report.not_found = report.rows - len(coordinates)
+    report.elapsed = time.perf_counter() - started
+    return report
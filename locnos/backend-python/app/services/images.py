@@ -0,0 +1,214 @@
+"""
+Pipeline de imagens de equipamentos.
+
+- Upload em streaming para disco (sem bufferizar o corpo), com sha256 e
+  limite MAX_UPLOAD_SIZE verificados a cada bloco
+- Derivados WebP (miniatura e tamanho de exibição) gerados com Pillow em
+  um ProcessPoolExecutor, fora do event loop e sem disputar o GIL
+- Armazenamento endereçado por conteúdo: equipment/<hash[:2]>/<hash>/...
+  a mesma foto enviada duas vezes reaproveita os arquivos
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+
+from app.core.config import settings
+from app.services.storage import StorageBackend
+
+
+# Derivado -> maior lado em pixels
+DERIVATIVES = {
+    "thumb": 320,
+    "medium": 1280,
+}
+WEBP_QUALITY = 80
+
+# Assinaturas (magic numbers) aceitas -> extensão do original
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "jpg",
+    b"\x89PNG\r\n\x1a\n": "png",
+}
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+
+class UploadTooLarge(Exception):
+    """Corpo maior que MAX_UPLOAD_SIZE"""
+
+
+class InvalidImage(Exception):
+    """Arquivo não é uma imagem suportada"""
+
+
+@dataclass
+class ReceivedUpload:
+    """Upload gravado em arquivo temporário"""
+    path: str
+    digest: str
+    size: int
+    extension: str
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """Detecta JPEG/PNG/WebP pelos primeiros bytes"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+def image_keys(digest: str, extension: str) -> Dict[str, str]:
+    """Chaves de armazenamento do original e dos derivados"""
+    prefix = f"equipment/{digest[:2]}/{digest}"
+    keys = {"original": f"{prefix}/original.{extension}"}
+    keys.update({name: f"{prefix}/{name}.webp" for name in DERIVATIVES})
+    return keys
+
+
+async def receive_upload(chunks: AsyncIterator[bytes], max_size: int, temp_dir) -> ReceivedUpload:
+    """
+    Grava o corpo em um arquivo temporário bloco a bloco, calculando o hash.
+    Aborta assim que o limite é ultrapassado (sem ler o resto do corpo).
+    """
+    fd, path = tempfile.mkstemp(dir=temp_dir, prefix="upload-")
+    sha256 = hashlib.sha256()
+    size = 0
+    head = b""
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Arquivo maior que {max_size // (1024 * 1024)}MB")
+                if len(head) < 16:
+                    head += chunk[:16]
+                sha256.update(chunk)
+                f.write(chunk)
+
+        extension = sniff_extension(head)
+        if size == 0 or extension is None:
+            raise InvalidImage("Envie uma imagem JPEG, PNG ou WebP")
+
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return ReceivedUpload(path=path, digest=sha256.hexdigest(), size=size, extension=extension)
+
+
+def _oriented_size(image) -> tuple:
+    """Dimensões considerando a orientação EXIF (sem decodificar os pixels)"""
+    width, height = image.size
+    orientation = image.getexif().get(0x0112, 1)
+    return (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+
+
+def render_derivatives(source_path: str) -> dict:
+    """
+    Gera os derivados WebP de uma imagem.
+    Executa no pool de processos: recebe um caminho e devolve bytes.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(source_path) as image:
+            width, height = _oriented_size(image)
+
+            # JPEG: decodifica já reduzido (DCT scaling), bem mais barato que reduzir depois
+            largest = max(DERIVATIVES.values())
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+            derivatives = {}
+            for name, max_side in sorted(DERIVATIVES.items(), key=lambda item: -item[1]):
+                image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+                derivatives[name] = buffer.getvalue()
+
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage(f"Imagem inválida: {e}")
+
+    return {"width": width, "height": height, "derivatives": derivatives}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_image_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Pool compartilhado (criado sob demanda, um por worker da API)"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=workers or settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def image_entry(storage: StorageBackend, digest: str, extension: str, width: int, height: int) -> dict:
+    """Item de Equipment.images (url = derivado de exibição, não o original)"""
+    keys = image_keys(digest, extension)
+    return {
+        "hash": digest,
+        "url": storage.url(keys["medium"]),
+        "thumbnailUrl": storage.url(keys["thumb"]),
+        "originalUrl": storage.url(keys["original"]),
+        "width": width,
+        "height": height,
+        "isPrimary": False,
+    }
+
+
+async def store_upload(storage: StorageBackend, upload: ReceivedUpload, force: bool = False) -> dict:
+    """
+    Gera e grava os derivados de um upload e move o original para o storage.
+    Se o conteúdo já existe (mesmo hash), nada é reprocessado.
+    """
+    keys = image_keys(upload.digest, upload.extension)
+
+    if not force and all(storage.exists(key) for key in keys.values()):
+        os.unlink(upload.path)
+        with storage.open(keys["original"]) as f:
+            from PIL import Image
+            with Image.open(f) as image:  # só lê o cabeçalho
+                width, height = _oriented_size(image)
+        return image_entry(storage, upload.digest, upload.extension, width, height)
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(get_image_pool(), render_derivatives, upload.path)
+    except InvalidImage:
+        os.unlink(upload.path)
+        raise
+
+    for name, data in result["derivatives"].items():
+        storage.save_bytes(keys[name], data, CONTENT_TYPES["webp"])
+    storage.save_file(keys["original"], upload.path, CONTENT_TYPES[upload.extension])
+
+    return image_entry(storage, upload.digest, upload.extension, result["width"], result["height"])
+
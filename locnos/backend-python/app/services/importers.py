@@ -0,0 +1,584 @@
+"""
+Importação em lote (planilhas CSV/XLSX e NDJSON).
+
+- O corpo é gravado em um temporário em streaming (limite MAX_IMPORT_SIZE)
+  e lido linha a linha: a memória não cresce com o arquivo
+- Cada linha é validada pelo schema Pydantic do recurso; linhas inválidas
+  viram resultado "invalid" sem interromper a importação
+- As linhas válidas são gravadas em lotes com INSERT ... ON CONFLICT DO
+  UPDATE (um round trip por lote); se um lote falhar no banco, as linhas
+  dele são repetidas uma a uma para apontar qual causou o erro
+"""
+
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+
+from pydantic import ValidationError
+from sqlalchemy import func, inspect, literal_column, or_
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.documents import CNPJ_LENGTH, CPF_LENGTH, valid_cnpjs, valid_cpfs
+from app.core.search import digits_only
+from app.models.equipment import Equipment, EquipmentStatus
+from app.models.person import Person, PersonDocumentType, PersonStatus, PersonType
+from app.schemas.equipment import EquipmentCreate
+from app.schemas.person import PersonCreate
+
+
+Entry = TypeVar("Entry")
+
+IMPORT_FORMATS = {
+    "csv": ("text/csv", "application/csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",),
+    "ndjson": ("application/x-ndjson", "application/jsonl", "application/json-lines"),
+}
+
+# Status que entram no relatório de erros
+REPORT_STATUSES = ("invalid", "duplicate", "error")
+
+
+class ImportTooLarge(Exception):
+    """Arquivo maior que MAX_IMPORT_SIZE"""
+
+
+class InvalidImportFile(Exception):
+    """Arquivo ilegível (formato/encoding)"""
+
+
+@dataclass
+class ImportRow:
+    """Linha do arquivo: número (1 = primeira linha do arquivo) e campos informados"""
+    line: int
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ImportResult:
+    """Resultado de uma importação"""
+    total: int = 0
+    counts: Dict[str, int] = field(default_factory=dict)
+    results: List[dict] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add(self, line: int, status: str, key: Optional[str] = None, errors: Optional[List[str]] = None):
+        self.counts[status] = self.counts.get(status, 0) + 1
+        self.results.append({"line": line, "key": key, "status": status, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            **{status: self.counts.get(status, 0) for status in ("created", "updated", "skipped", "valid", "invalid", "duplicate", "error")},
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.total / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            "results": self.results,
+        }
+
+
+def detect_format(content_type: Optional[str], requested: Optional[str]) -> Optional[str]:
+    """Formato pelo parâmetro ?format= ou pelo Content-Type"""
+    if requested:
+        return requested if requested in IMPORT_FORMATS else None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    for name, media_types in IMPORT_FORMATS.items():
+        if media_type in media_types:
+            return name
+    return None
+
+
+async def spool_body(chunks: AsyncIterator[bytes], max_size: int) -> str:
+    """Grava o corpo em um temporário bloco a bloco; aborta ao passar do limite"""
+    fd, path = tempfile.mkstemp(prefix="import-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise ImportTooLarge(f"Arquivo maior que {max_size // (1024 * 1024)}MB")
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _parse_cell(name: str, value: str, json_fields: frozenset, list_fields: frozenset):
+    """Célula da planilha: JSON nos campos lista/objeto; campos lista aceitam "a, b" """
+    if name in json_fields and value[:1] in ("[", "{"):
+        return json.loads(value)
+    if name in list_fields:
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return value
+
+
+def _cell_text(value) -> str:
+    """Valor de célula XLSX como texto (12345.0 -> "12345", datas em ISO)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _read_xlsx(path: str) -> Iterator[Tuple[int, dict]]:
+    """Primeira planilha do arquivo, em modo read-only (linha a linha)"""
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    from zipfile import BadZipFile
+
+    with open(path, "rb") as f:
+        # Arquivo aberto (e não o caminho): o temporário não tem extensão .xlsx
+        try:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+        except (BadZipFile, InvalidFileException, KeyError) as e:
+            raise InvalidImportFile(f"Arquivo XLSX inválido: {e}")
+
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            names = [_cell_text(name).strip() for name in header]
+            for line_number, values in enumerate(rows, start=2):
+                yield line_number, dict(zip(names, (_cell_text(value) for value in values)))
+        finally:
+            workbook.close()
+
+
+def read_rows(
+    path: str,
+    fmt: str,
+    json_fields: Iterable[str] = (),
+    list_fields: Iterable[str] = (),
+) -> Iterator[ImportRow]:
+    """
+    Lê o arquivo em streaming.
+    CSV/XLSX: cabeçalho com os nomes dos campos (CSV com separador "," ou ";"
+    detectado), células vazias são ignoradas. NDJSON: um objeto JSON por linha.
+    """
+    json_fields = frozenset(json_fields)
+    list_fields = frozenset(list_fields)
+
+    def parse(line_number: int, row: dict) -> Optional[ImportRow]:
+        try:
+            data = {
+                name: _parse_cell(name, value.strip(), json_fields, list_fields)
+                for name, value in row.items()
+                if name and isinstance(value, str) and value.strip()
+            }
+        except ValueError as e:
+            return ImportRow(line_number, error=f"JSON inválido: {e}")
+        return ImportRow(line_number, data=data) if data else None
+
+    if fmt == "xlsx":
+        for line_number, row in _read_xlsx(path):
+            parsed = parse(line_number, row)
+            if parsed:
+                yield parsed
+        return
+
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            if fmt == "ndjson":
+                for line_number, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError as e:
+                        yield ImportRow(line_number, error=f"JSON inválido: {e}")
+                        continue
+                    if not isinstance(data, dict):
+                        yield ImportRow(line_number, error="Cada linha deve ser um objeto JSON")
+                        continue
+                    yield ImportRow(line_number, data=data)
+                return
+
+            sample = f.read(8192)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(f, dialect=dialect)
+            if not reader.fieldnames:
+                return
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+
+            for row in reader:
+                parsed = parse(reader.line_num, row)
+                if parsed:
+                    yield parsed
+
+    except UnicodeDecodeError:
+        raise InvalidImportFile("O arquivo deve estar em UTF-8")
+
+
+def validation_errors(error: ValidationError) -> List[str]:
+    """Mensagens curtas "campo: erro" de uma ValidationError"""
+    return [
+        f"{'.'.join(str(part) for part in item['loc']) or 'linha'}: {item['msg']}"
+        for item in error.errors(include_url=False)
+    ]
+
+
+def db_error(error: DBAPIError) -> str:
+    return str(getattr(error, "orig", error)).strip().splitlines()[0]
+
+
+def write_batch(
+    db: Session,
+    entries: Sequence[Entry],
+    statement: Callable[[Sequence[Entry]], object],
+    record: Callable[[Sequence[Entry], list], None],
+    fail: Callable[[Entry, str], None],
+) -> None:
+    """
+    Grava um lote com um único statement (RETURNING) dentro de um SAVEPOINT.
+    Em erro de banco, repete linha a linha para isolar a falha: `record`
+    recebe as linhas gravadas e o que o banco retornou, `fail` cada linha
+    que falhou sozinha e a mensagem do erro.
+    """
+    try:
+        with db.begin_nested():
+            returned = db.execute(statement(entries)).all()
+        record(entries, returned)
+    except DBAPIError:
+        for entry in entries:
+            try:
+                with db.begin_nested():
+                    returned = db.execute(statement([entry])).all()
+                record([entry], returned)
+            except DBAPIError as e:
+                fail(entry, db_error(e))
+
+
+def error_report_csv(result: ImportResult) -> str:
+    """Relatório (CSV) das linhas não importadas: linha, chave, status, erros"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["line", "key", "status", "errors"])
+    for entry in result.results:
+        if entry["status"] in REPORT_STATUSES:
+            writer.writerow([entry["line"], entry["key"] or "", entry["status"], " | ".join(entry["errors"] or ())])
+    return output.getvalue()
+
+
+# ============================================================================
+# EQUIPAMENTOS
+# ============================================================================
+
+_EQUIPMENT_COLUMNS = {attr: inspect(Equipment).columns[attr] for attr in EquipmentCreate.model_fields}
+EQUIPMENT_IMPORT_JSON_FIELDS = frozenset(
+    attr for attr, column in _EQUIPMENT_COLUMNS.items() if isinstance(column.type, JSONB)
+)
+EQUIPMENT_IMPORT_LIST_FIELDS = frozenset({"tags"})
+
+
+def _equipment_values(item: EquipmentCreate, user_id: Optional[UUID]) -> dict:
+    """Linha do INSERT (chaves = nomes das colunas)"""
+    data = item.model_dump()
+    json_data = item.model_dump(mode="json", include=set(EQUIPMENT_IMPORT_JSON_FIELDS))
+    values = {
+        _EQUIPMENT_COLUMNS[attr].key: json_data[attr] if attr in EQUIPMENT_IMPORT_JSON_FIELDS else value
+        for attr, value in data.items()
+    }
+    columns = inspect(Equipment).columns
+    values[columns["quantity_available"].key] = item.quantity_total
+    values[columns["status"].key] = EquipmentStatus.AVAILABLE
+    values[columns["created_by_id"].key] = user_id
+    return values
+
+
+def _equipment_upsert(rows: List[dict], provided: frozenset, user_id: Optional[UUID]):
+    """INSERT ... ON CONFLICT ("internalCode") DO UPDATE só dos campos informados"""
+    table = Equipment.__table__
+    columns = inspect(Equipment).columns
+    stmt = insert(table).values(rows)
+    excluded = stmt.excluded
+
+    updates = {
+        _EQUIPMENT_COLUMNS[attr].key: excluded[_EQUIPMENT_COLUMNS[attr].key]
+        for attr in provided
+        if attr != "internal_code"
+    }
+    if "quantity_total" in provided:
+        # Mudança no total ajusta o disponível pela diferença
+        available, total = columns["quantity_available"], columns["quantity_total"]
+        updates[available.key] = func.greatest(0, available + excluded[total.key] - total)
+    updates[columns["version"].key] = columns["version"] + 1
+    updates[columns["updated_by_id"].key] = user_id
+    updates[columns["updated_at"].key] = func.now()
+
+    return stmt.on_conflict_do_update(
+        index_elements=[columns["internal_code"]],
+        set_=updates,
+    ).returning(columns["internal_code"], literal_column("xmax = 0").label("inserted"))
+
+
+def _write_equipment_batch(db: Session, batch: List[Tuple[int, EquipmentCreate, frozenset]], user_id, result: ImportResult):
+    """Grava um lote, um upsert por conjunto de campos informados (ver write_batch)"""
+    groups: Dict[frozenset, List[Tuple[int, EquipmentCreate]]] = {}
+    for line, item, provided in batch:
+        groups.setdefault(provided, []).append((line, item))
+
+    def record(items, returned):
+        inserted = {code: created for code, created in returned}
+        for line, item in items:
+            result.add(line, "created" if inserted[item.internal_code] else "updated", item.internal_code)
+
+    def fail(entry, message):
+        line, item = entry
+        result.add(line, "error", item.internal_code, [message])
+
+    for provided, items in groups.items():
+        write_batch(
+            db, items,
+            lambda rows: _equipment_upsert([_equipment_values(item, user_id) for _, item in rows], provided, user_id),
+            record, fail,
+        )
+
+
+def import_equipment(
+    db: Session,
+    rows: Iterable[ImportRow],
+    batch_size: int,
+    user_id: Optional[UUID] = None,
+    dry_run: bool = False,
+) -> ImportResult:
+    """
+    Upsert de equipamentos pelo código interno.
+    Só os campos presentes na linha são atualizados em equipamentos existentes;
+    códigos repetidos no mesmo lote: vale a última linha (as anteriores
+    ficam como "duplicate"). Cada lote é confirmado (commit) ao terminar.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    batch: Dict[str, Tuple[int, EquipmentCreate, frozenset]] = {}
+
+    def flush():
+        if batch:
+            _write_equipment_batch(db, list(batch.values()), user_id, result)
+            db.commit()
+            batch.clear()
+
+    for row in rows:
+        result.total += 1
+        if row.error:
+            result.add(row.line, "invalid", None, [row.error])
+            continue
+        try:
+            item = EquipmentCreate.model_validate(row.data)
+        except ValidationError as e:
+            result.add(row.line, "invalid", row.data.get("internal_code"), validation_errors(e))
+            continue
+
+        if dry_run:
+            result.add(row.line, "valid", item.internal_code)
+            continue
+
+        previous = batch.pop(item.internal_code, None)
+        if previous is not None:
+            result.add(previous[0], "duplicate", item.internal_code, [f"Substituída pela linha {row.line}"])
+        batch[item.internal_code] = (row.line, item, frozenset(item.model_fields_set))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    result.results.sort(key=lambda entry: entry["line"])
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# ============================================================================
+# PESSOAS
+# ============================================================================
+
+_PERSON_COLUMNS = {attr: inspect(Person).columns[attr] for attr in PersonCreate.model_fields}
+PERSON_IMPORT_JSON_FIELDS = frozenset(
+    attr for attr, column in _PERSON_COLUMNS.items() if isinstance(column.type, JSONB)
+)
+PERSON_IMPORT_LIST_FIELDS = frozenset({"types"})
+
+_DOCUMENT_LENGTHS = {PersonDocumentType.CPF.value: CPF_LENGTH, PersonDocumentType.CNPJ.value: CNPJ_LENGTH}
+_PERSON_TYPES = frozenset(person_type.value for person_type in PersonType)
+
+
+def _normalize_person_row(data: dict) -> dict:
+    """
+    Ajustes de planilha antes da validação: documentos só com dígitos (zeros à
+    esquerda repostos, perdidos quando a célula é numérica), document_type
+    deduzido do documento informado e em minúsculas
+    """
+    data = dict(data)
+    for document_field in ("cpf", "cnpj"):
+        if isinstance(data.get(document_field), (str, int)):
+            digits = digits_only(str(data[document_field]))
+            data[document_field] = digits.zfill(_DOCUMENT_LENGTHS[document_field]) if digits else None
+    document_type = data.get("document_type")
+    if isinstance(document_type, str):
+        data["document_type"] = document_type.strip().lower()
+    elif not document_type:
+        data["document_type"] = "cnpj" if data.get("cnpj") and not data.get("cpf") else "cpf"
+    return data
+
+
+def _person_document(item: PersonCreate) -> Optional[str]:
+    return item.cnpj if item.document_type == PersonDocumentType.CNPJ.value else item.cpf
+
+
+def _person_values(item: PersonCreate, user_id: Optional[UUID]) -> dict:
+    """Linha do INSERT (mesmos campos gravados por POST /persons)"""
+    data = item.model_dump()
+    json_data = item.model_dump(mode="json", include=set(PERSON_IMPORT_JSON_FIELDS))
+    values = {
+        _PERSON_COLUMNS[attr].key: json_data[attr] if attr in PERSON_IMPORT_JSON_FIELDS else value
+        for attr, value in data.items()
+    }
+    columns = inspect(Person).columns
+    # Só o documento do tipo informado (o outro campo é único e ficaria órfão)
+    other = "cpf" if item.document_type == PersonDocumentType.CNPJ.value else "cnpj"
+    values[columns[other].key] = None
+    values[columns["status"].key] = PersonStatus.PENDING
+    values[columns["created_by_id"].key] = user_id
+    return values
+
+
+def _person_insert(rows: List[dict]):
+    """INSERT ... ON CONFLICT DO NOTHING (CPF/CNPJ gravado em paralelo vira duplicado)"""
+    columns = inspect(Person).columns
+    return (
+        insert(Person.__table__)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(columns["cpf"], columns["cnpj"])
+    )
+
+
+def _write_person_batch(db: Session, items: List[Tuple[int, PersonCreate, str]], user_id, result: ImportResult):
+    """Grava um lote; em erro de banco, repete linha a linha para isolar a falha"""
+    def record(rows, returned):
+        inserted = {cpf or cnpj for cpf, cnpj in returned}
+        for line, _, document in rows:
+            if document in inserted:
+                result.add(line, "created", document)
+            else:
+                result.add(line, "duplicate", document, ["Documento já cadastrado"])
+
+    def fail(entry, message):
+        line, _, document = entry
+        result.add(line, "error", document, [message])
+
+    write_batch(
+        db, items,
+        lambda rows: _person_insert([_person_values(item, user_id) for _, item, _ in rows]),
+        record, fail,
+    )
+
+
+def import_persons(
+    db: Session,
+    rows: Iterable[ImportRow],
+    batch_size: int,
+    user_id: Optional[UUID] = None,
+    dry_run: bool = False,
+) -> ImportResult:
+    """
+    Cadastro em lote de pessoas (somente inclusão, status pendente).
+
+    Cada linha passa pelas regras de PersonCreate; por lote, os dígitos
+    verificadores de CPF/CNPJ são conferidos de uma vez (NumPy) e os
+    documentos já cadastrados são buscados com uma única consulta IN.
+    Documento repetido no arquivo: vale a primeira linha. Cada lote é
+    confirmado (commit) ao terminar.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    seen: Dict[str, int] = {}
+    batch: List[Tuple[int, PersonCreate, str]] = []
+
+    def flush():
+        if not batch:
+            return
+
+        cpf_ok = valid_cpfs([document if item.document_type == "cpf" else "" for _, item, document in batch])
+        cnpj_ok = valid_cnpjs([document if item.document_type == "cnpj" else "" for _, item, document in batch])
+
+        checked = []
+        for (line, item, document), is_cpf, is_cnpj in zip(batch, cpf_ok, cnpj_ok):
+            if not (is_cpf or is_cnpj):
+                result.add(line, "invalid", document, [f"{item.document_type.upper()} inválido (dígito verificador)"])
+            elif document in seen:
+                result.add(line, "duplicate", document, [f"Documento repetido no arquivo (linha {seen[document]})"])
+            else:
+                seen[document] = line
+                checked.append((line, item, document))
+
+        cpfs = [document for _, item, document in checked if item.document_type == "cpf"]
+        cnpjs = [document for _, item, document in checked if item.document_type == "cnpj"]
+        existing = set()
+        if checked:
+            for cpf, cnpj in db.query(Person.cpf, Person.cnpj).filter(
+                or_(Person.cpf.in_(cpfs), Person.cnpj.in_(cnpjs))
+            ):
+                existing.update(filter(None, (cpf, cnpj)))
+
+        new = []
+        for line, item, document in checked:
+            if document in existing:
+                result.add(line, "duplicate", document, ["Documento já cadastrado"])
+            elif dry_run:
+                result.add(line, "valid", document)
+            else:
+                new.append((line, item, document))
+
+        if new:
+            _write_person_batch(db, new, user_id, result)
+            db.commit()
+        batch.clear()
+
+    for row in rows:
+        result.total += 1
+        if row.error:
+            result.add(row.line, "invalid", None, [row.error])
+            continue
+
+        data = _normalize_person_row(row.data)
+        key = data.get("cnpj") if data.get("document_type") == "cnpj" else data.get("cpf")
+        try:
+            item = PersonCreate.model_validate(data)
+        except ValidationError as e:
+            result.add(row.line, "invalid", key, validation_errors(e))
+            continue
+
+        errors = []
+        if item.document_type not in _DOCUMENT_LENGTHS:
+            errors.append(f"document_type: deve ser {' ou '.join(_DOCUMENT_LENGTHS)}")
+        elif not _person_document(item):
+            errors.append(f"{item.document_type}: obrigatório")
+        if item.primary_type not in _PERSON_TYPES:
+            errors.append(f"primary_type: deve ser um de {', '.join(sorted(_PERSON_TYPES))}")
+        if errors:
+            result.add(row.line, "invalid", key, errors)
+            continue
+
+        batch.append((row.line, item, _person_document(item)))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    result.results.sort(key=lambda entry: entry["line"])
+    result.elapsed = time.perf_counter() - started
+    return result
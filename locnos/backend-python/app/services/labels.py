@@ -0,0 +1,216 @@
+"""
+Etiquetas patrimoniais de equipamentos em PDF (folhas A4 de etiquetas).
+
+Cada etiqueta: QR Code do código interno, nome, código interno e código de
+barras Code128 (do barcode cadastrado ou, na falta, do código interno).
+
+- As imagens de QR/Code128 são geradas em paralelo no pool de processos,
+  uma tarefa por página
+- Imagens ficam em cache no storage, endereçadas pelo conteúdo (reimprimir
+  o inventário não regera nada)
+- O PDF é montado em um arquivo: a tabela xref do PDF só é escrita no
+  final, então o documento é enviado a partir do disco, em blocos
+"""
+
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import io
+
+from sqlalchemy.orm import Session
+
+from app.models.equipment import Equipment
+from app.services.images import get_image_pool
+from app.services.storage import StorageBackend, get_storage
+
+
+# Muda quando os parâmetros de geração mudam (invalida o cache)
+CODES_VERSION = "v1"
+
+MAX_LABELS = 5000
+
+
+@dataclass(frozen=True)
+class LabelLayout:
+    """Folha de etiquetas (medidas em mm)"""
+    columns: int
+    rows: int
+    label_width: float
+    label_height: float
+    margin_left: float
+    margin_top: float
+    gap_x: float = 0
+    gap_y: float = 0
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+
+LAYOUTS = {
+    # Pimaco A4356 / similares: 3 x 11, 63,5 x 25,4 mm
+    "a4-3x11": LabelLayout(3, 11, 63.5, 25.4, 7.2, 8.8, gap_x=2.5),
+    # Pimaco A4361: 3 x 7, 63,5 x 38,1 mm
+    "a4-3x7": LabelLayout(3, 7, 63.5, 38.1, 7.2, 15.1, gap_x=2.5),
+    # 2 x 5, 99 x 55 mm (etiquetas maiores para máquinas)
+    "a4-2x5": LabelLayout(2, 5, 99.0, 55.0, 6.0, 11.0, gap_x=0),
+}
+
+
+@dataclass(frozen=True)
+class LabelData:
+    name: str
+    internal_code: str
+    barcode: Optional[str] = None
+
+    @property
+    def barcode_payload(self) -> str:
+        return self.barcode or self.internal_code
+
+
+def _cache_key(kind: str, payload: str) -> str:
+    digest = hashlib.sha1(f"{kind}|{CODES_VERSION}|{payload}".encode()).hexdigest()
+    return f"labels/{kind}/{digest[:2]}/{digest}.png"
+
+
+def render_codes(payloads: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    """
+    PNGs de QR Code e Code128 para uma página de etiquetas.
+    Executa no pool de processos.
+    """
+    import qrcode
+    from barcode import Code128
+    from barcode.writer import ImageWriter
+
+    images = []
+    for qr_payload, barcode_payload in payloads:
+        qr = qrcode.QRCode(border=1, box_size=6, error_correction=qrcode.constants.ERROR_CORRECT_M)
+        qr.add_data(qr_payload)
+        qr.make(fit=True)
+        qr_png = io.BytesIO()
+        qr.make_image().save(qr_png, "PNG")
+
+        barcode_png = io.BytesIO()
+        Code128(barcode_payload, writer=ImageWriter()).write(barcode_png, options={
+            "module_width": 0.25, "module_height": 8, "quiet_zone": 1,
+            "write_text": False, "dpi": 300,
+        })
+
+        images.append((qr_png.getvalue(), barcode_png.getvalue()))
+    return images
+
+
+def _code_images(labels: List[LabelData], per_page: int, storage: StorageBackend, workers: Optional[int]):
+    """
+    Imagens de cada etiqueta, na ordem, página a página.
+    Cache hits são lidos direto; só as faltantes vão para o pool.
+    """
+    pool = get_image_pool(workers)
+
+    for start in range(0, len(labels), per_page * 8):
+        window = labels[start:start + per_page * 8]
+        keys = [(_cache_key("qr", label.internal_code), _cache_key("code128", label.barcode_payload)) for label in window]
+
+        cached: Dict[str, bytes] = {}
+        missing = []
+        for label, (qr_key, barcode_key) in zip(window, keys):
+            pending = [key for key in (qr_key, barcode_key) if key not in cached]
+            if not all(storage.exists(key) for key in pending):
+                missing.append((label, qr_key, barcode_key))
+                continue
+            for key in pending:
+                with storage.open(key) as f:
+                    cached[key] = f.read()
+
+        # Uma tarefa por página de etiquetas faltantes
+        chunks = [missing[i:i + per_page] for i in range(0, len(missing), per_page)]
+        results = pool.map(
+            render_codes,
+            [[(label.internal_code, label.barcode_payload) for label, _, _ in chunk] for chunk in chunks]
+        )
+        for chunk, images in zip(chunks, results):
+            for (_, qr_key, barcode_key), (qr_png, barcode_png) in zip(chunk, images):
+                storage.save_bytes(qr_key, qr_png, "image/png")
+                storage.save_bytes(barcode_key, barcode_png, "image/png")
+                cached[qr_key], cached[barcode_key] = qr_png, barcode_png
+
+        for qr_key, barcode_key in keys:
+            yield cached[qr_key], cached[barcode_key]
+
+
+def _fit_text(text: str, font: str, size: float, max_width: float) -> str:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    if stringWidth(text, font, size) <= max_width:
+        return text
+    while text and stringWidth(text + "…", font, size) > max_width:
+        text = text[:-1]
+    return text + "…"
+
+
+def write_labels_pdf(
+    labels: Iterable[LabelData],
+    output: BinaryIO,
+    layout: str = "a4-3x11",
+    workers: Optional[int] = None,
+    storage: Optional[StorageBackend] = None,
+) -> int:
+    """Escreve o PDF das etiquetas em `output` e retorna o número de páginas"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    sheet = LAYOUTS[layout]
+    labels = list(labels)
+    storage = storage or get_storage()
+
+    pdf = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+    pdf.setTitle("Etiquetas de equipamentos")
+    page_width, page_height = A4
+
+    width, height = sheet.label_width * mm, sheet.label_height * mm
+    padding = 1.5 * mm
+    qr_size = height - 2 * padding
+    text_x_offset = qr_size + 2 * padding
+    text_width = width - text_x_offset - padding
+    name_size = 8 if height > 30 * mm else 7
+
+    pages = 0
+    images = _code_images(labels, sheet.per_page, storage, workers)
+    for index, (label, (qr_png, barcode_png)) in enumerate(zip(labels, images)):
+        slot = index % sheet.per_page
+        if slot == 0 and index:
+            pdf.showPage()
+        if slot == 0:
+            pages += 1
+
+        column, row = slot % sheet.columns, slot // sheet.columns
+        x = (sheet.margin_left + column * (sheet.label_width + sheet.gap_x)) * mm
+        y = page_height - (sheet.margin_top + (row + 1) * sheet.label_height + row * sheet.gap_y) * mm
+
+        pdf.drawImage(ImageReader(io.BytesIO(qr_png)), x + padding, y + padding, qr_size, qr_size)
+
+        text_x = x + text_x_offset
+        pdf.setFont("Helvetica-Bold", name_size)
+        pdf.drawString(text_x, y + height - padding - name_size, _fit_text(label.name, "Helvetica-Bold", name_size, text_width))
+        pdf.setFont("Helvetica", name_size - 1)
+        pdf.drawString(text_x, y + height - padding - 2 * name_size - 1, label.internal_code)
+
+        barcode_height = min(height * 0.4, 12 * mm)
+        pdf.drawImage(ImageReader(io.BytesIO(barcode_png)), text_x, y + padding, text_width, barcode_height)
+
+    pdf.save()
+    return pages
+
+
+def load_labels(db: Session, conditions: list, limit: Optional[int] = None) -> List[LabelData]:
+    """Dados das etiquetas (só as colunas usadas), em ordem de código interno"""
+    query = (
+        db.query(Equipment.name, Equipment.internal_code, Equipment.barcode)
+        .filter(*conditions)
+        .order_by(Equipment.internal_code)
+    )
+    if limit:
+        query = query.limit(limit)
+    return [LabelData(name, internal_code, barcode) for name, internal_code, barcode in query.all()]
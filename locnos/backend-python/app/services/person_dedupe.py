@@ -0,0 +1,430 @@
+"""
+Deduplicação de pessoas.
+
+Comparar todos contra todos é O(n²); o job agrupa os cadastros por chaves
+de bloqueio e só compara pares dentro do mesmo bloco:
+- telefone/WhatsApp normalizado (só dígitos, sem DDI 55)
+- email em minúsculas
+- chave fonética do nome (primeiro + último termo significativo de nome,
+  razão social e fantasia: "João da Silva" = "Joao Silva" = "JOAO SILVA ME")
+- CEP + número do endereço
+
+Blocos muito grandes (ex.: telefone genérico repetido em centenas de
+cadastros) são ignorados. Cada par recebe um score (semelhança dos nomes
+com rapidfuzz + evidências em comum) e os acima do limiar vão para a fila
+de revisão (pessoas_duplicatas).
+
+A mescla reaponta em UPDATEs set-based todas as FKs que referenciam
+pessoas (contratos, pedidos, rotas...) para o cadastro mantido.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+import re
+import time
+
+from rapidfuzz import fuzz
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache
+from app.core.database import Base
+from app.core.search import digits_only, normalize_text
+from app.models.person import Person, PersonStatus
+from app.models.person_duplicate import PersonDuplicate, DuplicateStatus
+
+
+# Score mínimo para entrar na fila de revisão
+DEFAULT_THRESHOLD = 0.6
+
+# Blocos maiores que isso não são comparados (chave pouco discriminante)
+MAX_BLOCK_SIZE = 50
+
+# Peso da semelhança de nomes e das evidências (somadas até completar 1.0)
+NAME_WEIGHT = 0.55
+EVIDENCE_WEIGHTS = {"telefone": 0.2, "email": 0.25, "endereco": 0.15}
+
+# Termos ignorados na chave fonética e na comparação de nomes
+_STOPWORDS = frozenset({
+    "da", "de", "do", "das", "dos", "e",
+    "ltda", "me", "epp", "eireli", "sa", "s/a", "mei", "cia", "filho", "junior", "jr", "neto",
+})
+
+# Regras fonéticas simplificadas para português (aplicadas em ordem)
+_PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"[cs]h"), "x"),
+    (re.compile(r"lh"), "l"),
+    (re.compile(r"nh"), "n"),
+    (re.compile(r"ç"), "s"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"qu(?=[ei])"), "k"),
+    (re.compile(r"[cq]"), "k"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+_NAME_FIELDS = ("full_name", "company_name", "trade_name")
+
+
+def _name_tokens(name: Optional[str]) -> List[str]:
+    """Termos significativos do nome, sem acentos e sem pontuação"""
+    return [
+        token for token in re.split(r"[^a-z0-9]+", normalize_text(name or ""))
+        if token and token not in _STOPWORDS
+    ]
+
+
+def _phonetic(token: str) -> str:
+    for pattern, replacement in _PHONETIC_RULES:
+        token = pattern.sub(replacement, token)
+    return token
+
+
+def phonetic_key(name: Optional[str]) -> Optional[str]:
+    """Primeiro + último termo em forma fonética ("Luíza Souza" -> "luisa sousa")"""
+    tokens = _name_tokens(name)
+    if not tokens:
+        return None
+    first, last = _phonetic(tokens[0]), _phonetic(tokens[-1])
+    return first if len(tokens) == 1 else f"{first} {last}"
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """Telefone só com dígitos, sem DDI 55 nem zero de operadora"""
+    digits = digits_only(phone)
+    if len(digits) > 11 and digits.startswith("55"):
+        digits = digits[2:]
+    digits = digits.lstrip("0")
+    # Números de teste/placeholder (todos os dígitos iguais) não identificam ninguém
+    if len(digits) < 8 or len(set(digits)) == 1:
+        return None
+    return digits
+
+
+def _address_key(address) -> Optional[str]:
+    if not isinstance(address, dict):
+        return None
+    cep = digits_only(str(address.get("cep") or ""))
+    number = digits_only(str(address.get("number") or ""))
+    return f"{cep}:{number}" if len(cep) == 8 and number else None
+
+
+@dataclass
+class _Candidate:
+    """Dados mínimos de uma pessoa para comparação"""
+    id: UUID
+    cpf: Optional[str]
+    cnpj: Optional[str]
+    names: Tuple[str, ...]
+    keys: Dict[str, Set[str]]
+
+
+@dataclass
+class DedupeReport:
+    """Resumo de uma execução do job"""
+    persons: int = 0
+    blocks: int = 0
+    skipped_blocks: int = 0
+    comparisons: int = 0
+    candidates: int = 0
+    removed: int = 0
+    elapsed: float = 0.0
+    top: List[dict] = field(default_factory=list)
+
+
+def _load_candidates(db: Session) -> List[_Candidate]:
+    """Pessoas ativas (só as colunas usadas), lidas em streaming"""
+    rows = db.execute(
+        select(
+            Person.id, Person.cpf, Person.cnpj, Person.full_name, Person.company_name,
+            Person.trade_name, Person.email, Person.phone, Person.whatsapp, Person.address,
+        )
+        .where(Person.active == True, Person.merged_into_id.is_(None))
+        .execution_options(yield_per=5000)
+    )
+
+    candidates = []
+    for row in rows:
+        names = tuple(
+            " ".join(_name_tokens(getattr(row, name_field)))
+            for name_field in _NAME_FIELDS
+            if getattr(row, name_field)
+        )
+        keys = {
+            "telefone": {key for key in (phone_key(row.phone), phone_key(row.whatsapp)) if key},
+            "email": {row.email.strip().lower()} if row.email else set(),
+            "nome": {key for key in (phonetic_key(getattr(row, name_field)) for name_field in _NAME_FIELDS) if key},
+            "endereco": {key for key in (_address_key(row.address),) if key},
+        }
+        candidates.append(_Candidate(row.id, row.cpf, row.cnpj, tuple(name for name in names if name), keys))
+    return candidates
+
+
+def _conflicting_documents(a: _Candidate, b: _Candidate) -> bool:
+    """Documentos diferentes preenchidos nos dois: pessoas distintas com certeza"""
+    return bool((a.cpf and b.cpf and a.cpf != b.cpf) or (a.cnpj and b.cnpj and a.cnpj != b.cnpj))
+
+
+def score_pair(a: _Candidate, b: _Candidate) -> Tuple[float, List[str]]:
+    """Score 0..1 e as chaves em comum"""
+    reasons = [kind for kind in ("telefone", "email", "nome", "endereco") if a.keys[kind] & b.keys[kind]]
+    name_similarity = max(
+        (fuzz.token_set_ratio(name_a, name_b) / 100 for name_a in a.names for name_b in b.names),
+        default=0.0,
+    )
+    evidence = min(1 - NAME_WEIGHT, sum(EVIDENCE_WEIGHTS.get(reason, 0.0) for reason in reasons))
+    return round(NAME_WEIGHT * name_similarity + evidence, 4), reasons
+
+
+def find_duplicate_pairs(
+    candidates: List[_Candidate],
+    threshold: float = DEFAULT_THRESHOLD,
+    report: Optional[DedupeReport] = None,
+) -> Dict[Tuple[UUID, UUID], Tuple[float, List[str]]]:
+    """Pares (a < b) com score >= threshold, comparando só dentro dos blocos"""
+    report = report if report is not None else DedupeReport()
+
+    blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for index, candidate in enumerate(candidates):
+        for kind, keys in candidate.keys.items():
+            for key in keys:
+                blocks[(kind, key)].append(index)
+
+    pairs: Dict[Tuple[UUID, UUID], Tuple[float, List[str]]] = {}
+    compared: Set[Tuple[int, int]] = set()
+
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            report.skipped_blocks += 1
+            continue
+        report.blocks += 1
+
+        for i, j in combinations(members, 2):
+            if (i, j) in compared:
+                continue
+            compared.add((i, j))
+            a, b = candidates[i], candidates[j]
+            if _conflicting_documents(a, b):
+                continue
+            score, reasons = score_pair(a, b)
+            if score >= threshold:
+                pairs[(a.id, b.id) if str(a.id) < str(b.id) else (b.id, a.id)] = (score, reasons)
+
+    report.comparisons += len(compared)
+    return pairs
+
+
+def run_dedupe(db: Session, threshold: float = DEFAULT_THRESHOLD, dry_run: bool = False) -> DedupeReport:
+    """
+    Executa o job completo e grava a fila de revisão.
+
+    Pares pendentes são atualizados (score/motivos); pares já descartados ou
+    mesclados não são reabertos. Pendentes que não foram mais detectados
+    (cadastro corrigido/inativado) saem da fila.
+    """
+    started = time.perf_counter()
+    report = DedupeReport()
+
+    candidates = _load_candidates(db)
+    report.persons = len(candidates)
+    pairs = find_duplicate_pairs(candidates, threshold, report)
+    report.candidates = len(pairs)
+    report.top = [
+        {"person_a_id": a, "person_b_id": b, "score": score, "reasons": reasons}
+        for (a, b), (score, reasons) in sorted(pairs.items(), key=lambda item: -item[1][0])[:20]
+    ]
+
+    if not dry_run:
+        rows = [
+            {"person_a_id": a, "person_b_id": b, "score": score, "reasons": reasons}
+            for (a, b), (score, reasons) in pairs.items()
+        ]
+        table = PersonDuplicate.__table__
+        for start in range(0, len(rows), 1000):
+            stmt = insert(table).values(rows[start:start + 1000])
+            db.execute(stmt.on_conflict_do_update(
+                constraint="uq_pessoas_duplicatas_par",
+                set_={
+                    "score": stmt.excluded.score,
+                    "reasons": stmt.excluded.reasons,
+                    "detected_at": func.now(),
+                },
+                where=table.c.status == DuplicateStatus.PENDING,
+            ))
+
+        # Mesma transação do upsert: now() é o mesmo instante gravado em
+        # detected_at, então só saem os pendentes não detectados nesta execução
+        report.removed = db.execute(
+            delete(PersonDuplicate)
+            .where(
+                PersonDuplicate.status == DuplicateStatus.PENDING,
+                PersonDuplicate.detected_at < func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# ============================================================================
+# MESCLA
+# ============================================================================
+
+class MergeError(Exception):
+    """Mescla inválida (pessoa inexistente, já mesclada, alvo entre as origens...)"""
+
+
+# Campos copiados das origens quando vazios no cadastro mantido
+_FILL_FIELDS = (
+    "full_name", "rg", "company_name", "trade_name", "state_registration", "municipal_registration",
+    "email", "whatsapp", "address", "notes", "employee_data", "driver_data", "supplier_data",
+    "partner_data", "customer_since",
+)
+
+
+# Tags do cache de respostas derivadas de cada tabela reapontada na mescla
+_REPOINT_CACHE_TAGS = {
+    "contratos": ("analytics",),
+}
+
+
+def _person_references():
+    """Colunas de outras tabelas (e da própria pessoas) com FK para pessoas.id"""
+    person_id = Person.__table__.c.id
+    return [
+        fk.parent
+        for table in Base.metadata.sorted_tables
+        if table is not PersonDuplicate.__table__
+        for fk in table.foreign_keys
+        if fk.column is person_id
+    ]
+
+
+def merge_persons(db: Session, target_id: UUID, source_ids: Iterable[UUID], user_id: Optional[UUID] = None) -> dict:
+    """
+    Mescla as origens no cadastro `target_id` numa única transação.
+
+    - Reaponta as FKs (Contract.customer_id, Pedido.cliente_id, rotas...)
+      com um UPDATE por coluna; tabelas versionadas (contratos) têm a
+      version incrementada, invalidando ETags e o If-Match de quem as lia
+    - Completa campos vazios do alvo, une os tipos e soma os totais
+    - Origens ficam inativas, sem documento e com merged_into_id = alvo
+
+    Returns:
+        dict: {"target": Person, "merged": [ids], "repointed": {"tabela.coluna": linhas}}
+    """
+    source_ids = list(dict.fromkeys(source_ids))
+    if not source_ids:
+        raise MergeError("Informe ao menos uma pessoa de origem")
+    if target_id in source_ids:
+        raise MergeError("A pessoa mantida não pode estar entre as origens")
+
+    # Trava as linhas envolvidas (ordem fixa evita deadlock entre mesclas)
+    persons = {
+        person.id: person
+        for person in db.query(Person)
+        .filter(Person.id.in_([target_id, *source_ids]))
+        .order_by(Person.id)
+        .with_for_update()
+    }
+    target = persons.get(target_id)
+    if target is None:
+        raise MergeError("Pessoa mantida não encontrada")
+    missing = [str(source_id) for source_id in source_ids if source_id not in persons]
+    if missing:
+        raise MergeError(f"Pessoa(s) não encontrada(s): {', '.join(missing)}")
+    if target.merged_into_id:
+        raise MergeError("A pessoa mantida já foi mesclada em outro cadastro")
+    sources = [persons[source_id] for source_id in source_ids]
+    already = [str(source.id) for source in sources if source.merged_into_id]
+    if already:
+        raise MergeError(f"Pessoa(s) já mesclada(s): {', '.join(already)}")
+
+    # 1) FKs: um UPDATE set-based por coluna
+    repointed = {}
+    for column in _person_references():
+        values = {column.name: target_id}
+        if "version" in column.table.c:
+            values["version"] = column.table.c.version + 1
+        result = db.execute(
+            update(column.table)
+            .where(column.in_(source_ids))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            repointed[f"{column.table.name}.{column.name}"] = result.rowcount
+
+    # 2) Documentos são únicos: libera nas origens antes de passar ao alvo
+    documents = {
+        "cpf": target.cpf or next((source.cpf for source in sources if source.cpf), None),
+        "cnpj": target.cnpj or next((source.cnpj for source in sources if source.cnpj), None),
+    }
+    for source in sources:
+        source.open_exposure = 0
+        source.open_contracts = 0
+        source.cpf = None
+        source.cnpj = None
+        source.active = False
+        source.status = PersonStatus.INACTIVE
+        source.merged_into_id = target.id
+        source.updated_by_id = user_id
+    db.flush()
+
+    # 3) Alvo: campos vazios, tipos, totais e documentos
+    for name in _FILL_FIELDS:
+        if not getattr(target, name):
+            donor = next((source for source in sources if getattr(source, name)), None)
+            if donor:
+                setattr(target, name, getattr(donor, name))
+                if name == "address":
+                    # Coordenadas acompanham o endereço
+                    target.latitude, target.longitude = donor.latitude, donor.longitude
+                    target.geocoded_at = donor.geocoded_at
+    target.types = list(dict.fromkeys([*(target.types or []), *(t for source in sources for t in source.types or [])]))
+    target.total_rentals = (target.total_rentals or 0) + sum(source.total_rentals or 0 for source in sources)
+    target.total_spent = (target.total_spent or 0) + sum(source.total_spent or 0 for source in sources)
+    # Contratos em aberto das origens agora são do alvo
+    target.open_exposure = (target.open_exposure or 0) + sum(source.open_exposure or 0 for source in sources)
+    target.open_contracts = (target.open_contracts or 0) + sum(source.open_contracts or 0 for source in sources)
+    target.defaulter = target.defaulter or any(source.defaulter for source in sources)
+    target.cpf, target.cnpj = documents["cpf"], documents["cnpj"]
+    target.updated_by_id = user_id
+
+    # 4) Fila de revisão: pares do grupo viram "merged"; outros pendentes das
+    #    origens saem (o próximo job compara de novo contra o alvo)
+    group = [target_id, *source_ids]
+    db.execute(
+        update(PersonDuplicate)
+        .where(PersonDuplicate.person_a_id.in_(group), PersonDuplicate.person_b_id.in_(group))
+        .values(status=DuplicateStatus.MERGED, reviewed_by_id=user_id, reviewed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(PersonDuplicate)
+        .where(
+            PersonDuplicate.status == DuplicateStatus.PENDING,
+            or_(PersonDuplicate.person_a_id.in_(source_ids), PersonDuplicate.person_b_id.in_(source_ids)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    db.commit()
+    tags = {tag for name in repointed for tag in _REPOINT_CACHE_TAGS.get(name.split(".")[0], ())}
+    if tags:
+        response_cache.invalidate(*tags)
+    db.refresh(target)
+    return {"target": target, "merged": source_ids, "repointed": repointed}
@@ -0,0 +1,63 @@
+"""
+Busca de pessoas (nome, razão social, fantasia, email, CPF e CNPJ).
+
+A entrada é normalizada em Python do mesmo jeito que no banco:
+- parece documento ("123.456", "12.345.678/0001") -> só dígitos, casados por
+  prefixo em cpf/cnpj (btree varchar_pattern_ops: LIKE '123456%')
+- texto -> minúsculas sem acentos, casado na coluna gerada searchText por
+  substring (LIKE '%joao%') ou por semelhança de palavra (pg_trgm, tolera
+  erro de digitação); ambos usam o GIN trigram
+
+O ranking ordena documentos exatos primeiro, depois prefixos de documento e
+então pela semelhança (word_similarity) com o texto buscado.
+"""
+
+from typing import Optional, Tuple
+import re
+
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.sql import ColumnElement
+
+from app.core.search import digits_only, escape_like, normalize_text
+from app.models.person import Person
+
+
+# Dígitos com a pontuação usual de CPF/CNPJ
+_DOCUMENT_PATTERN = re.compile(r"^[\d.\-/\s]+$")
+
+# Prefixo mínimo de documento (evita varrer o índice inteiro com "1")
+MIN_DOCUMENT_DIGITS = 3
+
+# Abaixo disso a semelhança trigram não tem trigramas suficientes
+MIN_FUZZY_LENGTH = 3
+
+
+def person_search_terms(search: str) -> Optional[Tuple[ColumnElement, ColumnElement]]:
+    """
+    Condição e ranking da busca.
+
+    Returns:
+        (condição, rank) ou None se a busca normalizada ficar vazia
+    """
+    search = (search or "").strip()
+
+    digits = digits_only(search)
+    if len(digits) >= MIN_DOCUMENT_DIGITS and _DOCUMENT_PATTERN.match(search):
+        prefix = f"{digits}%"
+        condition = or_(Person.cpf.like(prefix), Person.cnpj.like(prefix))
+        rank = case(
+            (or_(Person.cpf == digits, Person.cnpj == digits), 2.0),
+            else_=1.0,
+        )
+        return condition, rank
+
+    text = normalize_text(search)
+    if not text:
+        return None
+
+    conditions = [Person.search_text.like(f"%{escape_like(text)}%")]
+    if len(text) >= MIN_FUZZY_LENGTH:
+        # :text <% searchText (semelhança com alguma palavra do cadastro)
+        conditions.append(Person.search_text.op("%>")(text))
+    rank = func.word_similarity(literal(text), Person.search_text)
+    return or_(*conditions), rank
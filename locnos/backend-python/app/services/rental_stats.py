@@ -0,0 +1,302 @@
+"""
+Estatísticas de locação de Equipamentos e Pessoas
+
+Os contadores (quantity_rented, total_rentals, total_revenue...) são mantidos
+de forma incremental pelas transições de status do contrato, com updates
+atômicos `col = col + :delta` na mesma transação. A reconciliação recalcula
+tudo a partir de contratos/itens em uma única passada set-based.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, case, or_, distinct
+from collections import defaultdict
+from decimal import Decimal
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.models import Contract, ContractItem, ContractStatus, Equipment, Person
+
+
+def _inc(column, delta):
+    """Expressão `COALESCE(col, 0) + delta` (linhas antigas podem ter NULL)"""
+    return func.coalesce(column, 0) + delta
+
+
+def _available(reserved, rented):
+    """
+    Unidades disponíveis = total - reservadas - locadas - em manutenção, nunca
+    negativo. Mesma fórmula da reconciliação, aplicada às contagens já
+    atualizadas (uma reserva acima do estoque não deixa o disponível negativo).
+    """
+    return func.greatest(
+        0, Equipment.quantity_total - reserved - rented - func.coalesce(Equipment.quantity_maintenance, 0)
+    )
+
+
+def _utilization_expr(days_rented):
+    """
+    Taxa de utilização (%) = unidade-dias locados / unidade-dias possuídos.
+    Usa a data de aquisição (ou de cadastro) como início da posse.
+    """
+    days_owned = func.greatest(
+        1,
+        func.date_part("day", func.now() - func.coalesce(Equipment.acquisition_date, Equipment.created_at))
+    )
+    capacity = days_owned * func.greatest(Equipment.quantity_total, 1)
+    return func.least(100, func.round(days_rented * 100.0 / capacity, 2))
+
+
+def apply_contract_transition(
+    db: Session,
+    contract: Contract,
+    old_status: ContractStatus,
+    new_status: ContractStatus,
+    now: Optional[datetime] = None,
+) -> None:
+    """
+    Aplica os deltas de uma transição de status aos contadores.
+
+    - -> APROVADO: reserva as unidades
+    - APROVADO -> ATIVO: reserva vira locação; conta uma locação
+    - ATIVO -> FINALIZADO: devolve as unidades; soma dias e receita
+    - APROVADO/ATIVO -> CANCELADO: devolve as unidades
+
+    `now` é o mesmo instante gravado no contrato (activated_at, UTC sem fuso),
+    para que last_rental_date bata com max(activated_at) na reconciliação.
+
+    Não faz commit.
+    """
+    now = now or datetime.utcnow()
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+
+    # Agrupar itens por equipamento (o mesmo equipamento pode aparecer 2x)
+    quantities = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    for item in contract.items:
+        quantities[item.equipment_id] += item.quantity
+        revenue[item.equipment_id] += item.subtotal or Decimal(0)
+
+    for equipment_id, quantity in quantities.items():
+        values = {}
+        reserved_delta = rented_delta = 0
+
+        if new_status == ContractStatus.APROVADO:
+            reserved_delta = quantity
+        elif old_status == ContractStatus.APROVADO and new_status == ContractStatus.ATIVO:
+            reserved_delta, rented_delta = -quantity, quantity
+            values = {
+                "total_rentals": _inc(Equipment.total_rentals, 1),
+                "last_rental_date": now,
+            }
+        elif old_status == ContractStatus.ATIVO and new_status == ContractStatus.FINALIZADO:
+            rented_delta = -quantity
+            unit_days = quantity * (contract.total_days or 0)
+            values = {
+                "total_days_rented": _inc(Equipment.total_days_rented, unit_days),
+                "total_revenue": _inc(Equipment.total_revenue, revenue[equipment_id]),
+                "utilization_rate": _utilization_expr(_inc(Equipment.total_days_rented, unit_days)),
+            }
+        elif new_status == ContractStatus.CANCELADO and old_status == ContractStatus.APROVADO:
+            reserved_delta = -quantity
+        elif new_status == ContractStatus.CANCELADO and old_status == ContractStatus.ATIVO:
+            rented_delta = -quantity
+
+        if reserved_delta or rented_delta:
+            reserved = _inc(Equipment.quantity_reserved, reserved_delta)
+            rented = _inc(Equipment.quantity_rented, rented_delta)
+            values["quantity_reserved"] = reserved
+            values["quantity_rented"] = rented
+            values["quantity_available"] = _available(reserved, rented)
+
+        if not values:
+            continue
+
+        # A representação mudou: nova versão invalida ETags antigos
+        values["version"] = Equipment.version + 1
+
+        db.execute(
+            update(Equipment)
+            .where(Equipment.id == equipment_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    # Cliente
+    person_values = {}
+    if old_status == ContractStatus.APROVADO and new_status == ContractStatus.ATIVO:
+        person_values = {"total_rentals": _inc(Person.total_rentals, 1)}
+    elif old_status == ContractStatus.ATIVO and new_status == ContractStatus.FINALIZADO:
+        person_values = {"total_spent": _inc(Person.total_spent, contract.total_value or 0)}
+
+    if person_values:
+        person_values["version"] = Person.version + 1
+        db.execute(
+            update(Person)
+            .where(Person.id == contract.customer_id)
+            .values(**person_values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+# ============================================================================
+# RECONCILIAÇÃO
+# ============================================================================
+
+def _expected_equipment_stats():
+    """Subquery com os valores esperados por equipamento, calculados da fonte"""
+    items = (
+        select(
+            ContractItem.equipment_id.label("equipment_id"),
+            func.sum(case((Contract.status == ContractStatus.APROVADO, ContractItem.quantity), else_=0)).label("reserved"),
+            func.sum(case((Contract.status == ContractStatus.ATIVO, ContractItem.quantity), else_=0)).label("rented"),
+            func.count(distinct(case((Contract.activated_at.isnot(None), Contract.id)))).label("rentals"),
+            func.sum(case(
+                (Contract.status == ContractStatus.FINALIZADO, ContractItem.quantity * Contract.total_days), else_=0
+            )).label("days_rented"),
+            func.sum(case(
+                (Contract.status == ContractStatus.FINALIZADO, ContractItem.subtotal), else_=0
+            )).label("revenue"),
+            # activated_at é UTC sem fuso; last_rental_date é timestamptz
+            func.timezone("UTC", func.max(Contract.activated_at)).label("last_rental"),
+        )
+        .join(Contract, ContractItem.contract_id == Contract.id)
+        .where(Contract.deleted_at.is_(None))
+        .group_by(ContractItem.equipment_id)
+        .subquery()
+    )
+
+    reserved = func.coalesce(items.c.reserved, 0)
+    rented = func.coalesce(items.c.rented, 0)
+    days_rented = func.coalesce(items.c.days_rented, 0)
+
+    expected = {
+        "quantity_reserved": reserved,
+        "quantity_rented": rented,
+        "quantity_available": _available(reserved, rented),
+        "total_rentals": func.coalesce(items.c.rentals, 0),
+        "total_days_rented": days_rented,
+        "total_revenue": func.coalesce(items.c.revenue, 0),
+        "last_rental_date": items.c.last_rental,
+    }
+
+    drift = or_(*[
+        getattr(Equipment, field).is_distinct_from(expr) for field, expr in expected.items()
+    ])
+
+    return (
+        select(
+            Equipment.id.label("id"),
+            Equipment.internal_code.label("internal_code"),
+            *[getattr(Equipment, field).label(f"current_{field}") for field in expected],
+            *[expr.label(field) for field, expr in expected.items()],
+        )
+        .outerjoin(items, items.c.equipment_id == Equipment.id)
+        .where(drift)
+        .subquery()
+    ), list(expected)
+
+
+def _expected_person_stats():
+    """Subquery com total_rentals/total_spent esperados por cliente"""
+    contracts = (
+        select(
+            Contract.customer_id.label("customer_id"),
+            func.count(case((Contract.activated_at.isnot(None), Contract.id))).label("rentals"),
+            func.sum(case((Contract.status == ContractStatus.FINALIZADO, Contract.total_value), else_=0)).label("spent"),
+        )
+        .where(Contract.deleted_at.is_(None))
+        .group_by(Contract.customer_id)
+        .subquery()
+    )
+
+    expected = {
+        "total_rentals": func.coalesce(contracts.c.rentals, 0),
+        "total_spent": func.coalesce(contracts.c.spent, 0),
+    }
+
+    drift = or_(*[
+        getattr(Person, field).is_distinct_from(expr) for field, expr in expected.items()
+    ])
+
+    return (
+        select(
+            Person.id.label("id"),
+            *[getattr(Person, field).label(f"current_{field}") for field in expected],
+            *[expr.label(field) for field, expr in expected.items()],
+        )
+        .outerjoin(contracts, contracts.c.customer_id == Person.id)
+        .where(drift)
+        .subquery()
+    ), list(expected)
+
+
+def _drift_rows(db: Session, subquery, fields, key_fields):
+    """Lê as linhas divergentes e monta o relatório {campo: [atual, esperado]}"""
+    report = []
+    for row in db.execute(select(subquery)).mappings():
+        diffs = {
+            field: [row[f"current_{field}"], row[field]]
+            for field in fields
+            if row[f"current_{field}"] != row[field]
+        }
+        entry = {key: row[key] for key in key_fields}
+        entry["drift"] = diffs
+        report.append(entry)
+    return report
+
+
+def reconcile_rental_stats(db: Session, fix: bool = False) -> dict:
+    """
+    Recalcula as estatísticas de locação a partir dos contratos.
+
+    Uma query agregada por tabela encontra as linhas divergentes; com fix=True
+    cada tabela é corrigida com um único UPDATE ... FROM (subquery).
+    A taxa de utilização depende da data atual, então não entra no relatório
+    de divergências: com fix=True ela é apenas recalculada para todos.
+
+    Returns:
+        dict: {"equipment": [...], "persons": [...], "fixed": bool}
+    """
+    equipment_drift, equipment_fields = _expected_equipment_stats()
+    person_drift, person_fields = _expected_person_stats()
+
+    report = {
+        "equipment": _drift_rows(db, equipment_drift, equipment_fields, ["id", "internal_code"]),
+        "persons": _drift_rows(db, person_drift, person_fields, ["id"]),
+        "fixed": False,
+    }
+
+    if fix:
+        if report["equipment"]:
+            db.execute(
+                update(Equipment)
+                .where(Equipment.id == equipment_drift.c.id)
+                .values(
+                    version=Equipment.version + 1,
+                    **{field: equipment_drift.c[field] for field in equipment_fields}
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if report["persons"]:
+            db.execute(
+                update(Person)
+                .where(Person.id == person_drift.c.id)
+                .values(
+                    version=Person.version + 1,
+                    **{field: person_drift.c[field] for field in person_fields}
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        utilization = _utilization_expr(func.coalesce(Equipment.total_days_rented, 0))
+        db.execute(
+            update(Equipment)
+            .where(Equipment.utilization_rate.is_distinct_from(utilization))
+            .values(utilization_rate=utilization, version=Equipment.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        report["fixed"] = True
+
+    return report
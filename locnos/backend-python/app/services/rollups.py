@@ -0,0 +1,317 @@
+"""
+Séries históricas do dashboard (rollups diários).
+
+Cada métrica vira linhas (métrica, dia, dimensão) -> contagem e valor em
+dashboard_rollups, com o dia no fuso da operação. O endpoint de séries
+agrega essas linhas por dia/semana/mês sem tocar em pedidos e contratos.
+
+Atualização incremental (python -m app.rollups, ex.: a cada 5 minutos):
+1. para cada tabela de origem, lê a marca d'água (maior carimbo de
+   alteração já agregado: pedidos.atualizado_em / contratos.updated_at)
+2. coleta os dias das linhas alteradas depois dela (dia do pedido, da
+   criação e do encerramento do contrato)
+3. recalcula só esses dias (DELETE + INSERT ... SELECT agregado): mudanças
+   de status, exclusões lógicas e reprocessamentos são idempotentes
+4. avança a marca d'água
+
+A janela de leitura começa WATERMARK_OVERLAP antes da marca: transações
+longas podem confirmar linhas com carimbo anterior à última execução.
+Sem marca d'água (primeira execução) ou com --backfill, todo o histórico é
+recalculado em blocos de dias. Uma linha cuja própria data muda (ex.:
+data_pedido corrigida) sai do dia antigo só no próximo backfill: vale
+agendar um --backfill semanal além do incremental.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, String, cast, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Contract, ContractStatus, DashboardRollup, Pedido, RollupWatermark
+from app.schemas.dashboard import TimeSeriesPoint, TimeSeriesResponse
+
+
+# Fuso em que os dias são contados
+ROLLUP_TIMEZONE = "America/Sao_Paulo"
+
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+# Dias recalculados por transação no backfill
+BACKFILL_CHUNK_DAYS = 31
+
+GRANULARITIES = ("day", "week", "month")
+
+# Janela máxima por granularidade (limita a quantidade de pontos)
+MAX_WINDOW_DAYS = {"day": 366, "week": 366 * 3, "month": 366 * 10}
+
+
+@dataclass(frozen=True)
+class RollupMetric:
+    """Como uma métrica é calculada a partir da tabela de origem"""
+    name: str
+    timestamp: object          # carimbo que define o dia (filtro por intervalo)
+    dimension: object          # expressão da dimensão (status ou "all")
+    value: object              # valor somado
+    conditions: tuple = ()
+    naive_utc: bool = False    # carimbo sem fuso gravado em UTC (contratos)
+
+    @property
+    def day(self):
+        stamp = func.timezone("UTC", self.timestamp) if self.naive_utc else self.timestamp
+        return cast(func.timezone(ROLLUP_TIMEZONE, stamp), Date)
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """Tabela de origem: carimbo de alteração e métricas derivadas dela"""
+    name: str
+    changed_at: object
+    metrics: Tuple[RollupMetric, ...]
+    naive_utc: bool = False
+
+
+def _status(column):
+    # Enums são gravados pelo nome (ATIVO); a dimensão usa o valor (ativo)
+    return func.lower(cast(column, String))
+
+
+_closed_at = func.coalesce(Contract.finished_at, Contract.cancelled_at)
+
+SOURCES: Dict[str, RollupSource] = {
+    "pedidos": RollupSource(
+        name="pedidos",
+        changed_at=Pedido.atualizado_em,
+        metrics=(
+            # Pedidos por dia do pedido e status atual
+            RollupMetric(
+                "orders", Pedido.data_pedido, _status(Pedido.status), Pedido.valor_total,
+                (Pedido.ativo.is_(True),),
+            ),
+        ),
+    ),
+    "contratos": RollupSource(
+        name="contratos",
+        changed_at=Contract.updated_at,
+        naive_utc=True,
+        metrics=(
+            RollupMetric(
+                "contracts_created", Contract.created_at, literal("all"), Contract.total_value,
+                (Contract.deleted_at.is_(None),), naive_utc=True,
+            ),
+            # Finalizados (receita) e cancelados, pelo dia do encerramento
+            RollupMetric(
+                "contracts_closed", _closed_at, _status(Contract.status), Contract.total_value,
+                (
+                    Contract.deleted_at.is_(None),
+                    Contract.status.in_([ContractStatus.FINALIZADO, ContractStatus.CANCELADO]),
+                    _closed_at.isnot(None),
+                ),
+                naive_utc=True,
+            ),
+        ),
+    ),
+}
+
+# Métrica pública -> (métrica armazenada, dimensão fixa)
+TIMESERIES_METRICS = {
+    "orders": ("orders", None),
+    "contracts_created": ("contracts_created", None),
+    "contracts_closed": ("contracts_closed", None),
+    "revenue": ("contracts_closed", ContractStatus.FINALIZADO.value),
+}
+
+_METRIC_SOURCES = {metric.name: source.name for source in SOURCES.values() for metric in source.metrics}
+
+
+def local_today() -> date:
+    """Hoje no fuso em que os dias são contados"""
+    return datetime.now(ZoneInfo(ROLLUP_TIMEZONE)).date()
+
+
+def utc_bounds(start: date, end: date, naive_utc: bool) -> Tuple[datetime, datetime]:
+    """[início do dia `start`, início do dia seguinte a `end`) no fuso local, em UTC"""
+    zone = ZoneInfo(ROLLUP_TIMEZONE)
+    bounds = [
+        datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc)
+        for day in (start, end + timedelta(days=1))
+    ]
+    if naive_utc:
+        bounds = [bound.replace(tzinfo=None) for bound in bounds]
+    return bounds[0], bounds[1]
+
+
+def _recompute(db: Session, metric: RollupMetric, start: date, end: date, days: Optional[Sequence[date]] = None) -> None:
+    """Apaga e recalcula os dias [start, end] da métrica (só `days`, se informado)"""
+    stale = delete(DashboardRollup).where(
+        DashboardRollup.metric == metric.name, DashboardRollup.day.between(start, end)
+    )
+    lower, upper = utc_bounds(start, end, metric.naive_utc)
+    aggregate = select(
+        literal(metric.name),
+        metric.day,
+        metric.dimension,
+        func.count(),
+        func.coalesce(func.sum(metric.value), 0),
+    ).where(metric.timestamp >= lower, metric.timestamp < upper, *metric.conditions)
+    if days is not None:
+        stale = stale.where(DashboardRollup.day.in_(days))
+        aggregate = aggregate.where(metric.day.in_(days))
+
+    db.execute(stale)
+    db.execute(
+        insert(DashboardRollup).from_select(
+            ["metric", "day", "dimension", "count", "value"],
+            # Por posição: o fuso vai como parâmetro e repetir a expressão não casaria no GROUP BY
+            aggregate.group_by(text("2"), text("3")),
+        )
+    )
+
+
+def _save_watermark(db: Session, source: RollupSource, high_water: datetime) -> None:
+    if source.naive_utc:
+        high_water = high_water.replace(tzinfo=timezone.utc)
+    db.execute(
+        insert(RollupWatermark)
+        .values(source=source.name, high_water=high_water)
+        .on_conflict_do_update(
+            index_elements=["source"],
+            set_={"high_water": high_water, "refreshed_at": func.now()},
+        )
+    )
+
+
+def _max_changed_at(db: Session, source: RollupSource) -> Optional[datetime]:
+    return db.execute(select(func.max(source.changed_at))).scalar()
+
+
+def backfill_source(
+    db: Session,
+    source: RollupSource,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    chunk_days: int = BACKFILL_CHUNK_DAYS,
+) -> int:
+    """
+    Recalcula todos os dias (ou [start, end]) da origem, um bloco por transação.
+    Só o recálculo completo grava a marca d'água.
+
+    Returns:
+        int: dias cobertos
+    """
+    # Lida antes: o que mudar durante o backfill entra na próxima execução incremental
+    high_water = _max_changed_at(db, source)
+    full = start is None and end is None
+    if start is None:
+        firsts = [
+            db.execute(select(func.min(metric.day)).where(*metric.conditions)).scalar()
+            for metric in source.metrics
+        ]
+        firsts = [first for first in firsts if first is not None]
+        start = min(firsts) if firsts else local_today()
+    end = end or local_today()
+
+    day = start
+    while day <= end:
+        chunk_end = min(end, day + timedelta(days=chunk_days - 1))
+        for metric in source.metrics:
+            _recompute(db, metric, day, chunk_end)
+        db.commit()
+        day = chunk_end + timedelta(days=1)
+
+    if full and high_water is not None:
+        _save_watermark(db, source, high_water)
+        db.commit()
+    return max((end - start).days + 1, 0)
+
+
+def refresh_source(db: Session, source: RollupSource) -> int:
+    """
+    Execução incremental: recalcula só os dias tocados desde a marca d'água.
+
+    Returns:
+        int: dias recalculados
+    """
+    watermark = db.get(RollupWatermark, source.name)
+    if watermark is None:
+        return backfill_source(db, source)
+
+    high_water = _max_changed_at(db, source)
+    since = watermark.high_water - WATERMARK_OVERLAP
+    if source.naive_utc:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    days = set()
+    for metric in source.metrics:
+        days.update(
+            day for (day,) in db.execute(
+                select(metric.day).distinct().where(source.changed_at > since, metric.timestamp.isnot(None))
+            )
+        )
+
+    if days:
+        ordered = sorted(days)
+        for metric in source.metrics:
+            _recompute(db, metric, ordered[0], ordered[-1], ordered)
+    if high_water is not None:
+        _save_watermark(db, source, high_water)
+    db.commit()
+    return len(days)
+
+
+def refresh_rollups(db: Session, sources: Optional[List[str]] = None, backfill: bool = False, **options) -> Dict[str, int]:
+    """Atualiza as origens informadas (todas por padrão): {origem: dias recalculados}"""
+    report = {}
+    for name in sources or SOURCES:
+        source = SOURCES[name]
+        report[name] = backfill_source(db, source, **options) if backfill else refresh_source(db, source)
+    return report
+
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+def default_window(granularity: str, end: date) -> date:
+    """Início padrão: 30 dias, 12 semanas ou 12 meses"""
+    if granularity == "day":
+        return end - timedelta(days=29)
+    if granularity == "week":
+        return end - timedelta(weeks=11, days=end.weekday())
+    return (end.replace(day=1) - timedelta(days=335)).replace(day=1)
+
+
+def read_timeseries(db: Session, metric: str, granularity: str, start: date, end: date) -> TimeSeriesResponse:
+    """Série lida só dos rollups, agregada por dia, semana (segunda-feira) ou mês"""
+    stored, dimension = TIMESERIES_METRICS[metric]
+    period = cast(func.date_trunc(granularity, DashboardRollup.day), Date)
+
+    query = (
+        select(
+            period.label("period"),
+            DashboardRollup.dimension,
+            func.sum(DashboardRollup.count).label("count"),
+            func.sum(DashboardRollup.value).label("value"),
+        )
+        .where(DashboardRollup.metric == stored, DashboardRollup.day.between(start, end))
+        .group_by(text("1"), text("2"))
+        .order_by(text("1"), text("2"))
+    )
+    if dimension is not None:
+        query = query.where(DashboardRollup.dimension == dimension)
+
+    watermark = db.get(RollupWatermark, _METRIC_SOURCES[stored])
+    return TimeSeriesResponse(
+        metric=metric,
+        granularity=granularity,
+        start=start,
+        end=end,
+        points=[
+            TimeSeriesPoint(period=row.period, dimension=row.dimension, count=row.count, value=float(row.value))
+            for row in db.execute(query)
+        ],
+        as_of=watermark.high_water if watermark else None,
+    )
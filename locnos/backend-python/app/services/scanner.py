@@ -0,0 +1,133 @@
+"""
+Resolução de códigos lidos no scanner (check-in/check-out no depósito).
+
+Um código pode ser o código interno, o código de barras, o número de série
+ou o conteúdo do QR Code. Todas as colunas são indexadas e a resolução é uma
+única consulta (BitmapOr dos índices), já trazendo o contrato ativo de cada
+equipamento via LATERAL.
+"""
+
+from typing import Dict, Iterable, List
+from sqlalchemy import select, or_, case, true
+from sqlalchemy.orm import Session
+
+from app.models import Contract, ContractItem, ContractStatus, Equipment, Person
+
+
+# Colunas pesquisadas, na ordem de prioridade quando um código bate em mais de uma
+CODE_FIELDS = {
+    "internal_code": Equipment.internal_code,
+    "barcode": Equipment.barcode,
+    "serial_number": Equipment.serial_number,
+    "qr_code": Equipment.qr_code,
+}
+
+# Contratos que "prendem" o equipamento: em locação ou aprovado aguardando retirada
+ACTIVE_STATUSES = (ContractStatus.ATIVO, ContractStatus.APROVADO)
+
+
+def code_candidates(code: str) -> List[str]:
+    """
+    Variações de um código lido.
+    QR Codes com URL (ex.: https://.../e/EQ-0001) também tentam o último segmento.
+    """
+    code = code.strip()
+    candidates = [code]
+    if "/" in code:
+        last_segment = code.rstrip("/").rsplit("/", 1)[-1]
+        if last_segment:
+            candidates.append(last_segment)
+    return candidates
+
+
+def resolve_codes(db: Session, codes: Iterable[str]) -> Dict[str, dict]:
+    """
+    Resolve os códigos em uma consulta.
+    Retorna {código lido: {"matched_field", "equipment", "active_contract"}};
+    códigos não encontrados ficam fora do dicionário.
+    """
+    codes = [code for code in dict.fromkeys(code.strip() for code in codes) if code]
+    candidates_by_code = {code: code_candidates(code) for code in codes}
+    all_candidates = list({c for candidates in candidates_by_code.values() for c in candidates})
+    if not all_candidates:
+        return {}
+
+    active_contract = (
+        select(
+            Contract.id.label("contract_id"),
+            Contract.contract_number,
+            Contract.status.label("contract_status"),
+            Contract.start_date,
+            Contract.end_date,
+            Person.display_name.label("customer_name"),
+        )
+        .join(ContractItem, ContractItem.contract_id == Contract.id)
+        .join(Person, Person.id == Contract.customer_id)
+        .where(
+            ContractItem.equipment_id == Equipment.id,
+            Contract.status.in_(ACTIVE_STATUSES),
+            Contract.deleted_at.is_(None),
+        )
+        .order_by(case((Contract.status == ContractStatus.ATIVO, 0), else_=1), Contract.start_date.desc())
+        .limit(1)
+        .lateral("active_contract")
+    )
+
+    rows = (
+        db.query(
+            Equipment.id,
+            Equipment.name,
+            Equipment.status,
+            Equipment.quantity_total,
+            Equipment.quantity_available,
+            Equipment.primary_image.label("primary_image"),
+            *[column.label(field) for field, column in CODE_FIELDS.items()],
+            *active_contract.c,
+        )
+        .outerjoin(active_contract, true())
+        .filter(or_(*[column.in_(all_candidates) for column in CODE_FIELDS.values()]))
+        .all()
+    )
+
+    # Índice (campo, valor) -> linha, para mapear cada código lido
+    by_value = {}
+    for row in rows:
+        for field in CODE_FIELDS:
+            value = getattr(row, field)
+            if value:
+                by_value.setdefault((field, value), row)
+
+    resolved = {}
+    for code, candidates in candidates_by_code.items():
+        match = next(
+            ((field, by_value[(field, candidate)])
+             for candidate in candidates for field in CODE_FIELDS
+             if (field, candidate) in by_value),
+            None
+        )
+        if match is None:
+            continue
+
+        field, row = match
+        resolved[code] = {
+            "matched_field": field,
+            "equipment": {
+                "id": row.id,
+                "name": row.name,
+                "internal_code": row.internal_code,
+                "status": row.status,
+                "quantity_total": row.quantity_total,
+                "quantity_available": row.quantity_available,
+                "primary_image": row.primary_image,
+            },
+            "active_contract": {
+                "id": row.contract_id,
+                "contract_number": row.contract_number,
+                "status": row.contract_status,
+                "customer_name": row.customer_name,
+                "start_date": row.start_date,
+                "end_date": row.end_date,
+            } if row.contract_id else None,
+        }
+
+    return resolved
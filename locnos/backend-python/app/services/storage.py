@@ -0,0 +1,102 @@
+"""
+Armazenamento de arquivos (imagens e derivados) endereçado por conteúdo.
+
+A interface segue o modelo de object storage (chave -> bytes), então um
+backend S3/Supabase Storage só precisa implementar os mesmos métodos.
+O backend local grava em MEDIA_ROOT e é servido em MEDIA_URL.
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional
+import os
+import shutil
+import tempfile
+
+from app.core.config import settings
+
+
+class StorageBackend(ABC):
+    """Interface mínima de object storage"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def save_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        """Grava a partir de um arquivo local (o arquivo de origem é consumido)"""
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL pública do objeto"""
+        ...
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Caminho no disco, quando o backend for local (None nos remotos)"""
+        return None
+
+    def temp_dir(self) -> Path:
+        """Diretório para uploads em andamento"""
+        return Path(tempfile.gettempdir())
+
+
+class LocalStorage(StorageBackend):
+    """Backend em disco. Escritas atômicas (arquivo temporário + rename)"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Chave inválida: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).is_file()
+
+    def save_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        path = self.local_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def save_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        target = self.local_path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(path, target)
+
+    def open(self, key: str) -> BinaryIO:
+        return self.local_path(key).open("rb")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def temp_dir(self) -> Path:
+        """Diretório para uploads em andamento (mesmo disco: o rename final é atômico)"""
+        path = self.root / ".uploads"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """Backend configurado em STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.MEDIA_ROOT, settings.MEDIA_URL)
+    raise ValueError(f"STORAGE_BACKEND não suportado: {settings.STORAGE_BACKEND}")
@@ -0,0 +1,58 @@
+"""
+Banco descartável para os benchmarks.
+Cria um schema isolado com as tabelas pedidas e o remove ao final.
+"""
+
+from contextlib import contextmanager
+import os
+import sys
+
+from sqlalchemy import create_engine, event, text
+
+from app.core.database import Base
+from app.core.search import SEARCH_SETUP_STATEMENTS
+
+
+def bench_url() -> str:
+    """URL do banco de benchmark (nunca o de produção)"""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Defina BENCH_DATABASE_URL (banco descartável, nunca o de produção)")
+    return url
+
+
+@contextmanager
+def bench_schema(schema: str, tables, keep: bool = False):
+    """Engine apontando para `schema` com as tabelas criadas"""
+    engine = create_engine(bench_url())
+
+    with engine.begin() as connection:
+        for statement in SEARCH_SETUP_STATEMENTS:
+            connection.execute(text(statement))
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+
+    bench = engine.execution_options(schema_translate_map={None: schema})
+
+    # SQL textual (seeds) também resolve as tabelas no schema do benchmark
+    @event.listens_for(engine, "connect")
+    def set_search_path(dbapi_connection, _):
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {schema}, public")
+
+    engine.dispose()
+
+    try:
+        with bench.begin() as connection:
+            Base.metadata.create_all(connection, tables=tables)
+        yield bench
+    finally:
+        if not keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        engine.dispose()
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
@@ -0,0 +1,85 @@
+"""
+Benchmark do pipeline de derivados de imagem (reprocessamento do catálogo).
+
+Gera fotos sintéticas (JPEG com ruído, próximas de fotos reais em custo de
+decodificação) e mede a vazão de render_derivatives em série e no
+ProcessPoolExecutor com diferentes números de processos.
+
+Executa:
+    python -m benchmarks.bench_image_pipeline --images 48 --size 4000x3000
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.services.images import render_derivatives
+
+
+def make_photos(directory: str, count: int, width: int, height: int) -> list:
+    """Fotos JPEG sintéticas (gradiente + ruído)"""
+    from PIL import Image, ImageChops
+
+    base = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    paths = []
+    for i in range(count):
+        noise = Image.effect_noise((width, height), 40 + i % 20).convert("RGB")
+        photo = ImageChops.add(base, noise, scale=2.0)
+        path = os.path.join(directory, f"photo-{i}.jpg")
+        photo.save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+def run_serial(paths: list) -> float:
+    started = time.perf_counter()
+    for path in paths:
+        render_derivatives(path)
+    return time.perf_counter() - started
+
+
+def run_pool(paths: list, workers: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        list(pool.map(render_derivatives, paths[:workers]))  # aquecimento (spawn + imports)
+        started = time.perf_counter()
+        list(pool.map(render_derivatives, paths, chunksize=2))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de imagens")
+    parser.add_argument("--images", type=int, default=48)
+    parser.add_argument("--size", default="4000x3000", help="LARGURAxALTURA das fotos")
+    parser.add_argument("--workers", default=None, help="Lista de processos, ex.: 1,2,4 (padrão: até cpu_count)")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    cpus = os.cpu_count() or 1
+    worker_counts = (
+        [int(value) for value in args.workers.split(",")] if args.workers
+        else sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"🖼️  Gerando {args.images} fotos {width}x{height}...")
+        paths = make_photos(directory, args.images, width, height)
+        size_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+
+        print(f"\n{'modo':<14}{'segundos':>10}{'imagens/s':>12}{'MB/s':>8}{'ganho':>8}")
+        serial = run_serial(paths)
+        print(f"{'série':<14}{serial:>10.2f}{args.images / serial:>12.1f}{size_mb / serial:>8.1f}{'1.0x':>8}")
+
+        for workers in worker_counts:
+            elapsed = run_pool(paths, workers)
+            print(
+                f"{f'pool x{workers}':<14}{elapsed:>10.2f}{args.images / elapsed:>12.1f}"
+                f"{size_mb / elapsed:>8.1f}{f'{serial / elapsed:.1f}x':>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Microbenchmark da serialização das listagens: caminho padrão x FAST_JSON_RESPONSES.
+
+Não usa banco: monta páginas sintéticas (objetos ORM transientes / tuplas)
+e mede só a CPU de transformar a página em bytes JSON.
+
+- padrão: modelo Pydantic -> serialize_response do FastAPI (revalida contra
+  o response_model + jsonable_encoder) -> JSONResponse
+- rápido: TypeAdapter (validação única) ou dicts das tuplas -> orjson
+
+Executa:
+    python -m benchmarks.bench_serialization --rows 100 --repeat 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.serialization import dumps, serialize_items
+from app.models.contract import ContractStatus
+from app.models.equipment import Equipment, EquipmentStatus
+from app.models.person import Person, PersonDocumentType, PersonStatus
+from app.schemas.contract import ContractListItem, ContractListResponse
+from app.schemas.equipment import EquipmentListResponse, EquipmentResponse
+from app.schemas.person import PersonListResponse, PersonResponse
+from benchmarks._bench_db import percentile
+
+
+NOW = datetime(2025, 1, 15, 10, 30, tzinfo=timezone.utc)
+
+
+def make_equipment(i: int) -> Equipment:
+    return Equipment(
+        id=uuid.uuid4(), name=f"Betoneira 400L #{i}", description="Betoneira para obra, motor 2cv, monofásica.",
+        category_id=uuid.uuid4(), brand="Menegotti", internal_code=f"EQ-{i:06d}",
+        status=EquipmentStatus.AVAILABLE, quantity_total=3, quantity_available=2, quantity_rented=1,
+        visible=True, featured=i % 10 == 0, daily_rate=Decimal("89.90"),
+        images=[{"url": f"https://cdn.example.com/{i}/{k}.jpg", "isPrimary": k == 0} for k in range(4)],
+        specifications={f"spec_{k}": f"valor {k}" for k in range(15)},
+        rental_periods=[
+            {"description": "1 a 3 dias", "days": 3, "value": 250.0},
+            {"description": "1 semana", "days": 7, "value": 400.0},
+            {"description": "Mensal", "days": 30, "value": 1200.0},
+        ],
+        tags=["obra", "concreto"], created_at=NOW - timedelta(days=i),
+    )
+
+
+def make_person(i: int) -> Person:
+    return Person(
+        id=uuid.uuid4(), types=["client"], primary_type="client", document_type=PersonDocumentType.CPF,
+        full_name=f"Maria da Silva {i}", cpf=f"{i:011d}", phone="11987654321", email=f"cliente{i}@example.com",
+        address={
+            "cep": "01310100", "street": "Avenida Paulista", "number": str(i), "complement": None,
+            "neighborhood": "Bela Vista", "city": "São Paulo", "state": "SP",
+        },
+        references=[
+            {"name": "João Souza", "phone": "11912345678", "relationship": "irmão", "verified": True},
+            {"name": "Ana Lima", "phone": "11923456789", "relationship": "vizinha", "verified": False},
+        ],
+        documents=[{"type": "cpf", "name": "cpf.pdf", "url": f"https://cdn.example.com/docs/{i}.pdf"}],
+        status=PersonStatus.APPROVED if hasattr(PersonStatus, "APPROVED") else list(PersonStatus)[0],
+        active=True, credit_limit=Decimal("5000.00"), defaulter=False, total_rentals=i % 7,
+        total_spent=Decimal("1234.56"), created_at=NOW - timedelta(days=i), updated_at=NOW,
+        customer_since=NOW - timedelta(days=400),
+    )
+
+
+ContractRow = namedtuple("ContractRow", [
+    "id", "contract_number", "customer_name", "status", "start_date", "end_date",
+    "total_value", "total_days", "items_count", "created_at",
+])
+
+
+def make_contract_row(i: int) -> ContractRow:
+    return ContractRow(
+        uuid.uuid4(), f"CTR-2025-{i:05d}", f"Cliente {i}", ContractStatus.ATIVO,
+        date(2025, 1, 10), date(2025, 1, 20), Decimal("1890.00"), 10, 3, NOW,
+    )
+
+
+def default_path(response_model, content) -> bytes:
+    """O que o FastAPI faz com um endpoint que retorna o modelo de resposta"""
+    field = create_model_field(name="Response", type_=response_model, mode="serialization")
+    value = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(value).body
+
+
+def scenarios(rows: int):
+    equipment = [make_equipment(i) for i in range(rows)]
+    persons = [make_person(i) for i in range(rows)]
+    contracts = [make_contract_row(i) for i in range(rows)]
+    page = dict(total=rows * 10, page=1, per_page=rows, pages=10)
+    contract_page = dict(total=rows * 10, page=1, page_size=rows, total_pages=10)
+
+    return {
+        "equipment": (
+            lambda: default_path(EquipmentListResponse, EquipmentListResponse(items=equipment, **page)),
+            lambda: dumps({"items": serialize_items(EquipmentResponse, equipment), **page}),
+        ),
+        "persons": (
+            lambda: default_path(PersonListResponse, PersonListResponse(items=persons, **page)),
+            lambda: dumps({"items": serialize_items(PersonResponse, persons), **page}),
+        ),
+        "contracts": (
+            lambda: default_path(ContractListResponse, ContractListResponse(
+                items=[ContractListItem(**dict(row._asdict(), id=str(row.id))) for row in contracts],
+                **contract_page
+            )),
+            lambda: dumps({"items": [dict(row._asdict(), id=str(row.id)) for row in contracts], **contract_page}),
+        ),
+    }
+
+
+def measure(function, repeat: int):
+    function()  # aquecimento (caches de schema/adapters)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de serialização das listagens")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.rows} itens por página, {args.repeat} repetições\n")
+    print(f"{'listagem':<12}{'caminho':<10}{'mediana ms':>12}{'p95 ms':>10}{'bytes':>10}{'ganho':>8}")
+
+    for name, (default, fast) in scenarios(args.rows).items():
+        results = {}
+        for path, function in (("padrão", default), ("rápido", fast)):
+            timings = measure(function, args.repeat)
+            results[path] = statistics.median(timings)
+            gain = f"{results['padrão'] / results[path]:.1f}x" if path == "rápido" else ""
+            print(
+                f"{name:<12}{path:<10}{results[path]:>12.3f}{percentile(timings, 0.95):>10.3f}"
+                f"{len(function()):>10}{gain:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
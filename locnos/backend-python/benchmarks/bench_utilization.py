@@ -0,0 +1,68 @@
+"""
+Benchmark do relatório de utilização (app/services/analytics.py).
+
+Não usa banco: gera equipamentos e itens de contrato sintéticos e mede só o
+cálculo vetorizado (matriz equipamento x dia, agregação por mês/categoria).
+
+Executa:
+    python -m benchmarks.bench_utilization --equipment 10000 --days 730
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.services.analytics import build_report
+
+
+def make_data(n_equipment: int, n_categories: int, start: date, days: int, rentals_per_equipment: int):
+    rng = random.Random(42)
+    categories = [uuid.uuid4() for _ in range(n_categories)]
+    equipments = []
+    rentals = []
+
+    for i in range(n_equipment):
+        equipment_id = uuid.uuid4()
+        owned_since = start + timedelta(days=rng.randint(-365, days // 2))
+        quantity_total = rng.choice((1, 1, 1, 2, 5, 10))
+        equipments.append((equipment_id, f"Equipamento {i}", f"EQ-{i:06d}", rng.choice(categories), quantity_total, owned_since))
+
+        for _ in range(rng.randint(0, rentals_per_equipment * 2)):
+            rental_start = start + timedelta(days=rng.randint(-30, days))
+            rental_end = rental_start + timedelta(days=rng.randint(1, 30))
+            rentals.append((equipment_id, rental_start, rental_end, rng.randint(1, quantity_total), Decimal("85.00")))
+
+    return equipments, rentals, {category_id: f"Categoria {i}" for i, category_id in enumerate(categories)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório de utilização")
+    parser.add_argument("--equipment", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--rentals", type=int, default=12, help="Locações médias por equipamento")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = date(2023, 1, 1)
+    end = start + timedelta(days=args.days - 1)
+    equipments, rentals, names = make_data(args.equipment, args.categories, start, args.days, args.rentals)
+    print(f"{len(equipments)} equipamentos, {len(rentals)} itens locados, {args.days} dias\n")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        report = build_report(equipments, rentals, names, start, end)
+        timings.append(time.perf_counter() - started)
+
+    print(f"mediana: {statistics.median(timings):.2f}s  (min {min(timings):.2f}s)")
+    print(f"utilização geral: {report['summary']['utilization']}%  "
+          f"receita: {report['summary']['revenue']:.2f}  meses: {len(report['months'])}")
+
+
+if __name__ == "__main__":
+    main()
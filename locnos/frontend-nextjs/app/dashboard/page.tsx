@@ -1,22 +1,43 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useRef, useState } from 'react';
 import { useAuthStore } from '@/lib/store/auth';
 import { api } from '@/lib/auth';
+import { useChangeEvents } from '@/lib/hooks/useChangeEvents';
 
 interface DashboardStats {
     orders: {
         total: number;
         pending: number;
         in_transit: number;
+        overdue: number;
+        failed: number;
     };
     equipment: {
         total: number;
         available: number;
+        rented: number;
+        maintenance: number;
     };
     fleet: {
         active_vehicles: number;
+        available: number;
+        in_route: number;
+        maintenance: number;
+    };
+    contracts: {
+        open: number;
+        awaiting_approval: number;
+        active: number;
+        overdue: number;
+        finished_this_month: number;
+    };
+    revenue: {
+        active: number;
+        open: number;
+        this_month: number;
     };
+    generated_at: string;
 }
 
 export default function DashboardPage() {
@@ -24,21 +45,30 @@ export default function DashboardPage() {
     const [stats, setStats] = useState<DashboardStats | null>(null);
     const [loading, setLoading] = useState(true);
 
-    useEffect(() => {
-        const fetchStats = async () => {
-            try {
-                const response = await api.get<DashboardStats>('/dashboard/stats');
-                setStats(response.data);
-            } catch (error) {
-                console.error('Erro ao buscar estatísticas:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
+    const refetchTimer = useRef<ReturnType<typeof setTimeout>>();
 
-        fetchStats();
+    const fetchStats = useCallback(async () => {
+        try {
+            const response = await api.get<DashboardStats>('/dashboard/stats');
+            setStats(response.data);
+        } catch (error) {
+            console.error('Erro ao buscar estatísticas:', error);
+        } finally {
+            setLoading(false);
+        }
     }, []);
 
+    useEffect(() => {
+        fetchStats();
+        return () => clearTimeout(refetchTimer.current);
+    }, [fetchStats]);
+
+    // Alterações chegam em rajadas: agrupa numa única busca
+    useChangeEvents(['pedidos', 'rotas', 'contratos'], () => {
+        clearTimeout(refetchTimer.current);
+        refetchTimer.current = setTimeout(fetchStats, 2000);
+    });
+
     if (loading) {
         return <div className="p-6">Carregando dashboard...</div>;
     }
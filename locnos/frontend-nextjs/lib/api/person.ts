@@ -37,9 +37,14 @@ export const personService = {
         await api.delete(`/persons/${id}`);
     },
 
-    // Freteiros disponíveis
-    async getAvailableDrivers(): Promise<Person[]> {
-        const response = await api.get<Person[]>('/persons/drivers/available');
+    // Freteiros disponíveis (paginado)
+    async getAvailableDrivers(params?: {
+        page?: number;
+        per_page?: number;
+        license_category?: string;
+        vehicle_type?: string;
+    }): Promise<PersonListResponse> {
+        const response = await api.get<PersonListResponse>('/persons/drivers/available', { params });
         return response.data;
     },
 };
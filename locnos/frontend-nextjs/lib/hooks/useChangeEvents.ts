@@ -0,0 +1,40 @@
+import { useEffect, useRef } from 'react';
+import { auth } from '@/lib/auth';
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
+
+export type ChangeTopic = 'pedidos' | 'rotas' | 'contratos';
+
+export interface ChangeEvent {
+    topic: ChangeTopic | 'resync';
+    op?: 'insert' | 'update' | 'delete';
+    id?: string;
+    status?: string;
+    [field: string]: unknown;
+}
+
+/**
+ * Assina o stream SSE de alterações (/events/stream).
+ * `resync` chega após reconexão ou fila estourada: recarregar tudo.
+ * O EventSource reconecta sozinho; o token vai na query (não envia cabeçalhos).
+ */
+export function useChangeEvents(topics: ChangeTopic[], onEvent: (event: ChangeEvent) => void) {
+    const handler = useRef(onEvent);
+    handler.current = onEvent;
+    const key = topics.join(',');
+
+    useEffect(() => {
+        const token = auth.getToken();
+        if (!token || typeof EventSource === 'undefined') return;
+
+        const params = new URLSearchParams({ topics: key, access_token: token });
+        const source = new EventSource(`${API_URL}/events/stream?${params}`);
+        const listener = (message: MessageEvent) => {
+            const data = message.data ? JSON.parse(message.data) : {};
+            handler.current({ ...data, topic: message.type as ChangeEvent['topic'] });
+        };
+        [...key.split(','), 'resync'].forEach((topic) => source.addEventListener(topic, listener));
+
+        return () => source.close();
+    }, [key]);
+}